@@ -1 +1,4 @@
-from .vedirct import vedirect
\ No newline at end of file
+from .vedirct import vedirect, AsyncVEDirect, VEDirectFleet, VEDirectScheduler, VEDirectMetrics, HeartbeatParser
+from .vedirct import TelemetryBuffer, hex_checksum, encode_frame, decode_frame, decode_history
+from .vedirct import device_logger, FrameTraceHandler, read_trace
+from .vedirct import open_transport, Transport, TcpTransport, ReplayTransport, TRANSPORTS
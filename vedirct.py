@@ -1,7 +1,26 @@
 #!/usr/bin/env python3
 #******************************** Dependencies *********************************
+import array
+import asyncio
+import bisect
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import json
+import logging
+import os
+import re
+import select
 import serial
+import socket
+import struct
+import sys
+import threading
 import time
+import urllib.parse
+try: import numpy
+except ImportError: numpy = None
 #*******************************************************************************
 #==================================== Intro ====================================
     # Aaron Kehl
@@ -37,14 +56,1064 @@ import time
 #---------------------------------- Vairables ----------------------------------
 #-------------------------------------------------------------------------------
 #---------------------------------- Constants ----------------------------------
+# Register metadata, one entry per named register:
+#   addr       - register address as written in the protocol document
+#   length     - data length in bytes
+#   signed     - two's complement data
+#   scale      - the register holds value * scale, e.g. 100 for 0.01V units
+#   unit       - engineering unit of the decoded value
+#   enum       - raw value -> label returned when DESCRIPTIVE is set
+#   capability - capabilities flag the device must report as "1"
+#   writable   - a setter is generated
+#   kind       - static, setting or telemetry, picks the cache lifetime
+#   min, max   - accepted setter range in engineering units
+#   model      - model_name must contain this ("!..." must not contain it)
+#   na         - raw value the device uses for "not available", setters of
+#                unsigned registers take -1 for it
+#   unknown    - returned when DESCRIPTIVE is set for na and for raw values
+#                enum doesn't list, ERROR_VAL if None
+# A plain accessor property is generated for every entry the vedirect class
+# doesn't define itself, the hand written ones (bit fields, strings, model
+# dependent addresses) only take their metadata from here.  Names starting
+# with an underscore describe a register without getting an accessor.
+Register = collections.namedtuple( "Register",
+    [ "addr", "length", "signed", "scale", "unit", "enum", "capability",
+      "writable", "kind", "min", "max", "model", "na", "unknown" ],
+    defaults=[ False, 1, "", None, None, False, "telemetry", None, None, None, None, None ] )
+
+_OFF_ON = { 0: "OFF", 1: "ON" }
+_NO_YES = { 0: "NO", 1: "YES" }
+_TRACKER_MODE = { 0: "OFF", 1: "Voltage/Current limited", 2: "MPP Tracker" }
+# system voltages are labelled with themselves, the getters return plain volts.
+_SYSTEM_VOLTAGE = { 12: 12, 24: 24, 36: 36, 48: 48 }
+_DIGITS = { n: str( n ) for n in range( 6 ) }
+
+REGISTERS = {
+    # Product Information
+    "pid":                                Register( b'\x01\x00', 4, kind="static" ),
+    "group_id":                           Register( b'\x01\x04', 1, kind="static" ),
+    "serial_number":                      Register( b'\x01\x0A', 32, kind="static" ),
+    "model_name":                         Register( b'\x01\x0B', 32, kind="static" ),
+    "capabilities":                       Register( b'\x01\x40', 4, kind="static" ),
+
+    # Generic Device Control
+    "device_mode":                        Register( b'\x02\x00', 1, enum={ 0: "OFF", 1: "ON", 4: "OFF" } ),
+    "device_state":                       Register( b'\x02\x01', 1, signed=True,
+                                              enum={ 0: "NOT_CHARGING", 2: "FAULT", 3: "BULK", 4: "ABSORPTION",
+                                                     5: "FLOAT", 6: "STORAGE", 7: "MANUAL EQUALISE",
+                                                     -11: "WAKE-UP", -9: "AUTO EQUALISE", -6: "BLOCKED",
+                                                     -4: "EXTERNAL CONTROL", -1: "UNAVAILABLE" },
+                                              unknown="UNKNOWN DEVICE STATE" ),
+    "remote_control":                     Register( b'\x02\x02', 4, enum=_OFF_ON, writable=True, kind="setting" ),
+    "device_off_reason":                  Register( b'\x02\x05', 1 ),
+    "_device_off_reason_rs":              Register( b'\x02\x07', 4, model="MPPT RS" ),
+
+    # Battery Settings
+    "batterysafe_mode":                   Register( b'\xED\xFF', 1, enum=_OFF_ON, writable=True, kind="setting" ),
+    "adaptive_mode":                      Register( b'\xED\xFE', 1, enum=_OFF_ON, writable=True, kind="setting" ),
+    "automatic_equalisation_mode":        Register( b'\xED\xFD', 1, writable=True, kind="setting", min=0, max=249 ),
+    "battery_bulk_time_limit":            Register( b'\xED\xFC', 2, scale=100, unit="h", writable=True, kind="setting", min=0, max=100 ),
+    "battery_absorption_time_limit":      Register( b'\xED\xFB', 2, scale=100, unit="h", writable=True, kind="setting", min=0, max=100 ),
+    "battery_absorption_voltage":         Register( b'\xED\xF7', 2, scale=100, unit="V", writable=True, kind="setting", min=0, max=100 ),
+    "battery_float_voltage":              Register( b'\xED\xF6', 2, scale=100, unit="V", writable=True, kind="setting", min=0, max=100 ),
+    "battery_equalisation_voltage":       Register( b'\xED\xF4', 2, scale=100, unit="V", writable=True, kind="setting", min=0, max=100 ),
+    "battery_temp_comp":                  Register( b'\xED\xF2', 2, signed=True, scale=100, unit="mV/K", writable=True, kind="setting", min=-1000, max=1000 ),
+    "battery_type":                       Register( b'\xED\xF1', 1, signed=True, writable=True, kind="setting", min=-1, max=10 ),
+    "battery_max_curr":                   Register( b'\xED\xF0', 2, scale=10, unit="A", writable=True, kind="setting", min=0, max=1000 ),
+    "battery_system_voltage":             Register( b'\xED\xEF', 1, unit="V", enum=_SYSTEM_VOLTAGE, writable=True, kind="setting" ),
+    "battery_temp":                       Register( b'\xED\xEC', 2, scale=100, unit="K", na=0xFFFF, unknown="Not Available" ),
+    "battery_voltage_setting":            Register( b'\xED\xEA', 1, unit="V", enum=_SYSTEM_VOLTAGE, writable=True, kind="setting" ),
+    "battery_bms_present":                Register( b'\xED\xE8', 1, enum=_NO_YES, writable=True, kind="setting" ),
+    "battery_tail_current":               Register( b'\xED\xE7', 2, scale=10, unit="A", writable=True, kind="setting", min=0, max=1000 ),
+    "battery_low_temp_charge_curr":       Register( b'\xED\xE6', 2, scale=10, unit="A", writable=True, kind="setting", min=0, max=1000,
+                                                    na=0xFFFF, unknown="Use Max" ),
+    "battery_auto_eq_stop_on_voltage":    Register( b'\xED\xE5', 1, enum=_NO_YES, writable=True, kind="setting" ),
+    "battery_equalisation_current_level": Register( b'\xED\xE4', 1, unit="%", writable=True, kind="setting", min=0, max=100 ),
+    "battery_equalisation_duration":      Register( b'\xED\xE3', 2, scale=100, unit="h", writable=True, kind="setting", min=0, max=1000 ),
+    "battery_rebulk_voltage_offset":      Register( b'\xED\x2E', 2, scale=100, unit="V", writable=True, kind="setting", min=0, max=1000 ),
+    "battery_low_temp_level":             Register( b'\xED\xE0', 2, signed=True, scale=100, unit="C", writable=True, kind="setting", min=-60, max=100 ),
+    "battery_voltage_compensation":       Register( b'\xED\xCA', 2, scale=100, unit="V", writable=True, kind="setting", min=0, max=100 ),
+    "battery_rem_input_mode_config":      Register( b'\xD0\xC0', 1, enum={ 0: "Remote On/Off", 1: "2-Wire BMS Signals" },
+                                                    writable=True, kind="setting", model="MPPT RS" ),
+    "battery_wire_input_states":          Register( b'\xD0\x1F', 1, model="MPPT RS" ),
+
+    # Charger Data
+    "charger_max_curr":                   Register( b'\xED\xDF', 2, scale=10, unit="A", kind="static" ),
+    "system_yield":                       Register( b'\xED\xDD', 4, scale=100, unit="kWh", na=0xFFFFFFFF, unknown="Not Available" ),
+    "user_yield":                         Register( b'\xED\xDC', 4, scale=100, unit="kWh", na=0xFFFFFFFF, unknown="Not Available" ),
+    "charger_internal_temp":              Register( b'\xED\xDB', 2, signed=True, scale=100, unit="C" ),
+    "charger_error_code":                 Register( b'\xED\xDA', 1 ),
+    "charger_current":                    Register( b'\xED\xD7', 2, scale=10, unit="A", model="!MPPT RS" ),
+    "charger_voltage":                    Register( b'\xED\xD5', 2, scale=100, unit="V", model="!MPPT RS" ),
+    "charger_addtl_info":                 Register( b'\xED\xD4', 1 ),
+    "yield_today":                        Register( b'\xED\xD3', 2, scale=100, unit="kWh" ),
+    "max_power_today":                    Register( b'\xED\xD2', 2, unit="W" ),
+    "yield_yesterday":                    Register( b'\xED\xD1', 2, scale=100, unit="kWh" ),
+    "max_power_yesterday":                Register( b'\xED\xD0', 2, unit="W" ),
+    "voltage_settings_range":             Register( b'\xED\xCE', 2, unit="V", kind="static" ),
+    "history_version":                    Register( b'\xED\xCD', 1, kind="static" ),
+    "streetlight_version":                Register( b'\xED\xCC', 1, kind="static" ),
+    "equalise_current_max":               Register( b'\xED\xC7', 1, unit="%", kind="static", model="MPPT RS" ),
+    "equalise_voltage_max":               Register( b'\xED\xC6', 2, scale=100, unit="V", kind="static", model="MPPT RS" ),
+    "adjustable_voltage_min":             Register( b'\x22\x11', 2, scale=100, unit="V", kind="static" ),
+    "adjustable_voltage_max":             Register( b'\x22\x12', 2, scale=100, unit="V", kind="static" ),
+    "dc_battery_ripple_voltage":          Register( b'\xED\x8B', 2, scale=100, unit="V", model="MPPT RS" ),
+    "dc_battery_voltage":                 Register( b'\xED\x8D', 2, scale=100, unit="V", model="MPPT RS" ),
+    "dc_battery_current":                 Register( b'\xED\x8F', 2, signed=True, scale=10, unit="A", model="MPPT RS" ),
+
+    # Solar Panel Data
+    "num_mppt_tracker":                   Register( b'\x02\x44', 1, kind="static", model="MPPT RS" ),
+    "panel_maximum_current":              Register( b'\xED\xBF', 2, scale=10, unit="A", kind="static" ),
+    "panel_power":                        Register( b'\xED\xBC', 4, scale=100, unit="W" ),
+    "panel_voltage":                      Register( b'\xED\xBB', 2, scale=100, unit="V", na=0xFFFF, unknown="Not Available" ),
+    "panel_current":                      Register( b'\xED\xBD', 2, scale=10, unit="A", capability="Panel Current" ),
+    "panel_max_allowed_voltage":          Register( b'\xED\xB8', 2, scale=100, unit="V", kind="static" ),
+    "tracker_mode":                       Register( b'\xED\xB3', 1, enum=_TRACKER_MODE ),
+    "panel_start_volt":                   Register( b'\xED\xB2', 2, scale=100, unit="V", model="MPPT RS" ),
+    "panel_input_resistance":             Register( b'\xED\xB1', 4, unit="Ohm", model="MPPT RS" ),
+
+    # Load Output Data/Settings
+    "load_current":                       Register( b'\xED\xAD', 2, scale=10, unit="A" ),
+    "load_offset_voltage":                Register( b'\xED\xAC', 1, scale=100, unit="V", writable=True, kind="setting", min=0, max=2.55 ),
+    "load_output_control":                Register( b'\xED\xAB', 1, enum={ 0: "OFF", 1: "AUTO", 2: "ALT1", 3: "ALT2",
+                                                                          4: "ON", 5: "USER1", 6: "USER2", 7: "AES" },
+                                                    writable=True, kind="setting" ),
+    "load_output_voltage":                Register( b'\xED\xA9', 2, scale=100, unit="V" ),
+    "load_output_state":                  Register( b'\xED\xA8', 1, enum=_OFF_ON ),
+    "load_switch_high_level":             Register( b'\xED\x9D', 2, scale=100, unit="V", writable=True, kind="setting", min=0, max=100 ),
+    "load_switch_low_level":              Register( b'\xED\x9C', 2, scale=100, unit="V", writable=True, kind="setting", min=0, max=100 ),
+    "load_output_off_reason":             Register( b'\xED\x91', 1 ),
+    "load_aes_timer":                     Register( b'\xED\x90', 2, unit="min", writable=True, kind="setting", min=0, max=10000 ),
+
+    # Relay Settings
+    "relay_opmode":                       Register( b'\xED\xD9', 1, enum={ 0: "Relay Always Off", 1: "Panel Voltage High",
+                                                     2: "Internal Temp Too High", 3: "Battery Voltage Too low",
+                                                     4: "Equalisation Active", 5: "Error Condition Present",
+                                                     6: "Internal Temp Too Low", 7: "Battery Voltage Too High",
+                                                     8: "Charger in Float or Storage", 9: "Day Detection (Panels Irradiated)",
+                                                     10: "Load Control (Switches According to Load Control Mode)" },
+                                                    writable=True, kind="setting" ),
+    "relay_battery_low_voltage_set":      Register( b'\x03\x50', 2, scale=100, unit="V", writable=True, kind="setting", min=0, max=100 ),
+    "relay_battery_low_voltage_clear":    Register( b'\x03\x51', 2, scale=100, unit="V", writable=True, kind="setting", min=0, max=100 ),
+    "relay_battery_high_voltage_set":     Register( b'\x03\x52', 2, scale=100, unit="V", writable=True, kind="setting", min=0, max=100 ),
+    "relay_battery_high_voltage_clear":   Register( b'\x03\x53', 2, scale=100, unit="V", writable=True, kind="setting", min=0, max=100 ),
+    "relay_panel_high_voltage_set":       Register( b'\xED\xBA', 2, scale=100, unit="V", writable=True, kind="setting", min=0, max=655 ),
+    "relay_panel_high_voltage_clear":     Register( b'\xED\xB9', 2, scale=100, unit="V", writable=True, kind="setting", min=0, max=655 ),
+    "relay_min_enabled_time":             Register( b'\x10\x0A', 2, unit="min", writable=True, kind="setting", min=0, max=65535 ),
+
+    # Lighting Controller Timer
+    "lighting_timer_events":              Register( b'\xED\xA0', 4, writable=True, kind="setting" ),
+    "_lighting_timer_event_2":            Register( b'\xED\xA1', 4, writable=True, kind="setting" ),
+    "_lighting_timer_event_3":            Register( b'\xED\xA2', 4, writable=True, kind="setting" ),
+    "_lighting_timer_event_4":            Register( b'\xED\xA3', 4, writable=True, kind="setting" ),
+    "_lighting_timer_event_5":            Register( b'\xED\xA4', 4, writable=True, kind="setting" ),
+    "_lighting_timer_event_6":            Register( b'\xED\xA5', 4, writable=True, kind="setting" ),
+    "lighting_midpoint_shift":            Register( b'\xED\xA7', 2, signed=True, unit="min", writable=True, kind="setting", min=-24, max=24 ),
+    "lighting_gradual_dim_speed":         Register( b'\xED\x9B', 1, unit="s", writable=True, kind="setting", min=0, max=255 ),
+    "lighting_panel_voltage_night":       Register( b'\xED\x9A', 2, scale=100, unit="V", writable=True, kind="setting", min=0, max=655 ),
+    "lighting_panel_voltage_day":         Register( b'\xED\x99', 2, scale=100, unit="V", writable=True, kind="setting", min=0, max=655 ),
+    "lighting_sunset_delay":              Register( b'\xED\x96', 2, unit="min", writable=True, kind="setting", min=0, max=10000 ),
+    "lighting_sunrise_delay":             Register( b'\xED\x97', 2, unit="min", writable=True, kind="setting", min=0, max=10000 ),
+    "lighting_aes_timer":                 Register( b'\xED\x90', 2, unit="min", writable=True, kind="setting", min=0, max=10000 ),
+    "lighting_solar_activity":            Register( b'\x20\x30', 1, enum={ 0: "DARK", 1: "LIGHT" } ),
+    "lighting_time_of_day":               Register( b'\x20\x31', 2, unit="min", writable=True, min=0, max=1439, na=0xFFFF, unknown="Not Available" ),
+
+    # VE.Direct Port Functions
+    "tx_port_opmode":                     Register( b'\xED\x9E', 1, enum={ 0: "Normal VE.Direct Communication (default)",
+                                                     1: "Pulse for every 0.01kWh harvested (100ms low)",
+                                                     2: "Lighting control pwm normal (f=160Hz, 0%=0V)",
+                                                     3: "Lighting control pwm inverted (f=160Hz, 0%=5V)",
+                                                     4: "Virtual load output" },
+                                                    writable=True, kind="setting" ),
+    "rx_port_opmode":                     Register( b'\xED\x98', 1, enum={ 0: "Remote On/Off", 1: "Load output configuration",
+                                                     2: "Load output on/off remote control (inverted)",
+                                                     3: "Load output on/off remote control (normal)" },
+                                                    writable=True, kind="setting" ),
+
+    # Pluggable/Internal Display Functions
+    "disp_backlight_mode":                Register( b'\x04\x00', 1, writable=True, kind="setting", model="!MPPT RS" ),
+    "_disp_backlight_mode_rs":            Register( b'\x04\x08', 1, writable=True, kind="setting", model="MPPT RS" ),
+    "disp_backlight_intensity":           Register( b'\x04\x01', 1, enum={ 0: "ALWAYS OFF", 1: "ON" }, writable=True, kind="setting",
+                                                    unknown="UNKNOWN INTENSITY SETTING" ),
+    "disp_scroll_speed":                  Register( b'\x04\x02', 1, enum={ 1: "SLOW", 2: "SLOW MEDIUM", 3: "MEDIUM",
+                                                                          4: "MEDIUM FAST", 5: "FAST" },
+                                                    writable=True, kind="setting", unknown="UNKNOWN SCROLL SPEED" ),
+    "disp_setup_lock":                    Register( b'\x04\x03', 1, enum={ 0: "UNLOCKED", 1: "LOCKED" }, writable=True, kind="setting",
+                                                    unknown="UNKNOWN" ),
+    "disp_temp_units":                    Register( b'\x04\x04', 1, enum={ 0: "CELSIUS", 1: "FARENHEIT" }, writable=True, kind="setting",
+                                                    unknown="UNKNOWN" ),
+    "disp_contrast":                      Register( b'\x04\x06', 1, enum=_DIGITS, writable=True, kind="setting", min=0, max=5,
+                                                    unknown="UNKNOWN" ),
+
+    # Remote Control Functions
+    "rm_charge_algorithm":                Register( b'\x20\x00', 1, writable=True, min=0, max=255 ),
+    "rm_charge_voltage_setpoint":         Register( b'\x20\x01', 2, scale=100, unit="V", writable=True, min=0, max=655, na=0xFFFF ),
+    "rm_battery_voltage_sense":           Register( b'\x20\x02', 2, scale=100, unit="V", writable=True, min=0, max=655, na=0xFFFF ),
+    "rm_battery_temp_sense":              Register( b'\x20\x03', 2, signed=True, scale=100, unit="C", writable=True, min=-327, max=327, na=0x7FFF ),
+    "remote_command":                     Register( b'\x20\x04', 1, writable=True, min=1, max=4 ),
+    "rm_charge_state_elapsed_time":       Register( b'\x20\x07', 4, scale=1000, unit="s" ),
+    "rm_absorption_time":                 Register( b'\x20\x08', 2, scale=100, unit="h", writable=True, min=0, max=655 ),
+    "rm_error_code":                      Register( b'\x20\x09', 1, enum=_DIGITS, unknown="UNKNOWN" ),
+    "rm_battery_charge_current":          Register( b'\x20\x0A', 4, signed=True, scale=1000, unit="A", writable=True, min=-1000, max=10000 ),
+    "rm_battery_idle_voltage":            Register( b'\x20\x0B', 2, scale=100, unit="V", writable=True, min=0, max=655 ),
+    "rm_device_state":                    Register( b'\x20\x0C', 1, signed=True,
+                                              enum={ -11: "WAKE-UP", -10: "REPEATED ABSORPTION", -9: "AUTO EQUALISE",
+                                                     -8: "BATTERY SAFE", -7: "LOAD DETECT", -4: "EXTERNAL CONTROL",
+                                                     -1: "UNAVAILABLE", 0: "NOT CHARGING", 2: "FAULT", 3: "BULK",
+                                                     4: "ABSORPTION", 5: "FLOAT", 6: "STORAGE", 7: "MANUAL EQUALISE",
+                                                     11: "POWER SUPPLY" },
+                                              writable=True, unknown="UNKNOWN" ),
+    "rm_network_info":                    Register( b'\x20\x0D', 1 ),
+    "rm_network_mode":                    Register( b'\x20\x0E', 1, writable=True ),
+    "rm_network_status":                  Register( b'\x20\x0F', 1 ),
+    "rm_total_charge_current":            Register( b'\x20\x13', 4, signed=True, scale=1000, unit="A", writable=True, min=-100000, max=1000000 ),
+    "rm_charge_current_percentage":       Register( b'\x20\x14', 1, unit="%", writable=True, min=0, max=100 ),
+    "rm_charge_current_limit":            Register( b'\x20\x15', 2, scale=10, unit="A", writable=True, min=0, max=6553, na=0xFFFF ),
+    "rm_manual_equalisation_pending":     Register( b'\x20\x18', 1, writable=True, min=0, max=255 ),
+    "rm_total_dc_input_power":            Register( b'\x20\x27', 4, scale=100, unit="W", writable=True, min=0, max=42949672 ),
+}
+
+# Register classes used by the value cache, anything not listed is treated as
+# live telemetry.
+STATIC_REGISTERS = frozenset( reg.addr for reg in REGISTERS.values() if reg.kind == "static" )
+SETTING_REGISTERS = frozenset( reg.addr for reg in REGISTERS.values() if reg.kind == "setting" )
+
+NAN = float( "nan" )
+
+# Default cache lifetime in seconds per register class.
+CACHE_TTL = { "static": float( "inf" ), "setting": 300, "telemetry": 0.5 }
+
+# Property groups read by snapshot(), per device copies can be extended
+# through snapshot_groups.
+SNAPSHOT_GROUPS = {
+    "telemetry": [ "panel_power", "panel_voltage", "panel_current", "charger_current", "charger_voltage",
+                   "charger_internal_temp", "device_state", "device_mode", "tracker_mode", "charger_error_code",
+                   "charger_addtl_info", "yield_today", "max_power_today", "yield_yesterday",
+                   "max_power_yesterday", "load_current", "load_output_state", "user_yield", "system_yield" ],
+    "battery_settings": [ "batterysafe_mode", "adaptive_mode", "automatic_equalisation_mode", "battery_type" ] +
+                        [ name for name in REGISTERS if name.startswith( "battery_" ) and REGISTERS[name].kind == "setting" 
+                          and name != "battery_type" ],
+    "load":     [ name for name in REGISTERS if name.startswith( "load_" ) ],
+    "relay":    [ name for name in REGISTERS if name.startswith( "relay_" ) ],
+    "lighting": [ name for name in REGISTERS if name.startswith( "lighting_" ) ],
+    "network":  [ name for name in REGISTERS if name.startswith( "rm_" ) ],
+}
+
+# The six lighting controller timer event registers, all behind the 
+# lighting_timer_events property.
+_TIMER_EVENTS = ( "lighting_timer_events", "_lighting_timer_event_2", "_lighting_timer_event_3",
+                  "_lighting_timer_event_4", "_lighting_timer_event_5", "_lighting_timer_event_6" )
+
+# register address -> data bytes of its GET reply.
+_REGISTER_LENGTHS = { reg.addr: reg.length for reg in REGISTERS.values() }
+
+# Registers and formats read by the hand written properties that don't read
+# their REGISTERS entry as 'int', snapshot() prefetches these instead.
+_PROPERTY_READS = {
+    "pid":                   [ ( 4, REGISTERS[ "pid" ].addr, 'b' ) ],
+    "group_id":              [ ( 1, REGISTERS[ "group_id" ].addr, 'b' ) ],
+    "serial_number":         [ ( 64, REGISTERS[ "serial_number" ].addr, 'str' ) ],
+    "model_name":            [ ( 64, REGISTERS[ "model_name" ].addr, 'b' ) ],
+    "lighting_timer_events": [ ( 4, REGISTERS[ name ].addr, 'b' ) for name in _TIMER_EVENTS ],
+}
+
+# Writable settings saved by backup_settings(), the file format and version
+# restore_settings() reads, and the settings it writes before the rest since
+# they change the meaning of others.
+SETTINGS = [ name for name, reg in REGISTERS.items() if reg.writable and reg.kind == "setting" ]
+SETTINGS_FORMAT = "vedirct-settings"
+SETTINGS_VERSION = 1
+RESTORE_FIRST = ( "battery_system_voltage", "battery_type" )
+
+# Settings that need hardware not every unit has, name -> capabilities flags of
+# which one must be set.  backup_settings(), restore_settings() and 
+# apply_profile() treat them as unsupported without it, the accessors don't
+# check it.
+_LOAD = ( "Load Output Present", "Virtual Load Output" )
+_RELAY = ( "Alarm Relay", "Virtual Relay" )
+_LIGHTING = ( "Solar Timer/Streetlighting", )
+SETTING_CAPABILITIES = {
+    "remote_control":                   ( "Remote On/Off via Rx Pin", ),
+    "load_offset_voltage":              _LOAD,
+    "load_output_control":              _LOAD,
+    "load_switch_high_level":           _LOAD,
+    "load_switch_low_level":            _LOAD,
+    "load_aes_timer":                   ( "Load Automatic Energy Selector", ),
+    "lighting_aes_timer":               ( "Load Automatic Energy Selector", ),
+    "tx_port_opmode":                   ( "Alternative VE.Direct Tx Pn Function", ),
+    "rx_port_opmode":                   ( "Alternative VE.Direct Rx Pin Function", ),
+    "lighting_midpoint_shift":          _LIGHTING,
+    "lighting_gradual_dim_speed":       _LIGHTING,
+    "lighting_panel_voltage_night":     _LIGHTING,
+    "lighting_panel_voltage_day":       _LIGHTING,
+    "lighting_sunset_delay":            _LIGHTING,
+    "lighting_sunrise_delay":           _LIGHTING,
+    "lighting_time_of_day":             _LIGHTING,
+}
+SETTING_CAPABILITIES.update( ( name, _RELAY ) for name in REGISTERS if name.startswith( "relay_" ) )
+SETTING_CAPABILITIES.update( ( name, _LIGHTING ) for name in _TIMER_EVENTS )
 #-------------------------------------------------------------------------------
 #===============================================================================
 
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<< Hex Codec >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+# Whole frame HEX encode/decode, the per byte work is done by bytes.hex,
+# bytes.fromhex and bytes.translate instead of Python loops.
+
+# ascii byte -> ascii byte, keeps upper case hex digits and turns anything
+# else into "0" (the old per nibble decode read unknown characters as 0).
+_HEX_DIGITS = bytes( c if c in b'0123456789ABCDEF' else 0x30 for c in range( 256 ) )
+# string registers are checksummed over ( data byte - 0x30 ).
+_CRC_ADJ = bytes( ( c - 0x30 ) & 0xFF for c in range( 256 ) )
+
+def hex_checksum( data ):
+    """ Check byte of a HEX frame, command nibble + data + check byte sum to 0x55."""
+    return ( 0x55 - sum( data ) ) & 0xFF
+
+def encode_frame( command, data=b'' ):
+    """ Builds ':' + command nibble + data in hex + check byte + '\n', e.g.
+        encode_frame( 7, b'\xBC\xED\x00' ) == b':7BCED00A5\n'
+    """
+    return b':%X%s%02X\n' % ( command, data.hex().upper().encode(), ( 0x55 - command - sum( data ) ) & 0xFF )
+
+def decode_frame( frame ):
+    """ Returns ( command, data ) of a HEX frame, None if it is malformed or
+        the check byte is wrong.
+    """
+    frame = frame.strip()
+    if frame[:1] != b':' or len( frame ) % 2: return None
+    try:
+        command = int( frame[1:2], 16 )
+        data = bytes.fromhex( frame[2:].decode( 'ascii' ) )
+    except ValueError: return None
+    if ( command + sum( data ) ) & 0xFF != 0x55: return None
+    return command, data[:-1]
+
+# reg_addr -> ( GET frame, command, register, flag fields ), every REGISTERS
+# entry is filled in at import, other addresses on first use.
+_GET_FRAMES = {}
+# reg_addr -> ( ':8' + register + flag prefix, checksum sum of the prefix )
+_SET_TEMPLATES = {}
+
+def _get_frame_fields( reg_addr ):
+    """ Cached ':7' GET frame for reg_addr plus the fields its reply echoes."""
+    fields = _GET_FRAMES.get( reg_addr )
+    if fields is None:
+        # ve.direct flips endianness of reg, the flag byte is 0x00.
+        tx_msg = encode_frame( 7, reg_addr[::-1] + b'\x00' )
+        fields = _GET_FRAMES[ reg_addr ] = ( tx_msg, tx_msg[:2], tx_msg[2:6], tx_msg[6:8] )
+    return fields
+
+def _set_frame_fields( value, reg_addr ):
+    """ ':8' SET frame for reg_addr from a cached template, only the value and
+        the check byte are encoded per call.
+    """
+    template = _SET_TEMPLATES.get( reg_addr )
+    if template is None:
+        head = encode_frame( 8, reg_addr[::-1] + b'\x00' )[:-3]
+        template = _SET_TEMPLATES[ reg_addr ] = ( head, 8 + sum( reg_addr ) )
+    tx_msg = b'%s%s%02X\n' % ( template[0], value.hex().upper().encode(), ( 0x55 - template[1] - sum( value ) ) & 0xFF )
+    return tx_msg, tx_msg[:2], tx_msg[2:6], tx_msg[6:8]
+
+for _reg in REGISTERS.values(): _get_frame_fields( _reg.addr )
+#*******************************************************************************
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<< History Layouts >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+# History records as precompiled struct layouts, and numpy structured dtypes 
+# if numpy is installed, so a record is one unpack instead of a slice and 
+# int.from_bytes per field.  Fields are ( name, struct code, decimal places ),
+# places None keeps the raw int, otherwise the value is divided by 10**places.
+
+_HistoryLayout = collections.namedtuple( "_HistoryLayout", "struct names scales dtype" )
+_NUMPY_CODES = { "B": "u1", "H": "<u2", "I": "<u4" }
+
+def _history_layout( fields ):
+    dtype = None
+    if numpy is not None:
+        dtype = numpy.dtype( [ ( name, _NUMPY_CODES[ code ] ) for name, code, places in fields ] )
+    return _HistoryLayout( struct.Struct( "<" + "".join( code for name, code, places in fields ) ),
+                           tuple( name for name, code, places in fields ),
+                           tuple( None if places is None else 10 ** places for name, code, places in fields ),
+                           dtype )
+
+_TOTAL_FIELDS = [ ( "Reserved 0", "B", 0 ), ( "Error Database", "B", 0 ), ( "Error 0", "B", 0 ),
+                  ( "Error 1", "B", 0 ), ( "Error 2", "B", 0 ), ( "Error 3", "B", 0 ),
+                  ( "User Total Yield", "I", 2 ), ( "System Total Yield", "I", 2 ),
+                  ( "Panel Voltage Maximum", "H", 2 ), ( "Battery Voltage Maximum", "H", 2 ),
+                  ( "Number of Available Days", "B", 0 ) ]
+# version byte of the totals record -> layout
+_TOTAL_LAYOUTS = { 0: _history_layout( _TOTAL_FIELDS ),
+                   1: _history_layout( _TOTAL_FIELDS + [ ( "Battery Voltage Minimum", "H", 2 ) ] +
+                                       [ ( "Reserved " + str( i + 1 ), "B", 0 ) for i in range( 13 ) ] ) }
+
+_DAY_LAYOUT = _history_layout( [ 
+    ( "Reserved", "B", None ), ( "Yield", "I", 2 ), ( "Consumed", "I", 2 ),
+    ( "Battery Voltage Maximum", "H", 2 ), ( "Battery Voltage Minimum", "H", 2 ),
+    ( "Error Database", "B", None ), ( "Error 0", "B", None ), ( "Error 1", "B", None ),
+    ( "Error 2", "B", None ), ( "Error 3", "B", None ), ( "Time Bulk", "H", None ),
+    ( "Time Absorption", "H", None ), ( "Time Float", "H", None ), ( "Power Maximum", "I", None ),
+    ( "Battery Current Maximum", "H", 1 ), ( "Panel Voltage Maximum", "H", 2 ),
+    ( "Day Sequence Number", "H", None ) ] )
+
+_MPPT_DAY_LAYOUT = _history_layout( 
+    [ ( "Reserved 0", "B", None ), ( "Day Sequence Number", "H", None ) ] +
+    [ ( "Energy Tracker " + str( i ), "H", 2 ) for i in range( 1, 5 ) ] +
+    [ ( "Peak Power Tracker " + str( i ), "H", None ) for i in range( 1, 5 ) ] +
+    [ ( "Voc Max Tracker " + str( i ), "H", 2 ) for i in range( 1, 5 ) ] +
+    [ ( "Reserved 1", "B", None ) ] )
+
+def _decode_record( layout, data ):
+    """ One history record to a dict of name -> value, short records are zero 
+        padded like the old per field decode did.
+    """
+    values = layout.struct.unpack_from( data.ljust( layout.struct.size, b'\x00' ) )
+    return { name: value if scale is None else value / scale 
+             for name, value, scale in zip( layout.names, values, layout.scales ) }
+
+def decode_history( records, mppt=False ):
+    """ Decodes the raw data of several day records (0x1050+, or 0x10A0+ with
+        mppt=True) in one pass.  Returns a numpy structured array, one row per
+        record with the scaled columns as float64, or a list of dicts if numpy
+        isn't installed.
+    """
+    layout = _MPPT_DAY_LAYOUT if mppt else _DAY_LAYOUT
+    size = layout.struct.size
+    data = b"".join( record[:size].ljust( size, b'\x00' ) for record in records )
+    if numpy is None:
+        return [ { name: value if scale is None else value / scale 
+                   for name, value, scale in zip( layout.names, values, layout.scales ) }
+                 for values in layout.struct.iter_unpack( data ) ]
+
+    raw = numpy.frombuffer( data, dtype=layout.dtype )
+    table = numpy.empty( len( raw ), dtype=[ ( name, raw.dtype[ name ] if scale is None else "<f8" )
+                                              for name, scale in zip( layout.names, layout.scales ) ] )
+    for name, scale in zip( layout.names, layout.scales ):
+        table[ name ] = raw[ name ] if scale is None else raw[ name ] / scale
+    return table
+#*******************************************************************************
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<< Logging >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+# Diagnostics go to one logger per device, "vedirct.<port>" (e.g. 
+# "vedirct.dev.ttyUSB0" for /dev/ttyUSB0) below the "vedirct" logger.  
+# Messages take %-style arguments and frames are wrapped in _Hex, so nothing 
+# is formatted unless a handler emits the record.
+
+def device_logger( port ):
+    """ Logger of the device on port."""
+    name = re.sub( r"[^0-9A-Za-z_]+", ".", str( port ) ).strip( "." )
+    return logging.getLogger( "vedirct." + name if name else "vedirct" )
+
+class _Hex(object):
+    """ Log argument, renders data like vedirect._to_hex when formatted."""
+    __slots__ = ( "data", )
+
+    def __init__( self, data ): self.data = data
+
+    def __str__( self ):
+        if not self.data: return ""
+        return "0x" + bytes( self.data ).hex( " " ).upper().replace( " ", " 0x" ) + " "
+
+class FrameTraceHandler( logging.Handler ):
+    """ Appends the raw frames of DEBUG frame records to a binary file, each
+        as timestamp ( <d ), direction ( b'T' or b'R' ), length ( <H ) and 
+        the frame bytes.  Other records are ignored:
+
+            mppt.logger.addHandler( FrameTraceHandler( "frames.bin" ) )
+            mppt.logger.setLevel( logging.DEBUG )
+
+        read_trace( "frames.bin" ) yields the frames back.
+    """
+    HEADER = struct.Struct( "<dcH" )
+
+    def __init__( self, path ):
+        logging.Handler.__init__( self, logging.DEBUG )
+        self._file = open( path, "ab" )
+
+    def emit( self, record ):
+        frame = getattr( record, "frame", None )
+        if frame is None: return
+        self._file.write( self.HEADER.pack( record.created, record.direction.encode(), len( frame ) ) + frame )
+
+    def flush( self ):
+        self.acquire()
+        try: self._file.flush()
+        finally: self.release()
+
+    def close( self ):
+        self.acquire()
+        try: self._file.close()
+        finally: self.release()
+        logging.Handler.close( self )
+
+def read_trace( path ):
+    """ Yields ( timestamp, direction, frame ) from a FrameTraceHandler file."""
+    header = FrameTraceHandler.HEADER
+    with open( path, "rb" ) as trace_file:
+        while True:
+            head = trace_file.read( header.size )
+            if len( head ) < header.size: return
+            timestamp, direction, length = header.unpack( head )
+            yield timestamp, direction.decode(), trace_file.read( length )
+
+# console handler DEBUG = True adds to a device logger nobody configured.
+_DEBUG_HANDLER = logging.StreamHandler( sys.stdout )
+_DEBUG_HANDLER.setFormatter( logging.Formatter( "[VE_DIR]: %(message)s" ) )
+#*******************************************************************************
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<< Transports >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+# vedirect talks to a pyserial style object: write( data ), read( size ) that 
+# waits up to timeout seconds, read_until(), in_waiting, reset_input_buffer(),
+# close(), is_open and the timeout/baudrate attributes (AsyncVEDirect also 
+# needs fileno()).  open_transport() picks one by the scheme of the port:
+#   /dev/ttyUSB0, COM3, serial:///dev/ttyUSB0 - pyserial
+#   tcp://host:port                           - raw TCP socket (ser2net, ...)
+#   replay://capture.bin                      - bytes captured off a port
+#   replay://frames.bin?format=trace          - the received frames of a 
+#                                               FrameTraceHandler file
+# Other schemes go to pyserial's serial_for_url ( socket://, rfc2217://, 
+# loop:// ), add your own to TRANSPORTS as scheme -> factory( address, 
+# baudrate=, timeout= ).
+
+class Transport(object):
+    """ Base for transports that aren't pyserial.  Received bytes collect in 
+        a buffer, subclasses add to it in _fill( timeout ) and implement 
+        write() and close().
+    """
+    def __init__( self, baudrate=19200, timeout=1 ):
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.is_open = True
+        self._buf = bytearray()
+
+    def _fill( self, timeout ):
+        """ Adds whatever arrives within timeout seconds to the buffer."""
+        raise NotImplementedError
+
+    def _wait( self, done ):
+        """ Fills the buffer until done() or timeout seconds have passed."""
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while not done():
+            remaining = None if deadline is None else max( 0.0, deadline - time.monotonic() )
+            self._fill( remaining )
+            if remaining == 0: break
+
+    def _take( self, n ):
+        data = bytes( self._buf[:n] )
+        del self._buf[:n]
+        return data
+
+    @property
+    def in_waiting( self ):
+        self._fill( 0 )
+        return len( self._buf )
+
+    def read( self, size=1 ):
+        self._wait( lambda: len( self._buf ) >= size )
+        return self._take( size )
+
+    def read_until( self, expected=b'\n', size=None ):
+        def done():
+            if size is not None and len( self._buf ) >= size: return True
+            return self._buf.find( expected ) != -1
+        self._wait( done )
+        end = self._buf.find( expected )
+        n = len( self._buf ) if end == -1 else end + len( expected )
+        if size is not None: n = min( n, size )
+        return self._take( n )
+
+    def reset_input_buffer( self ):
+        self._fill( 0 )
+        del self._buf[:]
+
+    def __enter__( self ): return self
+
+    def __exit__( self, exc_type, exc_value, traceback ): self.close()
+
+class TcpTransport( Transport ):
+    """ Raw TCP connection to a serial bridge, address is "host:port"."""
+    CONNECT_TIMEOUT = 5
+    # how long write() waits for room in the socket buffer when the read 
+    # timeout is 0 (AsyncVEDirect) or None.
+    WRITE_TIMEOUT = 5
+
+    def __init__( self, address, baudrate=19200, timeout=1 ):
+        Transport.__init__( self, baudrate, timeout )
+        host, _, port = address.rpartition( ":" )
+        self._socket = socket.create_connection( ( host.strip( "[]" ), int( port ) ), self.CONNECT_TIMEOUT )
+        self._socket.setsockopt( socket.IPPROTO_TCP, socket.TCP_NODELAY, 1 )
+        self._socket.setblocking( False )
+
+    def _fill( self, timeout ):
+        ready, _, _ = select.select( [ self._socket ], [], [], timeout )
+        if not ready: return
+        data = self._socket.recv( 4096 )
+        if not data: 
+            self.is_open = False
+            raise ConnectionError( "connection closed by the bridge" )
+        self._buf += data
+
+    def write( self, data ):
+        # the socket is non-blocking, send what fits and wait for room for the
+        # rest instead of letting sendall raise BlockingIOError mid frame.
+        data = memoryview( bytes( data ) )
+        deadline = time.monotonic() + ( self.timeout or self.WRITE_TIMEOUT )
+        sent = 0
+        while sent < len( data ):
+            remaining = deadline - time.monotonic()
+            _, ready, _ = select.select( [], [ self._socket ], [], max( 0.0, remaining ) )
+            if not ready:
+                if remaining <= 0: raise serial.SerialTimeoutException( "Write timeout" )
+                continue
+            try: sent += self._socket.send( data[sent:] )
+            except BlockingIOError: pass
+        return sent
+
+    def fileno( self ): return self._socket.fileno()
+
+    def close( self ):
+        self.is_open = False
+        self._socket.close()
+
+class ReplayTransport( Transport ):
+    """ Plays back bytes captured off a port, e.g. with cat /dev/ttyUSB0, as 
+        fast as they are read.  Writes are dropped, so a session replays the
+        replies it recorded in order.  The port closes at the end of the 
+        capture, reopening starts it over.  Use it inside one session, a
+        port opened per request would start over every time.
+    """
+    CHUNK = 64
+
+    def __init__( self, address, baudrate=19200, timeout=1 ):
+        Transport.__init__( self, baudrate, timeout )
+        path, _, query = address.partition( "?" )
+        options = urllib.parse.parse_qs( query )
+        if options.get( "format" ) == [ "trace" ]:
+            self._data = b''.join( frame for timestamp, direction, frame in read_trace( path ) if direction == "R" )
+        else:
+            with open( path, "rb" ) as capture: self._data = capture.read()
+        self._pos = 0
+
+    def _fill( self, timeout ):
+        self._buf += self._data[self._pos:self._pos + self.CHUNK]
+        self._pos += self.CHUNK
+
+    def _wait( self, done ):
+        # nothing else is coming, no point in waiting out the timeout.
+        while not done() and self._pos < len( self._data ): self._fill( 0 )
+
+    def read( self, size=1 ):
+        if not self.is_open: raise EOFError( "end of the replay" )
+        data = Transport.read( self, size )
+        if not data and self._pos >= len( self._data ): self.is_open = False
+        return data
+
+    def write( self, data ): return len( data )
+
+    def close( self ): self.is_open = False
+
+def open_transport( port, baudrate=19200, timeout=1 ):
+    """ Opens the transport for port (a device path or URL), see TRANSPORTS."""
+    scheme, sep, address = str( port ).partition( "://" )
+    if not sep: return serial.Serial( port, baudrate=baudrate, timeout=timeout )
+    factory = TRANSPORTS.get( scheme )
+    if factory is None: return serial.serial_for_url( port, baudrate=baudrate, timeout=timeout )
+    return factory( address, baudrate=baudrate, timeout=timeout )
+
+TRANSPORTS = { "serial": serial.Serial, "tcp": TcpTransport, "replay": ReplayTransport }
+#*******************************************************************************
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<< Frame Reader >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class _HeartbeatPhase(object):
+    """ Tracks when the TEXT heartbeat blocks end, from the raw bytes read off
+        the port, so HEX requests can be sent in the quiet gap after a block 
+        instead of colliding with the next one.  A block end is only trusted
+        if the bytes were read soon enough after they arrived to time it, 
+        without one a request still waits out a block seen going out.
+    """
+    MARKER = b'\r\nChecksum\t'
+    PERIOD = 1.0        # seconds between blocks until measured
+    BLOCK = 0.2         # seconds a block keeps the line busy
+    GUARD = 0.02        # margin around a block and for timing uncertainty
+    HEX_HOLD = 1.0      # TEXT output is paused this long after a HEX reply
+    STALE = 10          # periods after which the phase is no longer trusted
+
+    def __init__( self ):
+        self.period = self.PERIOD
+        self._measured = False
+        self.last_end = None
+        self.last_hex = None
+        self.reset()
+
+    def reset( self ):
+        """ Forgets partial input, the timing survives a reopened port."""
+        self._tail = b''
+        self._pending = False
+        self._text = False
+        self.busy_until = 0.0
+
+    def known( self, now ):
+        """ True if blocks can be predicted, a HEX pause may have moved them."""
+        return ( self.last_end is not None and ( self.last_hex is None or self.last_end > self.last_hex ) 
+                 and now - self.last_end < self.STALE * self.period )
+
+    def text_paused( self, now ):
+        """ True while HEX traffic holds the TEXT output back."""
+        return ( self.last_hex is not None and ( self.last_end is None or self.last_hex > self.last_end ) 
+                 and now - self.last_hex < self.HEX_HOLD )
+
+    def feed( self, data, now, since, byte_time ):
+        """ Looks for the checksum line of a block in data, read at now by a
+            read that started at since.
+        """
+        if self._pending:
+            self._pending = False
+            trailing = ( len( data ) - 1 ) * byte_time
+            self._end( now - trailing, now - since - trailing )
+        buf = self._tail + data
+        marker = buf.rfind( self.MARKER )
+        if marker == -1: 
+            self._tail = buf[1 - len( self.MARKER ):]
+        else:
+            self._tail = b''
+            trailing = len( buf ) - marker - len( self.MARKER ) - 1
+            # the checksum byte itself is still on its way.
+            if trailing < 0: 
+                self._pending = True
+                self.busy_until = now + self.GUARD
+                return
+            self._end( now - trailing * byte_time, now - since - trailing * byte_time )
+            data = buf[len( buf ) - trailing:]
+        # data ends inside a TEXT line rather than a HEX frame, a block is 
+        # still going out.
+        colon = data.rfind( b':' )
+        newline = data.rfind( b'\n' )
+        if colon != -1 or newline != -1: self._text = colon < newline < len( data ) - 1
+        if self._text: self.busy_until = now + self.BLOCK
+
+    def _end( self, end, uncertainty ):
+        self.busy_until = 0.0
+        self._text = False
+        if uncertainty > self.GUARD: return
+        # a HEX pause in between may have moved the blocks, no interval then.
+        if self.known( end ):
+            interval = end - self.last_end
+            # blocks were missed in between, fold the interval back to one period.
+            if interval > 1.5 * self.period: interval /= round( interval / self.period )
+            if 0.5 * self.period < interval < 1.5 * self.period:
+                self.period += ( 0.2 if self._measured else 1.0 ) * ( interval - self.period )
+                self._measured = True
+        self.last_end = end
+
+    def delay( self, now, needed ):
+        """ Seconds to hold a request that keeps the line busy for needed 
+            seconds, 0 if it fits before the next block starts.
+        """
+        if self.busy_until > now: return self.busy_until - now
+        if not self.known( now ): return 0.0
+        until_end = self.period - ( now - self.last_end ) % self.period
+        if until_end - self.BLOCK - self.GUARD > needed: return 0.0
+        return until_end + self.GUARD
+
+class _FrameReader(object):
+    """ Collects VE.Direct HEX frames ( ':' ... '\n' ) from a serial stream.
+        Incoming bytes land in one preallocated bytearray, anything that is not
+        part of a HEX frame (TEXT heartbeat, line noise) is dropped.
+    """
+    HEX_CHARS = b'0123456789ABCDEFabcdef'
+
+    def __init__( self, size=1024 ):
+        self._buf = bytearray( size )
+        self._len = 0
+        self._read_at = 0.0
+        self.metrics = None
+        self.phase = _HeartbeatPhase()
+
+    def reset( self ):
+        self._len = 0
+        self.phase.reset()
+
+    def _discard( self, n ):
+        self._buf[:self._len - n] = self._buf[n:self._len]
+        self._len -= n
+
+    def feed( self, data ):
+        """ Appends raw bytes, if the buffer overflows only the newest bytes are kept."""
+        size = len( self._buf )
+        n = len( data )
+        if n >= size:
+            data = data[-size:]
+            n = size 
+            self._len = 0
+        elif self._len + n > size:
+            self._discard( self._len + n - size )
+        self._buf[self._len:self._len + n] = data
+        self._len += n
+
+    def frame( self ):
+        """ Pops the next complete HEX frame, None if there isn't one yet."""
+        while True:
+            start = self._buf.find( b':', 0, self._len )
+            if start == -1:
+                self._len = 0
+                return None
+            end = self._buf.find( b'\n', start, self._len )
+            if end == -1:
+                if start > 0: self._discard( start )
+                return None
+            # a stray ':' in the heartbeat must not swallow the real frame.
+            start = self._buf.rfind( b':', start, end )
+            rx_msg = bytes( self._buf[start:end + 1] )
+            self._discard( end + 1 )
+            if len( rx_msg ) > 3 and not rx_msg[1:-1].translate( None, self.HEX_CHARS ):
+                self.phase.last_hex = time.monotonic()
+                return rx_msg
+
+    def read_frame( self, serial_device, deadline ):
+        """ Reads serial_device until a whole frame is available or deadline
+            (time.monotonic) has passed, returns None on timeout.  Blocks in the
+            driver for the first byte of each chunk instead of sleeping.
+        """
+        rx_msg = self.frame()
+        timeout = serial_device.timeout
+        try:
+            while rx_msg is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0: break
+                if serial_device.timeout is None or serial_device.timeout > remaining:
+                    serial_device.timeout = remaining
+                if self.receive( serial_device ): rx_msg = self.frame()
+        finally:
+            if serial_device.timeout != timeout: serial_device.timeout = timeout
+        return rx_msg
+
+    def read_block_end( self, serial_device, deadline ):
+        """ Reads serial_device until a heartbeat block ends or deadline has 
+            passed, frames that arrive meanwhile stay buffered.
+        """
+        last_end = self.phase.last_end
+        timeout = serial_device.timeout
+        try:
+            while self.phase.last_end == last_end:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0: break
+                if serial_device.timeout is None or serial_device.timeout > remaining:
+                    serial_device.timeout = remaining
+                self.receive( serial_device )
+        finally:
+            if serial_device.timeout != timeout: serial_device.timeout = timeout
+
+    def receive( self, serial_device ):
+        """ One read of serial_device into the frame buffer, False if nothing came."""
+        since = self._read_at
+        data = serial_device.read( max( 1, serial_device.in_waiting ) )
+        self._read_at = time.monotonic()
+        if not data: return False
+        if self.metrics is not None: self.metrics.rx_bytes += len( data )
+        self.feed( data )
+        self.phase.feed( data, self._read_at, since, 10 / serial_device.baudrate )
+        return True
+#*******************************************************************************
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<< Heartbeat Parser >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class HeartbeatParser(object):
+    """ Incremental parser for the VE.Direct TEXT protocol, the block of 
+        "\r\nLABEL\tvalue" fields a device sends once a second that ends with 
+        "\r\nChecksum\t<byte>".  Feed it raw bytes as they arrive and it yields
+        one dict per block whose checksum (sum of all bytes modulo 256) is zero.
+        HEX frames mixed into the stream are removed first, blocks broken by 
+        line noise fail the checksum and are dropped, parsing picks up again 
+        at the next block.
+
+        Values of known labels are converted to the units the vedirect 
+        properties use (V, A, W, kWh, ...), the rest are kept as strings.
+    """
+    # label : ( type, divisor ), divisor converts to V, A, W, kWh, % or Ah.
+    FIELDS = { "V": ( int, 1000 ), "V2": ( int, 1000 ), "V3": ( int, 1000 ), 
+               "VS": ( int, 1000 ), "VM": ( int, 1000 ), "DM": ( int, 10 ), 
+               "VPV": ( int, 1000 ), "PPV": ( int, 1 ), "I": ( int, 1000 ), 
+               "I2": ( int, 1000 ), "I3": ( int, 1000 ), "IL": ( int, 1000 ), 
+               "T": ( int, 1 ), "P": ( int, 1 ), "CE": ( int, 1000 ), 
+               "SOC": ( int, 10 ), "TTG": ( int, 1 ), "AR": ( int, 1 ), 
+               "H1": ( int, 1000 ), "H2": ( int, 1000 ), "H3": ( int, 1000 ), 
+               "H4": ( int, 1 ), "H5": ( int, 1 ), "H6": ( int, 1000 ), 
+               "H7": ( int, 1000 ), "H8": ( int, 1000 ), "H9": ( int, 1 ), 
+               "H10": ( int, 1 ), "H11": ( int, 1 ), "H12": ( int, 1 ), 
+               "H13": ( int, 1 ), "H14": ( int, 1 ), "H15": ( int, 1000 ), 
+               "H16": ( int, 1000 ), "H17": ( int, 100 ), "H18": ( int, 100 ), 
+               "H19": ( int, 100 ), "H20": ( int, 100 ), "H21": ( int, 1 ), 
+               "H22": ( int, 100 ), "H23": ( int, 1 ), "ERR": ( int, 1 ), 
+               "CS": ( int, 1 ), "HSDS": ( int, 1 ), "MODE": ( int, 1 ), 
+               "AC_OUT_V": ( int, 100 ), "AC_OUT_I": ( int, 10 ), 
+               "AC_OUT_S": ( int, 1 ), "WARN": ( int, 1 ), "MPPT": ( int, 1 ), 
+               "MON": ( int, 1 ), "DC_IN_V": ( int, 100 ), "DC_IN_I": ( int, 10 ),
+               "DC_IN_P": ( int, 1 ) }
+    HEX_FRAME = re.compile( rb':[0-9A-Fa-f]+\n' )
+    CHECKSUM = b'\r\nChecksum\t'
+    MAX_BLOCK = 1024
+
+    def __init__( self, decode=True ):
+        self._decode = decode
+        self._buf = bytearray()
+
+    def reset( self ):
+        del self._buf[:]
+
+    def feed( self, data ):
+        """ Adds raw bytes, returns the list of blocks completed by them."""
+        self._buf += data
+        blocks = []
+        while True:
+            end = self._buf.find( self.CHECKSUM )
+            if end == -1 or end + len( self.CHECKSUM ) >= len( self._buf ): break
+            end += len( self.CHECKSUM ) + 1
+            block = self.parse_block( bytes( self._buf[:end] ) )
+            del self._buf[:end]
+            if block is not None: blocks.append( block )
+
+        # no block is this long, drop whatever noise piled up.
+        if len( self._buf ) > self.MAX_BLOCK:
+            del self._buf[:len( self._buf ) - self.MAX_BLOCK]
+        return blocks
+
+    def parse_block( self, block ):
+        """ Validates and decodes one block ending in the checksum byte, returns
+            None if the checksum doesn't add up.
+        """
+        checksum = block[-1:]
+        block = self.HEX_FRAME.sub( b'', block[:-1] )
+        # the block starts at the first field, anything earlier is noise.
+        start = block.find( b'\r\n' )
+        if start == -1: return None
+        block = block[start:] + checksum
+        if sum( block ) & 0xFF: return None
+
+        fields = {}
+        for line in block[2:-len( self.CHECKSUM ) - 1].split( b'\r\n' ):
+            label, sep, value = line.partition( b'\t' )
+            if not sep: return None
+            label = label.decode( 'ascii', 'replace' )
+            value = value.decode( 'ascii', 'replace' )
+            if self._decode: value = self.decode_value( label, value )
+            fields[label] = value
+        return fields 
+
+    def decode_value( self, label, value ):
+        field = self.FIELDS.get( label )
+        if field is None: return value
+        try: number = field[0]( value )
+        except ValueError: return value 
+        if field[1] == 1: return number
+        return number / field[1]
+#*******************************************************************************
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<< Metrics >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class VEDirectMetrics(object):
+    """ Counters of one vedirect instance, collected while its METRICS flag
+        is set (mppt.METRICS = True, then mppt.metrics):
+          calls / latency - per register ( "EDBC" ) or command ( "cmd_1" )
+                            transfer count and latency histogram, cache hits
+                            are counted apart and cost no latency sample.
+          retries         - resends by cause: timeout, length, short_write.
+          failures        - replies rejected: crc, mismatch, format, no_reply.
+          frames          - frames skipped while waiting: async, stale.
+          tx_bytes/rx_bytes on the wire.
+          heartbeat_waits - requests held back for a TEXT heartbeat block.
+        as_dict() returns a plain dict, prometheus() the text exposition format.
+    """
+    # histogram bucket upper bounds in seconds, the last bucket is +Inf.
+    BUCKETS = ( 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0 )
+
+    def __init__( self ):
+        self.reset()
+
+    def reset( self ):
+        self.calls = collections.Counter()
+        self.cache_hits = collections.Counter()
+        self.retries = collections.Counter()
+        self.failures = collections.Counter()
+        self.frames = collections.Counter()
+        self.tx_bytes = 0
+        self.rx_bytes = 0
+        self.heartbeat_waits = 0
+        # key -> [ bucket counts ( len( BUCKETS ) + 1 ), sum of seconds ]
+        self._latency = {}
+
+    def observe( self, key, seconds ):
+        """ One transfer of key that took seconds."""
+        self.calls[ key ] += 1
+        entry = self._latency.get( key )
+        if entry is None: entry = self._latency[ key ] = [ [ 0 ] * ( len( self.BUCKETS ) + 1 ), 0.0 ]
+        entry[0][ bisect.bisect_left( self.BUCKETS, seconds ) ] += 1
+        entry[1] += seconds
+#-------------------------------------------------------------------------------
+#---------------------------------- as_dict ------------------------------------
+    def as_dict( self ):
+        latency = {}
+        for key, ( counts, total ) in self._latency.items():
+            latency[ key ] = { "buckets": dict( zip( [ str( b ) for b in self.BUCKETS ] + [ "+Inf" ], counts ) ),
+                               "count": sum( counts ), "sum": total }
+        return { "calls": dict( self.calls ), "cache_hits": dict( self.cache_hits ), 
+                 "retries": dict( self.retries ), "failures": dict( self.failures ), 
+                 "frames": dict( self.frames ), "tx_bytes": self.tx_bytes, "rx_bytes": self.rx_bytes,
+                 "heartbeat_waits": self.heartbeat_waits, "latency": latency }
+#-------------------------------------------------------------------------------
+#--------------------------------- prometheus ----------------------------------
+    def prometheus( self, prefix="vedirect", labels=None ):
+        """ Prometheus text format, labels (e.g. { "port": "/dev/ttyUSB0" }) are
+            added to every sample.
+        """
+        base = "".join( ',%s="%s"' % ( k, v ) for k, v in sorted( ( labels or {} ).items() ) )
+        lines = []
+        def family( name, kind, text ):
+            lines.append( "# HELP %s_%s %s" % ( prefix, name, text ) )
+            lines.append( "# TYPE %s_%s %s" % ( prefix, name, kind ) )
+        def sample( name, value, label="" ):
+            label = ( label + base ).lstrip( "," )
+            lines.append( "%s_%s%s %s" % ( prefix, name, "{" + label + "}" if label else "", value ) )
+
+        for name, counter, label, text in ( ( "calls_total", self.calls, "register", "Transfers per register or command." ),
+                                            ( "cache_hits_total", self.cache_hits, "register", "Reads answered from the cache." ),
+                                            ( "retries_total", self.retries, "cause", "Resent requests by cause." ),
+                                            ( "failures_total", self.failures, "kind", "Rejected replies by kind." ),
+                                            ( "skipped_frames_total", self.frames, "kind", "Frames skipped while waiting for a reply." ) ):
+            family( name, "counter", text )
+            for key, value in sorted( counter.items() ): sample( name, value, ',%s="%s"' % ( label, key ) )
+        family( "tx_bytes_total", "counter", "Bytes written to the device." )
+        sample( "tx_bytes_total", self.tx_bytes )
+        family( "rx_bytes_total", "counter", "Bytes read from the device." )
+        sample( "rx_bytes_total", self.rx_bytes )
+        family( "heartbeat_waits_total", "counter", "Requests held back for a TEXT heartbeat block." )
+        sample( "heartbeat_waits_total", self.heartbeat_waits )
+
+        family( "latency_seconds", "histogram", "Transfer latency per register or command." )
+        for key, ( counts, total ) in sorted( self._latency.items() ):
+            label = ',register="%s"' % key
+            cumulative = 0
+            for bound, count in zip( [ str( b ) for b in self.BUCKETS ] + [ "+Inf" ], counts ):
+                cumulative += count
+                sample( "latency_seconds_bucket", cumulative, label + ',le="%s"' % bound )
+            sample( "latency_seconds_sum", total, label )
+            sample( "latency_seconds_count", cumulative, label )
+        return "\n".join( lines ) + "\n"
+#-------------------------------------------------------------------------------
+#*******************************************************************************
+
 #<<<<<<<<<<<<<<<<<<<<<<<<<<<<<< VEDirect Class >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+def _locked( method ):
+    """ Runs a transfer method under the instance lock, the keep-alive thread
+        shares the serial handle with the caller.
+    """
+    @functools.wraps( method )
+    def wrapper( self, *args, **kwargs ):
+        with self._lock: return method( self, *args, **kwargs )
+    return wrapper
+
 #******************************** initialize ***********************************
 class vedirect(object):
     """ Serial Python Interfacing Class for VE.Direct solar charge controller 
     """
+    # seconds the device takes to start answering a HEX frame.
+    REPLY_LATENCY = 0.03
+
     def __init__( self, port ):
         """ To Be Determined..."""
         self._port = port
@@ -55,15 +1124,57 @@ class vedirect(object):
         self._DEBUG = False
         self._DESCRIPTIVE = False
         self._PREFIX = "[VE_DIR]: "
+        self._logger = device_logger( port )
+        self._serial_device = None
+        self._reconnecting = False
+        self._rx = _FrameReader()
+        self._cache = {}
+        self._cache_ttl = dict( CACHE_TTL )
+        self._identity = {}
+        self._max_age = None
+        self._metrics = None
+        self._snapshot_groups = { name: list( names ) for name, names in SNAPSHOT_GROUPS.items() }
+        self._lock = threading.RLock()
+        self._keepalive = None
+        self._keepalive_stop = None
+        self._keepalive_thread = None
+        self._listening = 0         # heartbeat() generators running, pings wait
 
     def __del__( self ):
-        """ To Be Determined..."""
-        pass
+        """ Releases the session serial handle, if one is still open."""
+        try: self.close()
+        except: pass
+
+    def __enter__( self ):
+        """ Opens a session so every register access reuses one serial handle."""
+        self.open()
+        return self
+
+    def __exit__( self, exc_type, exc_value, traceback ):
+        self.close()
+        return False
 
     @property 
     def port( self ): return( self._port )
     @port.setter
-    def port( self, value ): self._port = value 
+    def port( self, value ): 
+        if value != self._port: 
+            self.clear_cache()
+            # level and handlers (DEBUG output, frame traces) follow the device.
+            logger = device_logger( value )
+            logger.setLevel( self._logger.level )
+            self._logger.setLevel( logging.NOTSET )
+            for handler in list( self._logger.handlers ):
+                self._logger.removeHandler( handler )
+                logger.addHandler( handler )
+            self._logger = logger
+        # a session handle belongs to the old port, reopen on the new one.
+        if self.session_open and value != self._port:
+            self.close()
+            self._port = value
+            self.open()
+        else:
+            self._port = value 
 
     @property
     def address( self ): return( self._address )
@@ -83,12 +1194,19 @@ class vedirect(object):
     @property
     def DEBUG( self ): return( self._DEBUG )
     @DEBUG.setter
-    def DEBUG( self, value ): self._DEBUG = value 
+    def DEBUG( self, value ): 
+        """ Logs every frame at DEBUG level, to stdout unless a handler for the
+            device logger has been configured.
+        """
+        self._DEBUG = value 
+        self._logger.setLevel( logging.DEBUG if value else logging.NOTSET )
+        if value and not self._logger.hasHandlers(): self._logger.addHandler( _DEBUG_HANDLER )
+        if not value: self._logger.removeHandler( _DEBUG_HANDLER )
 
     @property
     def DESCRIPTIVE( self ): return( self._DESCRIPTIVE )
     @DESCRIPTIVE.setter
-    def DEBUG( self, value ): self._DESCRIPTIVE = value     
+    def DESCRIPTIVE( self, value ): self._DESCRIPTIVE = value     
     
     @property
     def ERROR_VAL( self ): return( self._ERROR_VAL )
@@ -97,6 +1215,45 @@ class vedirect(object):
     
     @property
     def PREFIX( self ): return( self._PREFIX )
+
+    @property
+    def session_open( self ): return( self._serial_device is not None )
+
+    @property
+    def keepalive( self ): return( self._keepalive )
+    @keepalive.setter
+    def keepalive( self, value ): 
+        """ Seconds without HEX traffic after which a session pings the device,
+            holding it in HEX mode so TEXT blocks can't get in the way of the
+            next request.  None (default) lets TEXT resume between requests.
+            Something well inside the few seconds a device holds TEXT back
+            after a HEX frame, e.g. 0.5.
+        """
+        self._keepalive = value
+        if self.session_open: self._start_keepalive()
+
+    @property
+    def cache_ttl( self ): return( self._cache_ttl )
+    @cache_ttl.setter
+    def cache_ttl( self, value ): self._cache_ttl.update( value )
+
+    @property
+    def METRICS( self ): return( self._metrics is not None )
+    @METRICS.setter
+    def METRICS( self, value ): 
+        if value and self._metrics is None: self._metrics = VEDirectMetrics()
+        if not value: self._metrics = None
+        self._rx.metrics = self._metrics
+
+    @property
+    def logger( self ): 
+        """ logging.Logger of this device, "vedirct.<port>"."""
+        return( self._logger )
+
+    @property
+    def metrics( self ): 
+        """ VEDirectMetrics collected since METRICS was set, None when off."""
+        return( self._metrics )
 #*******************************************************************************
 
 #============================== Utility Functions ==============================
@@ -113,30 +1270,8 @@ class vedirect(object):
 #-------------------------------------------------------------------------------
 #--------------------------------- crc_calc ------------------------------------
     def _crc_calc( self, data ):
-        sum = 0 
-
-        for x in data:
-            sum += self._twos_comp( x, 8 )
-        crc_dec = 85 - sum
-
-        if crc_dec >= -255 and crc_dec < 0: crc_dec = crc_dec + 256
-        elif crc_dec >= -65535 and crc_dec < 0: crc_dec = crc_dec + 65536
-        elif crc_dec >= -1677215 and crc_dec < 0: crc_dec = crc_dec + 1677216
-        elif crc_dec >= -4294967295 and crc_dec <0: crc_dec = crc_dec + 4294967296
-
-        if crc_dec >= 0 and crc_dec <= 255:
-            crc = crc_dec.to_bytes( 1, byteorder='big', signed=False )
-        elif crc_dec >= 256 and crc_dec <= 65535:
-            crc = crc_dec.to_bytes( 2, byteorder='big', signed=False )
-        elif crc_dec >= 65536 and crc_dec <= 16777215:
-            crc = crc_dec.to_bytes( 3, byteorder='big', signed=False )
-        else:
-            try:
-                crc = crc_dec.to_bytes( 4, byteorder='big', signed=False )
-            except:
-                crc = self.ERROR_VAL
-
-        return crc
+        """ One byte HEX check value of data, see hex_checksum."""
+        return bytes( [ hex_checksum( data ) ] )
 #-------------------------------------------------------------------------------
 #------------------------------ two_bits_array ---------------------------------
     def _two_bits_array( self, value, bits ):
@@ -177,277 +1312,855 @@ class vedirect(object):
     def _to_hex( self, data ):
         """ Converts byte message into a string of hex values.
         """
-        hex_string = ""
-        for x in data:
-            raw_hex = hex( x ).upper()
-            if len( raw_hex ) == 3: hex_string += "0x0" + raw_hex[2:] + " "
-            elif len( raw_hex ) == 4:hex_string += "0x" + hex( x )[2:].upper() + " "
-            else: return self.ERROR_VAL 
-        return hex_string
+        if not data: return ""
+        return "0x" + data.hex( " " ).upper().replace( " ", " 0x" ) + " "
 #-------------------------------------------------------------------------------
 #--------------------------------- from_ascii ----------------------------------
     def _from_ascii( self, data ):
-        char = chr( int.from_bytes( data ) )
-        if   char == "1": return_value = 1
-        elif char == "2": return_value = 2
-        elif char == "3": return_value = 3
-        elif char == "4": return_value = 4
-        elif char == "5": return_value = 5
-        elif char == "6": return_value = 6
-        elif char == "7": return_value = 7
-        elif char == "8": return_value = 8
-        elif char == "9": return_value = 9
-        elif char == "A": return_value = 10
-        elif char == "B": return_value = 11
-        elif char == "C": return_value = 12
-        elif char == "D": return_value = 13
-        elif char == "E": return_value = 14
-        elif char == "F": return_value = 15
-        else: return_value = 0
-        return return_value 
+        if not data: return 0
+        return int( _HEX_DIGITS[ data[0] : data[0] + 1 ], 16 )
 #-------------------------------------------------------------------------------
 #------------------------------- flip_endianness -------------------------------
     def _flip( self, data ):
-        try: 
-            return_value = bytes()
-            decimal = int.from_bytes( data, byteorder='big', signed=True )
-            return_value = decimal.to_bytes( len( data ), byteorder='little', signed=True )
+        try: return bytes( data[::-1] )
         except:
-            print( self._PREFIX + "Issue flipping the bytes endianness " + str( data ) + "." )
+            self._logger.warning( "Issue flipping the bytes endianness %s.", data )
             return self.ERROR_VAL
-        return return_value 
 #-------------------------------------------------------------------------------
 #-------------------------------- bytes_to_asc ---------------------------------
     def _bytes_to_ascii_bytes( self, data ):
-        return_value = ""
-        for x in data:
-            decimal = int( x )
-            if decimal < 16:
-                return_value = return_value + "0" + hex(decimal)[2:].upper()
-            else:
-                return_value = return_value + hex(decimal)[2:].upper()       
-        return str.encode( return_value, 'utf-8' ) 
+        return data.hex().upper().encode( 'utf-8' )
 #-------------------------------------------------------------------------------
 #-------------------------------- asc_to_bytes ---------------------------------
     def _ascii_bytes_to_bytes( self, data ):
-        return_value = bytes()
-        if len( data ) == 1: 
-            decimal = self._from_ascii( data )
-            return_value = return_value + decimal.to_bytes( 1, byteorder='big', signed=True )
-        else: 
-            for i in range( 0, len( data ), 2 ):
-                hi_byte = self._from_ascii( data[i:i+1] )
-                lo_byte = self._from_ascii( data[i+1:i+2] )
-                new_num = ( ( hi_byte << 4 ) | lo_byte ) 
-                return_value = return_value + new_num.to_bytes( 1, byteorder='big', signed=False )
-        return return_value 
+        if len( data ) == 1: return bytes( [ self._from_ascii( data ) ] )
+        data = bytes( data ).translate( _HEX_DIGITS )
+        if len( data ) % 2: data = data + b'0'
+        return bytes.fromhex( data.decode( 'utf-8' ) )
 #-------------------------------------------------------------------------------
 #------------------------------- hex_adj_for_crc -------------------------------
     def _hex_adj_for_crc( self, data ):
-        return_value = bytes()
-        for x in data:
-            dec = self._twos_comp( x, 8 ) - 48
-            return_value = return_value + dec.to_bytes( 1, byteorder='big',signed=True)
-        return return_value 
+        return bytes( data ).translate( _CRC_ADJ )
+#-------------------------------------------------------------------------------
+#================================ Value Cache ==================================
+#-------------------------------- register_class -------------------------------
+    def _register_class( self, reg_addr ):
+        if reg_addr in STATIC_REGISTERS: return "static"
+        if reg_addr in SETTING_REGISTERS: return "setting"
+        return "telemetry"
+#-------------------------------------------------------------------------------
+#---------------------------------- cache_get ----------------------------------
+    def _cache_get( self, reg_addr, format ):
+        """ Returns ( True, value ) if a young enough value is cached, the age
+            limit is max_age when a get() asked for one, else the TTL of the
+            register class.
+        """
+        entry = self._cache.get( ( reg_addr, format ) )
+        if entry is None: return False, None
+        max_age = self._max_age
+        if max_age is None: max_age = self._cache_ttl.get( self._register_class( reg_addr ), 0 )
+        if time.monotonic() - entry[0] <= max_age: return True, entry[1]
+        return False, None
+#-------------------------------------------------------------------------------
+#---------------------------------- cache_put ----------------------------------
+    def _cache_put( self, reg_addr, format, value ):
+        if value is None or value == self.ERROR_VAL: return
+        self._cache[ ( reg_addr, format ) ] = ( time.monotonic(), value )
+#-------------------------------------------------------------------------------
+#------------------------------- cache_invalidate ------------------------------
+    def _cache_invalidate( self, reg_addr ):
+        """ Drops the cached values of reg_addr before a write to it.  Writing
+            a setting drops every cached setting, the device may have adjusted
+            others to it (battery_type, battery_system_voltage, ...).
+        """
+        if reg_addr in SETTING_REGISTERS: stale = SETTING_REGISTERS
+        else: stale = ( reg_addr, )
+        for key in list( self._cache ):
+            if key[0] in stale: self._cache.pop( key, None )
+#-------------------------------------------------------------------------------
+#--------------------------------- clear_cache ---------------------------------
+    def clear_cache( self ):
+        """ Forgets every cached register value and the device identity."""
+        self._cache = {}
+        self._identity = {}
+#-------------------------------------------------------------------------------
+#------------------------------------- get -------------------------------------
+    def get( self, name, max_age=None ):
+        """ Reads property name, accepting cached register values up to max_age
+            seconds old.  max_age=0 always goes to the device, e.g.
+                mppt.get( "panel_power", max_age=5 )
+        """
+        previous = self._max_age
+        self._max_age = max_age
+        try: return getattr( self, name )
+        finally: self._max_age = previous
+#-------------------------------------------------------------------------------
+#===============================================================================
+
+#=============================== Device Identity ===============================
+#--------------------------------- model_name ----------------------------------
+    def _model_name( self ):
+        """ model_name, read from the device once and reused until the session 
+            or port changes.  "" if the device can't be reached.
+        """
+        if "model" not in self._identity:
+            response = self.model_name
+            if response == self.ERROR_VAL: return ""
+            self._identity["model"] = response
+        return self._identity["model"]
+#-------------------------------------------------------------------------------
+#-------------------------------- capabilities ---------------------------------
+    def _capabilities( self ):
+        """ capabilities, resolved once like _model_name, {} if unreachable."""
+        if "capabilities" not in self._identity:
+            response = self.capabilities
+            if response == self.ERROR_VAL: return {}
+            self._identity["capabilities"] = response
+        return self._identity["capabilities"]
+#-------------------------------------------------------------------------------
+#-------------------------------- num_trackers ---------------------------------
+    def _num_trackers( self ):
+        """ num_mppt_tracker, resolved once like _model_name, 0 if unknown."""
+        if "trackers" not in self._identity:
+            response = self.num_mppt_tracker
+            if response == self.ERROR_VAL: return 0
+            self._identity["trackers"] = response
+        return self._identity["trackers"]
+#-------------------------------------------------------------------------------
+#-------------------------------- serial_number --------------------------------
+    def _serial_number( self ):
+        """ serial_number, resolved once like _model_name, "" if unreachable."""
+        if "serial" not in self._identity:
+            response = self.serial_number
+            if response == self.ERROR_VAL: return ""
+            self._identity["serial"] = response.strip( "\x00 " )
+        return self._identity["serial"]
+#-------------------------------------------------------------------------------
+#---------------------------------- identity -----------------------------------
+    @property
+    def identity( self ):
+        """ Model, product id, capability flags and tracker count of the device,
+            read once per session.
+        """
+        if "pid" not in self._identity:
+            response = self.pid
+            if response != self.ERROR_VAL: self._identity["pid"] = response
+        return { "model": self._model_name(), "pid": self._identity.get( "pid", self.ERROR_VAL ),
+                 "capabilities": self._capabilities(), "trackers": self._num_trackers() }
+#-------------------------------------------------------------------------------
+#===============================================================================
+
+#=============================== Register Table ================================
+#--------------------------------- supported -----------------------------------
+    def _supported( self, reg, quiet=False ):
+        """ Checks the model and capability requirements of a REGISTERS entry."""
+        supported = True
+        if reg.model is not None:
+            if reg.model.startswith( "!" ): supported = self._model_name().find( reg.model[1:] ) == -1
+            else: supported = self._model_name().find( reg.model ) != -1
+        if supported and reg.capability is not None:
+            supported = self._capabilities().get( reg.capability ) == "1"
+        if not supported and self.DESCRIPTIVE and not quiet:
+            self._logger.warning( "Model does not support this command." )
+        return supported
+#-------------------------------------------------------------------------------
+#---------------------------------- settable -----------------------------------
+    def _settable( self, name ):
+        """ _supported for backup, restore and apply_profile, also checks the
+            SETTING_CAPABILITIES of the entry.
+        """
+        if not self._supported( REGISTERS[ name ], quiet=True ): return False
+        if name not in SETTING_CAPABILITIES: return True
+        capabilities = self._capabilities()
+        return any( capabilities.get( flag ) == "1" for flag in SETTING_CAPABILITIES[ name ] )
+#-------------------------------------------------------------------------------
+#----------------------------------- decode ------------------------------------
+    def _decode( self, reg, response ):
+        """ Turns the raw little endian data of a GET reply ('b' format) into
+            the value a property returns.
+        """
+        if response == self.ERROR_VAL: return response
+        raw = int.from_bytes( response, byteorder='little', signed=reg.signed )
+        unknown = self.ERROR_VAL
+        if self.DESCRIPTIVE and reg.unknown is not None: unknown = reg.unknown
+        if reg.na is not None and raw == reg.na: return unknown
+        if reg.enum is not None and self.DESCRIPTIVE: return reg.enum.get( raw, unknown )
+        if reg.scale != 1: return raw / reg.scale
+        return raw
+#-------------------------------------------------------------------------------
+#----------------------------------- encode ------------------------------------
+    def _encode( self, reg, value ):
+        """ Setter input (number, or enum label) to register bytes, None if the
+            value is out of range for the register.
+        """
+        if reg.enum is not None and isinstance( value, str ):
+            for raw, label in reg.enum.items():
+                if str( label ).upper() == value.upper():
+                    value = raw
+                    break
+        try: value = float( value )
+        except: return None
+        if reg.na is not None and not reg.signed and value == -1:
+            return reg.na.to_bytes( reg.length, byteorder='little' )
+        if reg.enum is not None and reg.min is None and value not in reg.enum: return None
+        if reg.min is not None and value < reg.min: return None
+        if reg.max is not None and value > reg.max: return None
+        try: return int( round( value * reg.scale ) ).to_bytes( reg.length, byteorder='little', signed=reg.signed )
+        except OverflowError: return None
+#-------------------------------------------------------------------------------
+#-------------------------------- encode_value ---------------------------------
+    def _encode_value( self, name, reg, value ):
+        """ _encode for apply_profile, properties spread over several registers
+            (lighting_timer_events) give name -> bytes per register.
+        """
+        if name != "lighting_timer_events": return self._encode( reg, value )
+        try: events = [ self._encode_timer_event( event ) for event in value ]
+        except TypeError: return None
+        if len( events ) != len( _TIMER_EVENTS ) or None in events: return None
+        return dict( zip( _TIMER_EVENTS, events ) )
+#-------------------------------------------------------------------------------
+#--------------------------------- timer_event ---------------------------------
+    def _timer_event( self, response ):
+        """ One lighting timer event register ('b' format) as the property
+            returns it, None if it couldn't be read.
+        """
+        if response == self.ERROR_VAL: return None
+        dict_names = [ "Time offset", "Anchor Point", "Dim Action" ]
+        dict_units = [ "[min]", "[n/a]", "[%]"]
+        dict_vals = []
+        time_offset = response[:-2]
+        anchor_point = int.from_bytes( response[-3:-2], byteorder='big', signed=False )
+        dim_action = response[-4:-3]
+
+        dict_vals.append( int.from_bytes( time_offset, byteorder='big', signed=True ) )
+        if self.DESCRIPTIVE:
+            if anchor_point == 0: dict_vals.append( "N/A" )
+            elif anchor_point == 1: dict_vals.append( "SUNSET" )
+            elif anchor_point == 2: dict_vals.append( "MID-NIGHT" )
+            elif anchor_point == 3: dict_vals.append( "SUNRISE" )
+            else: dict_vals.append( self.ERROR_VAL )
+        else: 
+            dict_vals.append( anchor_point )
+        dict_vals.append( int.from_bytes( dim_action, byteorder='big', signed=False ) )
+
+        if self.DESCRIPTIVE:
+            return { dict_names[j]: [ dict_vals[j], dict_units[j] ] for j in range( len( dict_names ) ) }
+        return dict_vals
+#-------------------------------------------------------------------------------
+#----------------------------- encode_timer_event ------------------------------
+    def _encode_timer_event( self, event ):
+        """ [ time offset, anchor point, dim action ] to the register bytes of
+            one lighting timer event, None if out of range.
+        """
+        try: time_offset, anchor_point, dim_action = [ int( value ) for value in event ]
+        except ( TypeError, ValueError ): return None
+        if time_offset < -1440 or time_offset > 1440: return None
+        if anchor_point < 1 or anchor_point > 3: return None
+        if dim_action < 0 or dim_action > 100: return None
+        timer_event = dim_action.to_bytes( 1, signed=False ) + anchor_point.to_bytes( 1, signed=False ) + \
+                      time_offset.to_bytes( 2, byteorder='big', signed=True )
+        return self._flip( timer_event )
+#-------------------------------------------------------------------------------
+#-------------------------------- read_register --------------------------------
+    def read_register( self, name ):
+        """ Reads the REGISTERS entry name, e.g. read_register( "panel_power" )."""
+        reg = REGISTERS[ name ]
+        if not self._supported( reg ): return self.ERROR_VAL
+        return self._decode( reg, self._read( reg.length, reg.addr, 'b' ) )
+#-------------------------------------------------------------------------------
+#------------------------------- write_register --------------------------------
+    def write_register( self, name, value ):
+        """ Writes value to the REGISTERS entry name after checking it against
+            the range or labels of the register.
+        """
+        reg = REGISTERS[ name ]
+        if not reg.writable:
+            self._logger.warning( "%s is read only.", name )
+            return self.ERROR_VAL
+        if not self._supported( reg ): return self.ERROR_VAL
+        data = self._encode( reg, value )
+        if data is None:
+            self._logger.warning( "Invalid input value %s", value )
+            return self.ERROR_VAL
+        return self._write( data, reg.length, reg.addr, 'int' )
+#-------------------------------------------------------------------------------
+#------------------------------- read_registers --------------------------------
+    def read_registers( self, names, window=8 ):
+        """ Reads several REGISTERS entries pipelined through read_many, returns
+            a dict of name -> value.
+        """
+        supported = {}
+        for name in names: supported[ name ] = self._supported( REGISTERS[ name ] )
+        responses = self.read_many( [ ( REGISTERS[ name ].length, REGISTERS[ name ].addr, 'b' )
+                                      for name in names if supported[ name ] ], window )
+
+        return_values = {}
+        for name in names:
+            if supported[ name ]: return_values[ name ] = self._decode( REGISTERS[ name ], responses[ REGISTERS[ name ].addr ] )
+            else: return_values[ name ] = self.ERROR_VAL
+        return return_values
+#-------------------------------------------------------------------------------
+#---------------------------------- read_raw -----------------------------------
+    def _read_raw( self, names, window=8 ):
+        """ Raw register bytes of REGISTERS entries straight from the device 
+            (cache bypassed), name -> bytes or ERROR_VAL.
+        """
+        previous = self._max_age
+        self._max_age = 0
+        try: responses = self.read_many( [ ( REGISTERS[ name ].length, REGISTERS[ name ].addr, 'b' ) for name in names ], window )
+        finally: self._max_age = previous
+        return { name: responses[ REGISTERS[ name ].addr ] for name in names }
+#-------------------------------------------------------------------------------
+#---------------------------------- session ------------------------------------
+    @contextlib.contextmanager
+    def _session( self ):
+        """ Holds a session open for a batch of transfers, one that was already
+            open stays open.
+        """
+        opened = not self.session_open
+        if opened:
+            try: self.open()
+            except: opened = False      # every transfer reports the port itself
+        try: yield
+        finally:
+            if opened: self.close()
+#-------------------------------------------------------------------------------
+#-------------------------------- apply_profile --------------------------------
+    def apply_profile( self, profile, window=8 ):
+        """ Brings the device to the settings in profile, REGISTERS name -> value
+            as a setter takes it, e.g.
+                mppt.apply_profile( { "battery_float_voltage": 13.8, "load_output_control": "AUTO" } )
+            lighting_timer_events takes the list of six events its setter does.
+            The current values are read in one batch and only registers that 
+            differ are written, in profile order, within one session.  The 
+            written ones are read back in one batch.  Returns name -> 
+            { "status", "old", "new" }, status being one of
+              unchanged   - already at the value, nothing written
+              written     - written and confirmed by the read-back
+              failed      - the write was rejected or the read-back differs
+              unknown, read_only, unsupported, invalid - not written, the name
+                            isn't in REGISTERS, isn't writable, isn't on this
+                            model or the value is out of range.
+        """
+        with self._session():
+            parts, targets, status = self._targets( profile, self._encode_value )
+            return self._apply( profile, parts, targets, status, window )
+#-------------------------------------------------------------------------------
+#---------------------------------- targets ------------------------------------
+    def _targets( self, profile, encode ):
+        """ Checks profile entries, returns name -> the registers behind the 
+            ones that can be written, register name -> bytes to write and 
+            name -> status of the rest.  encode( name, reg, value ) gives the 
+            bytes, a dict of register name -> bytes or None if invalid.
+        """
+        parts = {}
+        targets = {}
+        status = {}
+        for name, value in profile.items():
+            reg = REGISTERS.get( name )
+            if reg is None: status[ name ] = "unknown"
+            elif not reg.writable: status[ name ] = "read_only"
+            elif not self._settable( name ): status[ name ] = "unsupported"
+            else:
+                data = encode( name, reg, value )
+                if data is None: status[ name ] = "invalid"
+                else:
+                    if not isinstance( data, dict ): data = { name: data }
+                    parts[ name ] = list( data )
+                    targets.update( data )
+        return parts, targets, status
+#-------------------------------------------------------------------------------
+#----------------------------------- apply -------------------------------------
+    def _apply( self, names, parts, targets, status, window ):
+        """ Diff, write and read-back of apply_profile, report ordered as names."""
+        old = self._read_raw( targets, window )
+        changed = [ reg_name for reg_name in targets if old[ reg_name ] != targets[ reg_name ] ]
+        failed = set()
+        for reg_name in changed:
+            reg = REGISTERS[ reg_name ]
+            if self._write( targets[ reg_name ], reg.length, reg.addr, 'int' ) == self.ERROR_VAL: failed.add( reg_name )
+        new = dict( old )
+        new.update( self._read_raw( changed, window ) )
+        failed.update( reg_name for reg_name in changed if new[ reg_name ] != targets[ reg_name ] )
+
+        report = {}
+        for name in names:
+            entry = { "status": status.get( name ), "old": None, "new": None }
+            if name in parts:
+                if failed.intersection( parts[ name ] ): entry[ "status" ] = "failed"
+                elif set( changed ).intersection( parts[ name ] ): entry[ "status" ] = "written"
+                else: entry[ "status" ] = "unchanged"
+                entry[ "old" ] = self._decode_value( name, old )
+                entry[ "new" ] = self._decode_value( name, new )
+            report[ name ] = entry
+        return report
+#-------------------------------------------------------------------------------
+#-------------------------------- decode_value ---------------------------------
+    def _decode_value( self, name, raw ):
+        """ Value of the apply_profile entry name from register name -> bytes."""
+        if name != "lighting_timer_events": return self._decode( REGISTERS[ name ], raw[ name ] )
+        return [ self._timer_event( raw[ reg_name ] ) for reg_name in _TIMER_EVENTS ]
+#-------------------------------------------------------------------------------
+#------------------------------- backup_settings -------------------------------
+    def backup_settings( self, path=None, window=8 ):
+        """ Saves every writable setting the device supports to a JSON file, 
+            the raw register bytes plus the decoded value for reading, under
+            the product id, firmware and serial number of the device.  path
+            defaults to settings_<pid>_<firmware>_<serial>.json, returns the
+            path or ERROR_VAL if the device can't be reached.
+        """
+        with self._session():
+            pid = self.pid
+            if pid == self.ERROR_VAL:
+                self._logger.error( "Unable to reach device!" )
+                return self.ERROR_VAL
+            firmware = self.application_version()
+            device = { "pid": pid.strip(), "firmware": firmware, "serial": self._serial_number(), 
+                       "model": self._model_name() }
+            names = [ name for name in SETTINGS if self._settable( name ) ]
+            raw = self._read_raw( names, window )
+
+        settings = {}
+        for name in names:
+            if raw[ name ] == self.ERROR_VAL: continue 
+            settings[ name ] = { "raw": raw[ name ].hex(), "value": self._decode( REGISTERS[ name ], raw[ name ] ) }
+        backup = { "format": SETTINGS_FORMAT, "version": SETTINGS_VERSION, 
+                   "created": time.strftime( "%Y-%m-%dT%H:%M:%S%z" ), "device": device, "settings": settings }
+
+        if path is None:
+            path = "settings_%s_%s_%s.json" % tuple( re.sub( r"0x|[^0-9A-Za-z.]+", "", str( device[ key ] ) ) 
+                                                     for key in ( "pid", "firmware", "serial" ) )
+        with open( path + ".tmp", "w" ) as backup_file: json.dump( backup, backup_file, indent=2 )
+        os.replace( path + ".tmp", path )
+        return path
+#-------------------------------------------------------------------------------
+#------------------------------- restore_settings ------------------------------
+    def restore_settings( self, path, window=8, force=False ):
+        """ Writes the settings of a backup_settings() file to this device, only
+            the ones that differ, and verifies them like apply_profile() (same
+            report).  Every value is checked against the range and labels of
+            its register like a setter value, ones that fail are reported 
+            invalid.  Settings this model or its capabilities don't have are 
+            reported unsupported.  A backup of another product id or model is
+            refused with ERROR_VAL unless force is set, so are files of a newer
+            format version.
+        """
+        with open( path ) as backup_file: backup = json.load( backup_file )
+        if backup.get( "format" ) != SETTINGS_FORMAT or backup.get( "version", 0 ) > SETTINGS_VERSION:
+            self._logger.error( "%s is not a settings backup this version can read.", path )
+            return self.ERROR_VAL
+
+        # settings that change the meaning of others go first.
+        settings = backup[ "settings" ]
+        order = [ name for name in RESTORE_FIRST if name in settings ] + [ name for name in settings if name not in RESTORE_FIRST ]
+        profile = { name: settings[ name ][ "raw" ] for name in order }
+
+        def decode_raw( name, reg, value ):
+            try: data = bytes.fromhex( value )
+            except ( TypeError, ValueError ): return None
+            if len( data ) != reg.length: return None
+            if reg.na is not None and int.from_bytes( data, byteorder='little', signed=reg.signed ) == reg.na: return data
+            # the value goes through the same checks as a setter's
+            return self._encode( reg, self._decode( reg, data ) )
+
+        with self._session():
+            pid = self.pid
+            if pid == self.ERROR_VAL:
+                self._logger.error( "Unable to reach device!" )
+                return self.ERROR_VAL
+            device = backup[ "device" ]
+            if pid.strip() != device[ "pid" ] or self._model_name() != device.get( "model" ):
+                if not force:
+                    self._logger.error( "Backup is from %s (product id %s), this device is %s (%s), pass force=True to restore it anyway.",
+                                        device.get( "model" ), device[ "pid" ], self._model_name(), pid.strip() )
+                    return self.ERROR_VAL
+                self._logger.warning( "Restoring a backup of %s (product id %s) to %s (%s).", device.get( "model" ), device[ "pid" ], 
+                                      self._model_name(), pid.strip() )
+            parts, targets, status = self._targets( profile, decode_raw )
+            return self._apply( profile, parts, targets, status, window )
+#-------------------------------------------------------------------------------
+#===============================================================================
+
+#================================= Snapshots ===================================
+#------------------------------ snapshot_groups --------------------------------
+    @property
+    def snapshot_groups( self ):
+        """ Group name -> property names used by snapshot(), add your own with
+            mppt.snapshot_groups["mine"] = [ "panel_power", "battery_temp" ]
+        """
+        return self._snapshot_groups 
+#-------------------------------------------------------------------------------
+#---------------------------------- snapshot -----------------------------------
+    def snapshot( self, group="telemetry", window=8 ):
+        """ Reads a group of properties in one pass.  group is a snapshot_groups
+            name or a list of property names.  Every register behind the group 
+            is fetched pipelined through read_many, then the properties decode
+            from the values of that pass.  Returns a namedtuple record:
+                snap = mppt.snapshot( "telemetry" )
+                print( snap.timestamp, snap.panel_power )
+        """
+        if isinstance( group, str ): names = self._snapshot_groups[ group ]
+        else: names = group
+        names = tuple( dict.fromkeys( names ) )
+
+        timestamp = time.time()
+        start = time.monotonic()
+        requests = []
+        for name in names:
+            reg = REGISTERS.get( name )
+            if reg is None: continue
+            if name in _generated_properties:
+                if self._supported( reg, quiet=True ): requests.append( ( reg.length, reg.addr, 'b' ) )
+            elif name in _PROPERTY_READS: requests.extend( _PROPERTY_READS[ name ] )
+            elif reg.model is None and reg.capability is None:
+                # hand written properties read their register as 'int'.
+                requests.append( ( reg.length, reg.addr, 'int' ) )
+        self.read_many( requests, window )
+
+        # only accept cached values fetched by this pass.
+        previous = self._max_age
+        values = []
+        try:
+            for name in names:
+                self._max_age = time.monotonic() - start
+                values.append( getattr( self, name ) )
+        finally: self._max_age = previous
+
+        record = _SNAPSHOT_RECORDS.get( names )
+        if record is None:
+            record = _SNAPSHOT_RECORDS[ names ] = collections.namedtuple( "Snapshot", ( "timestamp", ) + names )
+        return record( timestamp, *values )
 #-------------------------------------------------------------------------------
 #===============================================================================
 
 #=============================== COM Functions =================================
+#------------------------------------ open -------------------------------------
+    def open( self ):
+        """ Starts a session, one serial handle is kept open and shared by every
+            property getter/setter until close() is called.
+        """
+        if self._serial_device is None:
+            self._serial_device = open_transport( self.port, self.baudrate, self.timeout )
+            self.clear_cache()
+            self._start_keepalive()
+        return self
+#-------------------------------------------------------------------------------
+#------------------------------------ close ------------------------------------
+    def close( self ):
+        """ Ends a session and releases the serial handle, the device resumes
+            TEXT output on its own once the keep-alive pings stop.
+        """
+        self._stop_keepalive()
+        serial_device = self._serial_device
+        self._serial_device = None
+        self._identity = {}
+        if serial_device is not None:
+            try: serial_device.close()
+            except: pass
+#-------------------------------------------------------------------------------
+#------------------------------- start_keepalive -------------------------------
+    def _start_keepalive( self ):
+        self._stop_keepalive()
+        if not self._keepalive or self._listening: return
+        self._keepalive_stop = threading.Event()
+        self._keepalive_thread = threading.Thread( target=self._keepalive_loop, args=( self._keepalive_stop, ), daemon=True )
+        self._keepalive_thread.start()
+#-------------------------------------------------------------------------------
+#------------------------------- stop_keepalive --------------------------------
+    def _stop_keepalive( self ):
+        if self._keepalive_thread is None: return
+        self._keepalive_stop.set()
+        if self._keepalive_thread is not threading.current_thread(): self._keepalive_thread.join()
+        self._keepalive_thread = None
+#-------------------------------------------------------------------------------
+#------------------------------- keepalive_loop --------------------------------
+    def _keepalive_loop( self, stop ):
+        """ Pings whenever keepalive seconds went by without a HEX reply or a 
+            ping.  A caller's transfer in progress counts as traffic, the ping
+            is skipped rather than queued behind it.
+        """
+        phase = self._rx.phase
+        last_ping = time.monotonic()
+        while True:
+            quiet = time.monotonic() - max( phase.last_hex or 0.0, last_ping )
+            if stop.wait( max( 0.0, self._keepalive - quiet ) ): return
+            if time.monotonic() - max( phase.last_hex or 0.0, last_ping ) < self._keepalive: continue
+            if not self._lock.acquire( blocking=False ): 
+                last_ping = time.monotonic()
+                continue
+            try:
+                if not stop.is_set(): self._send_cmd( "1" )
+            finally: self._lock.release()
+            last_ping = time.monotonic()
+#-------------------------------------------------------------------------------
 #-------------------------------- close_port -----------------------------------
     def _close_port( self, serial_device ):
+        # session handles stay open until close() is called.
+        if serial_device is self._serial_device: return
         serial_device.close()
 #-------------------------------------------------------------------------------
 #--------------------------------- open_port -----------------------------------
     def _open_port( self ):
-        serial_device = serial.Serial( self.port, baudrate=self.baudrate, timeout=self.timeout )
+        if self._serial_device is not None:
+            if not self._serial_device.is_open: self._reopen()
+            return self._serial_device
+        serial_device = open_transport( self.port, self.baudrate, self.timeout )
         return serial_device
 #-------------------------------------------------------------------------------
+#---------------------------------- reopen -------------------------------------
+    def _reopen( self ):
+        """ Drops a dead session handle (e.g. the tty disappeared after a USB
+            reset) and opens a fresh one on the same port.
+        """
+        try: self._serial_device.close()
+        except: pass
+        self._rx.reset()
+        self._serial_device = open_transport( self.port, self.baudrate, self.timeout )
+#-------------------------------------------------------------------------------
+#--------------------------------- reconnect -----------------------------------
+    def _reconnect( self, method, *args ):
+        """ Called when a transfer fails inside a session, reopens the port and
+            repeats the transfer once.  Returns ERROR_VAL if the port can't be
+            reopened or the repeat fails as well.
+        """
+        if self._serial_device is None or self._reconnecting: return self.ERROR_VAL
+        try: 
+            self._reopen()
+        except:
+            self._logger.error( "Unable to reopen %s!", self.port )
+            return self.ERROR_VAL
+        self._reconnecting = True
+        try: return method( *args )
+        finally: self._reconnecting = False
+#-------------------------------------------------------------------------------
+#--------------------------------- read_reply ----------------------------------
+    def _read_reply( self, serial_device, prefix ):
+        """ Returns the first HEX frame starting with prefix, or None if nothing
+            arrives within timeout seconds.  Async (:A) frames and stale replies
+            to earlier requests are skipped over.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            rx_msg = self._rx.read_frame( serial_device, deadline )
+            if rx_msg is None: return None
+            if rx_msg.startswith( prefix ) and not rx_msg.startswith( b':A' ):
+                return rx_msg
+            if self._metrics is not None: self._metrics.frames[ "async" if rx_msg.startswith( b':A' ) else "stale" ] += 1
+#-------------------------------------------------------------------------------
 #--------------------------------- send_cmd ------------------------------------
+    @_locked
     def _send_cmd( self, cmd ):
-        tx_msg = bytes()
-        tx_msg = ( ":" + cmd ).encode( "utf-8" )
-        crc = self._crc_calc( self._ascii_bytes_to_bytes( cmd.encode( "utf-8" ) ) )
-        tx_crc = self._bytes_to_ascii_bytes( crc )
-        tx_nln = str.encode( "\n", 'utf-8' )
-        tx_msg = tx_msg + tx_crc + tx_nln
-        return_value = self.ERROR_VAL
+        tx_msg = self._cmd_frame( cmd )
+        needed = self._transfer_time( 2 * len( tx_msg ) )
+        metrics = self._metrics
+        if metrics is not None: started = time.monotonic()
 
-        if self.DEBUG:
-            print( self._PREFIX + "T(" + str( len( tx_msg ) ) + " Bytes): " + self._to_hex( tx_msg ) )
-            print( self._PREFIX + "Tx_Msg = " + tx_msg.decode( 'utf-8' ) )
+        if self._logger.isEnabledFor( logging.DEBUG ): self._log_frame( "T", tx_msg )
 
         # Write binary data to port and read the respnse if it's availabe.
         try: 
             serial_device = self._open_port() 
+            if serial_device is not self._serial_device: self._rx.reset()
             n_tries = 5
             for i in range( n_tries ):
                 rx_msg = bytes()
 
+                self._await_gap( serial_device, needed )
                 bytes_written = serial_device.write( tx_msg )
+                if metrics is not None: metrics.tx_bytes += len( tx_msg )
                 if bytes_written == len( tx_msg ):
                     if cmd == "6": 
                         rx_msg = "RESTART"
                         break
-                    # wait for a response to be available, 2s
-                    count = 0
-                    while not serial_device.in_waiting and count < 100:
-                        count = count + 1
-                        time.sleep( 0.02 )
-                        
-                    # now that there is data waiting to come in, read up to 1000 bytes.
-                    count = 0
-                    while serial_device.in_waiting > 0 and count < 1000:
-                        rx_msg = rx_msg + serial_device.read()
-                        count = count + 1
-                        time.sleep( 0.002 )
-
-                    if  rx_msg.find( b':A' ) == -1 and rx_msg != 'b\xE8' and \
-                        rx_msg.find( b'\t' ) == -1:
-                        # we have a good return that is not the asynch message
+                    # wait for the reply frame, heartbeat and async frames are skipped.
+                    rx_msg = self._read_reply( serial_device, b':' )
+                    if rx_msg is not None:
                         break
                     else:
-                        # sometimes we fail due to the heartbeat
-                        # coming from the ve.device, this delay lets
-                        # it finish before we try to poll the device again
-                        serial_device.write( b'\x13\x10' )
-                        rx_msg = serial_device.read()
-                        time.sleep( 0.2 )
-                        serial_device.reset_input_buffer()
-                        time.sleep( 0.1 ) 
+                        if metrics is not None: metrics.retries[ "timeout" ] += 1
+                        rx_msg = bytes()
+                        self._recover( serial_device, needed )
+                elif metrics is not None: metrics.retries[ "short_write" ] += 1
         except:
-            print( self._PREFIX + "Unable to reach device!" )
+            if self.session_open and not self._reconnecting:
+                return self._reconnect( self._send_cmd, cmd )
+            self._logger.error( "Unable to reach device!" )
             try: self._close_port( serial_device )
             except: pass
             return self.ERROR_VAL
 
         self._close_port( serial_device )
-            
-        if self.DEBUG and cmd != "6":
-            print( self._PREFIX + "R(" + str( len( rx_msg ) ) + " Bytes): " + self._to_hex( rx_msg ) )
-            print( self._PREFIX + "Rx_Msg = " + rx_msg.decode( 'utf-8' ) )
+        if metrics is not None: metrics.observe( "cmd_" + cmd, time.monotonic() - started )
+
+        if cmd == "6": return rx_msg
+        return self._parse_cmd_reply( rx_msg )
+#-------------------------------------------------------------------------------
+#------------------------------- parse_cmd_reply -------------------------------
+    def _parse_cmd_reply( self, rx_msg ):
+        """ Decodes the reply to a ping/version style command (un16 payload)."""
+        tx_nln = b'\n'
+        return_value = self.ERROR_VAL
+
+        if self._logger.isEnabledFor( logging.DEBUG ): self._log_frame( "R", rx_msg )
 
         # Start parsing out the response, if these fields don't exist return an error.
-        if cmd != "6":
-            try: 
-                rx_cmd = rx_msg[:2]
-                rx_dat = rx_msg[2:6]
-                rx_crc = rx_msg[6:8]
-                rx_nln = rx_msg[8:]
-                
-                # update data and crc to bytes from ascii bytes
-                rx_dat = self._ascii_bytes_to_bytes( rx_dat )
-                rx_dat = self._flip( rx_dat )
-                rx_crc = self._ascii_bytes_to_bytes( rx_crc )
-
-                if self.DEBUG: 
-                    print( self._PREFIX + "rx_cmd = " + self._to_hex( rx_cmd ) )
-                    print( self._PREFIX + "rx_dat = " + self._to_hex( rx_dat ) )
-                    print( self._PREFIX + "rx_crc = " + self._to_hex( rx_crc ) )
-                    print( self._PREFIX + "rx_nln = " + self._to_hex( rx_nln ) + "\n" )
-
-                if rx_nln != tx_nln:
-                    print( self._PREFIX + "End of command line character not detected! rx_nln = " + str( rx_nln ) + ", tx_nln" + str( tx_nln ) )
-                    return self.ERROR_VAL 
-
-                 # calculate the crc we should be getting back if we've made it this far.
-                rx_crc_msg = bytes() 
-                rx_crc_msg = self._ascii_bytes_to_bytes( rx_cmd[1:] )
-                rx_crc_msg = rx_crc_msg + rx_dat
-                crc = self._crc_calc( rx_crc_msg )[-1:]
-
-                # now that we have the crc we can verify we got a good response from the insturment
-                if rx_crc != crc:
-                    print( self._PREFIX + "CRC does not match! " + "rx_crc = " + self._to_hex( rx_crc ) + ", crc = " + self._to_hex( crc ) ) 
-                    return self.ERROR_VAL
-                
-                return_value = int.from_bytes( rx_dat, byteorder='big', signed=True ) 
-            except:
-                print( self._PREFIX + "Invalid response format." )
+        try: 
+            rx_cmd = rx_msg[:2]
+            rx_dat = rx_msg[2:6]
+            rx_crc = rx_msg[6:8]
+            rx_nln = rx_msg[8:]
+            
+            # update data and crc to bytes from ascii bytes
+            rx_dat = self._ascii_bytes_to_bytes( rx_dat )
+            rx_dat = self._flip( rx_dat )
+            rx_crc = self._ascii_bytes_to_bytes( rx_crc )
+
+            self._logger.debug( "rx_cmd = %s rx_dat = %s rx_crc = %s rx_nln = %s", 
+                                _Hex( rx_cmd ), _Hex( rx_dat ), _Hex( rx_crc ), _Hex( rx_nln ) )
+
+            if rx_nln != tx_nln:
+                self._logger.warning( "End of command line character not detected! rx_nln = %s, tx_nln = %s", rx_nln, tx_nln )
+                self._count_failure( "mismatch" if rx_msg else "no_reply" )
+                return self.ERROR_VAL 
+
+             # calculate the crc we should be getting back if we've made it this far.
+            crc = self._crc_calc( self._ascii_bytes_to_bytes( rx_cmd[1:] ) + rx_dat )
+
+            # now that we have the crc we can verify we got a good response from the insturment
+            if rx_crc != crc:
+                self._logger.warning( "CRC does not match! rx_crc = %s, crc = %s", _Hex( rx_crc ), _Hex( crc ) )
+                self._count_failure( "crc" )
                 return self.ERROR_VAL
-        
+            
+            return_value = int.from_bytes( rx_dat, byteorder='big', signed=True ) 
+        except:
+            self._logger.warning( "Invalid response format." )
+            self._count_failure( "format" )
+            return self.ERROR_VAL
+
         return return_value 
+#-------------------------------------------------------------------------------
+#-------------------------------- transfer_time --------------------------------
+    def _transfer_time( self, n_bytes ):
+        """ Seconds a request/reply of n_bytes keeps the line busy."""
+        return n_bytes * 10 / self.baudrate + self.REPLY_LATENCY
+#-------------------------------------------------------------------------------
+#---------------------------------- await_gap ----------------------------------
+    def _await_gap( self, serial_device, needed ):
+        """ Holds a request that would run into the next TEXT heartbeat block
+            until that block has gone by, see _HeartbeatPhase.
+        """
+        phase = self._rx.phase
+        now = time.monotonic()
+        # whatever is buffered tells if a block is going out right now, a
+        # freshly opened port has nothing buffered so it's listened to briefly.
+        if serial_device.in_waiting: self._rx.receive( serial_device )
+        elif serial_device is not self._serial_device and not phase.known( now ) and not phase.text_paused( now ):
+            self._rx.read_block_end( serial_device, now + phase.GUARD )
+        delay = phase.delay( time.monotonic(), needed )
+        if delay > 0:
+            if self._metrics is not None: self._metrics.heartbeat_waits += 1
+            self._rx.read_block_end( serial_device, time.monotonic() + delay + phase.BLOCK )
+            # give the device a moment after the checksum before talking to it.
+            if phase.last_end is not None:
+                rest = phase.last_end + phase.GUARD - time.monotonic()
+                if rest > 0: time.sleep( rest )
+#-------------------------------------------------------------------------------
+#----------------------------------- recover -----------------------------------
+    def _recover( self, serial_device, needed ):
+        """ Gets ready to resend after a failed transfer.  With the heartbeat
+            phase known that is at most a wait for the gap, otherwise the 
+            device gets time to finish a block it may be sending.
+        """
+        if self._rx.phase.known( time.monotonic() ):
+            self._await_gap( serial_device, needed )
+            return
+        # sometimes we fail due to the heartbeat
+        # coming from the ve.device, this delay lets
+        # it finish before we try to poll the device again
+        serial_device.write( b'\x13\x10' )
+        serial_device.read()
+        time.sleep( 0.2 )
+        serial_device.reset_input_buffer()
+        self._rx.reset()
+        time.sleep( 0.1 ) 
+#-------------------------------------------------------------------------------
+#--------------------------------- log_frame -----------------------------------
+    def _log_frame( self, direction, frame ):
+        """ DEBUG record of a frame on the wire, direction "T" or "R", carrying
+            the raw frame for FrameTraceHandler.
+        """
+        self._logger.debug( "%s(%d Bytes): %s", direction, len( frame ), _Hex( frame ),
+                            extra={ "frame": bytes( frame ), "direction": direction } )
+#-------------------------------------------------------------------------------
+#-------------------------------- count_failure --------------------------------
+    def _count_failure( self, kind ):
+        if self._metrics is not None: self._metrics.failures[ kind ] += 1
+#-------------------------------------------------------------------------------
+#---------------------------------- cmd_frame ----------------------------------
+    def _cmd_frame( self, cmd ):
+        """ Builds the frame for a single character command, e.g. "1" ping."""
+        return encode_frame( int( cmd, 16 ) )
 #------------------------------------------------------------------------------- 
 #----------------------------------- read --------------------------------------
+    @_locked
     def _read( self, data_len, reg_addr, format='int' ):
-        # make our initial adjustments, ve.direct flips endianness of reg
-        reg_addr = self._flip( reg_addr )
-
-        # need to keep as bytes to compute CRC relatively easily.
-        tx_msg = bytes()
-        tx_msg = b'\x07'
-        tx_msg = tx_msg + reg_addr
-        tx_msg = tx_msg + b'\x00'
-        crc = self._crc_calc( tx_msg )
-        
-        # now that we have the crc value, let's adjust it to what victron
-        # device wants to see.
-        tx_msg = bytes()
-        tx_cmd = str.encode( ":7", 'utf-8' )
-        tx_reg = self._bytes_to_ascii_bytes( reg_addr )
-        tx_flg = self._bytes_to_ascii_bytes( b'\x00' )
-        tx_crc = self._bytes_to_ascii_bytes( crc )
-        tx_nln = str.encode( "\n", 'utf-8' )
-        tx_msg = tx_cmd + tx_reg + tx_flg + tx_crc + tx_nln
-        return_value = self.ERROR_VAL
+        metrics = self._metrics
+        hit, value = self._cache_get( reg_addr, format )
+        if hit: 
+            if metrics is not None: metrics.cache_hits[ reg_addr.hex().upper() ] += 1
+            return value
+        if metrics is not None: started = time.monotonic()
 
-        if self.DEBUG:
-            print( self._PREFIX + "T(" + str( len( tx_msg ) ) + " Bytes): " + self._to_hex( tx_msg ) )
-            print( self._PREFIX + "Tx_Msg = " + tx_msg.decode( 'utf-8' ) )
-            print( self._PREFIX + "tx_cmd = " + self._to_hex( tx_cmd ) )
-            print( self._PREFIX + "tx_reg = " + self._to_hex( tx_reg ) )
-            print( self._PREFIX + "tx_flg = " + self._to_hex( tx_flg ) )
-            print( self._PREFIX + "tx_crc = " + self._to_hex( tx_crc ) )
-            print( self._PREFIX + "tx_nln = " + self._to_hex( tx_nln ) + "\n" )
+        in_addr = reg_addr
+        tx_msg, tx_cmd, tx_reg, tx_flg = self._get_frame( reg_addr )
+        needed = self._transfer_time( 2 * len( tx_msg ) + 2 * data_len )
+
+        if self._logger.isEnabledFor( logging.DEBUG ): self._log_frame( "T", tx_msg )
 
         # Write binary data to port and read the respnse if it's availabe.
         try: 
             serial_device = self._open_port() 
+            if serial_device is not self._serial_device: self._rx.reset()
             n_tries = 5
             for i in range( n_tries ):
                 rx_msg = bytes()
 
+                self._await_gap( serial_device, needed )
                 bytes_written = serial_device.write( tx_msg )
+                if metrics is not None: metrics.tx_bytes += len( tx_msg )
                 if bytes_written == len( tx_msg ):
-                    # wait for a response to be available, 2s
-                    count = 0
-                    while not serial_device.in_waiting and count < 100:
-                        count = count + 1
-                        time.sleep( 0.02 )
-                        
-                    # now that there is data waiting to come in, read up to 1000 bytes.
-                    count = 0
-                    while serial_device.in_waiting > 0 and count < 1000:
-                        rx_msg = rx_msg + serial_device.read()
-                        count = count + 1
-                        time.sleep( 0.002 )
-                    
-                    rx_len = len( rx_msg )
-                    if rx_len <= bytes_written + data_len*2 + 2 and \
-                        rx_msg.find( b':A' ) == -1 and rx_msg != 'b\xE8' and \
-                        rx_msg.find( b'\t' ) == -1:
-                        # we have a good return that is not the asynch message
+                    # wait for the reply frame, heartbeat and async frames are skipped.
+                    rx_msg = self._read_reply( serial_device, tx_cmd + tx_reg )
+                    if rx_msg is not None and len( rx_msg ) <= bytes_written + data_len*2 + 2:
                         break
                     else:
-                        # sometimes we fail due to the heartbeat
-                        # coming from the ve.device, this delay lets
-                        # it finish before we try to poll the device again
-                        serial_device.write( b'\x13\x10' )
-                        rx_msg = serial_device.read()
-                        time.sleep( 0.2 )
-                        serial_device.reset_input_buffer()
-                        time.sleep( 0.1 ) 
+                        if metrics is not None: metrics.retries[ "timeout" if rx_msg is None else "length" ] += 1
+                        rx_msg = bytes()
+                        self._recover( serial_device, needed )
+                elif metrics is not None: metrics.retries[ "short_write" ] += 1
 
         except:
-            print( self._PREFIX + "Unable to reach device!" )
+            if self.session_open and not self._reconnecting:
+                return self._reconnect( self._read, data_len, in_addr, format )
+            self._logger.error( "Unable to reach device!" )
             try: self._close_port( serial_device )
             except: pass
             return self.ERROR_VAL
 
         self._close_port( serial_device )
+        if metrics is not None: metrics.observe( in_addr.hex().upper(), time.monotonic() - started )
             
-        if self.DEBUG:
-            print( self._PREFIX + "R(" + str( len( rx_msg ) ) + " Bytes): " + self._to_hex( rx_msg ) )
-            print( self._PREFIX + "Rx_Msg = " + rx_msg.decode( 'utf-8' ) )
+        return_value = self._parse_reply( rx_msg, tx_cmd, tx_reg, tx_flg, format )
+        self._cache_put( in_addr, format, return_value )
+        return return_value
+#-------------------------------------------------------------------------------
+#--------------------------------- parse_reply ---------------------------------
+    def _parse_reply( self, rx_msg, tx_cmd, tx_reg, tx_flg, format='int' ):
+        """ Checks a GET reply frame against the request and decodes its data."""
+        tx_nln = b'\n'
+
+        if self._logger.isEnabledFor( logging.DEBUG ): self._log_frame( "R", rx_msg )
 
         # Start parsing out the response, if these fields don't exist return an error.
         try: 
@@ -463,45 +2176,42 @@ class vedirect(object):
             if format == 'int': rx_dat = self._flip( rx_dat )
             rx_crc = self._ascii_bytes_to_bytes( rx_crc )
 
-            if self.DEBUG: 
-                print( self._PREFIX + "rx_cmd = " + self._to_hex( rx_cmd ) )
-                print( self._PREFIX + "rx_reg = " + self._to_hex( rx_reg ) )
-                print( self._PREFIX + "rx_flg = " + self._to_hex( rx_flg ) )
-                print( self._PREFIX + "rx_dat = " + self._to_hex( rx_dat ) )
-                print( self._PREFIX + "rx_crc = " + self._to_hex( rx_crc ) )
-                print( self._PREFIX + "rx_nln = " + self._to_hex( rx_nln ) + "\n" )
+            self._logger.debug( "rx_cmd = %s rx_reg = %s rx_flg = %s rx_dat = %s rx_crc = %s rx_nln = %s", 
+                                _Hex( rx_cmd ), _Hex( rx_reg ), _Hex( rx_flg ), _Hex( rx_dat ), _Hex( rx_crc ), _Hex( rx_nln ) )
 
         except:
-            print( self._PREFIX + "Invalid response format." )
+            self._logger.warning( "Invalid response format." )
+            self._count_failure( "format" )
             return self.ERROR_VAL
             
         # go through first three sets of data and the last
         if rx_cmd != tx_cmd: 
-            print( self._PREFIX + "Response command does not match! rx_cmd = " + str( rx_cmd ) + ", cmd = " + str( tx_cmd ) )
+            self._logger.warning( "Response command does not match! rx_cmd = %s, cmd = %s", rx_cmd, tx_cmd )
+            self._count_failure( "mismatch" if rx_msg else "no_reply" )
             return self.ERROR_VAL
         elif rx_reg != tx_reg:
-            print( self._PREFIX + "Response address does not match! rx_reg = " + str( rx_reg ) + ", reg = " + str( tx_reg ) )
+            self._logger.warning( "Response address does not match! rx_reg = %s, reg = %s", rx_reg, tx_reg )
+            self._count_failure( "mismatch" if rx_msg else "no_reply" )
             return self.ERROR_VAL
         elif rx_flg != tx_flg:
-            print( self._PREFIX + "Response flag does not match! rx_flg = " + str( rx_flg ) + ", flg = " + str( tx_flg ) )
+            self._logger.warning( "Response flag does not match! rx_flg = %s, flg = %s", rx_flg, tx_flg )
+            self._count_failure( "mismatch" if rx_msg else "no_reply" )
             return self.ERROR_VAL
         elif rx_nln != tx_nln:
-            print( self._PREFIX + "End of command line character not detected! rx_nln = " + str( rx_nln ) + ", nln" + str( tx_nln ) )
+            self._logger.warning( "End of command line character not detected! rx_nln = %s, nln = %s", rx_nln, tx_nln )
+            self._count_failure( "mismatch" if rx_msg else "no_reply" )
             return self.ERROR_VAL 
             
         # calculate the crc we should be getting back if we've made it this far.
-        rx_crc_msg = bytes() 
-        rx_crc_msg = self._ascii_bytes_to_bytes( rx_cmd[1:] )
-        rx_crc_msg = rx_crc_msg + self._ascii_bytes_to_bytes( rx_reg )
-        rx_crc_msg = rx_crc_msg + self._ascii_bytes_to_bytes( rx_flg )
-        if format == 'int' or format == 'b': rx_crc_msg = rx_crc_msg + rx_dat
-        if format == 'str' or format == 'str_ovvr': 
-            rx_crc_msg = rx_crc_msg + self._hex_adj_for_crc( rx_dat )
-        crc = self._crc_calc( rx_crc_msg )[-1:]
+        rx_crc_msg = self._ascii_bytes_to_bytes( b'0' + rx_msg[1:8] )
+        if format.startswith( 'str' ): rx_crc_msg = rx_crc_msg + self._hex_adj_for_crc( rx_dat )
+        else: rx_crc_msg = rx_crc_msg + rx_dat
+        crc = self._crc_calc( rx_crc_msg )
 
         # now that we have the crc we can verify we got a good response from the insturment
         if rx_crc != crc:
-            print( self._PREFIX + "CRC does not match! " + "rx_crc = " + self._to_hex( rx_crc ) + ", crc = " + self._to_hex( crc ) ) 
+            self._logger.warning( "CRC does not match! rx_crc = %s, crc = %s", _Hex( rx_crc ), _Hex( crc ) )
+            self._count_failure( "crc" )
             if format.find( "ovvr" ) == -1: return self.ERROR_VAL
         
         if format == 'int' or format == 'int_ovvr':
@@ -513,97 +2223,78 @@ class vedirect(object):
         elif format == 'str_ovvr':
             return_value = rx_dat.decode( 'utf-8' )[:-2]
         else:
-            print( self._PREFIX + "Invalid format selection, choices are int, b, str. You specified " + str( format ) + "..." )
+            self._logger.error( "Invalid format selection, choices are int, b, str. You specified %s...", format )
             return self.ERROR_VAL
         
         return return_value
 #-------------------------------------------------------------------------------
+#---------------------------------- get_frame ----------------------------------
+    def _get_frame( self, reg_addr ):
+        """ Builds the ':7' GET frame for reg_addr, returns the frame and the
+            command, register and flag fields a reply has to echo.
+        """
+        return _get_frame_fields( reg_addr )
+#-------------------------------------------------------------------------------
 #----------------------------------- write -------------------------------------
+    @_locked
     def _write( self, value, data_len, reg_addr, format='int' ):
-        # make our initial adjustments, ve.direct flips endianness of reg
-        reg_addr = self._flip( reg_addr )
-
-        # need to keep as bytes to compute CRC relatively easily.
-        tx_msg = bytes()
-        tx_msg = b'\x08'
-        tx_msg = tx_msg + reg_addr
-        tx_msg = tx_msg + b'\x00'
-        tx_msg = tx_msg + value 
-        crc = self._crc_calc( tx_msg )
-        
-        # now that we have the crc value, let's adjust it to what victron
-        # device wants to see.
-        tx_msg = bytes()
-        tx_cmd = str.encode( ":8", 'utf-8' )
-        tx_reg = self._bytes_to_ascii_bytes( reg_addr )
-        tx_flg = self._bytes_to_ascii_bytes( b'\x00' )
-        tx_val = self._bytes_to_ascii_bytes( value )
-        tx_crc = self._bytes_to_ascii_bytes( crc )
-        tx_nln = str.encode( "\n", 'utf-8' )
-        tx_msg = tx_cmd + tx_reg + tx_flg + tx_val + tx_crc + tx_nln
-        return_value = self.ERROR_VAL
+        in_addr = reg_addr
+        metrics = self._metrics
+        if metrics is not None: started = time.monotonic()
+        self._cache_invalidate( reg_addr )
+        tx_msg, tx_cmd, tx_reg, tx_flg = self._set_frame( value, reg_addr )
+        needed = self._transfer_time( 2 * len( tx_msg ) )
 
-        if self.DEBUG:
-            print( self._PREFIX + "T(" + str( len( tx_msg ) ) + " Bytes): " + self._to_hex( tx_msg ) )
-            print( self._PREFIX + "Tx_Msg = " + tx_msg.decode( 'utf-8' ) )
-            print( self._PREFIX + "tx_cmd = " + self._to_hex( tx_cmd ) )
-            print( self._PREFIX + "tx_reg = " + self._to_hex( tx_reg ) )
-            print( self._PREFIX + "tx_flg = " + self._to_hex( tx_flg ) )
-            print( self._PREFIX + "tx_val = " + self._to_hex( tx_val ) )
-            print( self._PREFIX + "tx_crc = " + self._to_hex( tx_crc ) )
-            print( self._PREFIX + "tx_nln = " + self._to_hex( tx_nln ) + "\n" )
+        if self._logger.isEnabledFor( logging.DEBUG ): self._log_frame( "T", tx_msg )
 
         # Write binary data to port and read the respnse if it's availabe.
         try: 
             serial_device = self._open_port() 
+            if serial_device is not self._serial_device: self._rx.reset()
             n_tries = 5
             for i in range( n_tries ):
                 rx_msg = bytes()
 
+                self._await_gap( serial_device, needed )
                 bytes_written = serial_device.write( tx_msg )
+                if metrics is not None: metrics.tx_bytes += len( tx_msg )
                 if bytes_written == len( tx_msg ):
-                    # wait for a response to be available, 2s
-                    count = 0
-                    while not serial_device.in_waiting and count < 100:
-                        count = count + 1
-                        time.sleep( 0.02 )
-                        
-                    # now that there is data waiting to come in, read up to 1000 bytes.
-                    count = 0
-                    while serial_device.in_waiting > 0 and count < 1000:
-                        rx_msg = rx_msg + serial_device.read()
-                        count = count + 1
-                        time.sleep( 0.002 )
-
-                    rx_len = len( rx_msg )
-                    if rx_len <= bytes_written + data_len*2 + 2 and \
-                        rx_msg.find( b':A' ) == -1 and rx_msg != 'b\xE8' and \
-                        rx_msg.find( b'\t' ) == -1:
+                    # wait for the reply frame, heartbeat and async frames are skipped.
+                    rx_msg = self._read_reply( serial_device, tx_cmd + tx_reg )
+                    if rx_msg is not None and len( rx_msg ) <= bytes_written + data_len*2 + 2:
                         break
                     else:
-                        # sometimes we fail due to the heartbeat
-                        # coming from the ve.device, this delay lets
-                        # it finish before we try to poll the device again
-                        serial_device.write( b'\x13\x10' )
-                        rx_msg = serial_device.read()
-                        time.sleep( 0.2 )
-                        serial_device.reset_input_buffer()
-                        time.sleep( 0.1 ) 
+                        if metrics is not None: metrics.retries[ "timeout" if rx_msg is None else "length" ] += 1
+                        rx_msg = bytes()
+                        self._recover( serial_device, needed )
+                elif metrics is not None: metrics.retries[ "short_write" ] += 1
 
         except:
-            print( self._PREFIX + "Unable to reach device!" )
+            if self.session_open and not self._reconnecting:
+                return self._reconnect( self._write, value, data_len, in_addr, format )
+            self._logger.error( "Unable to reach device!" )
             try: self._close_port( serial_device )
             except: pass
             return self.ERROR_VAL
 
         self._close_port( serial_device )
+        if metrics is not None: metrics.observe( in_addr.hex().upper(), time.monotonic() - started )
             
-        if self.DEBUG:
-            print( self._PREFIX + "R(" + str( len( rx_msg ) ) + " Bytes): " + self._to_hex( rx_msg ) )
-            print( self._PREFIX + "Rx_Msg = " + rx_msg.decode( 'utf-8' ) )
+        return self._parse_echo( rx_msg, tx_msg, format )
+#-------------------------------------------------------------------------------
+#--------------------------------- parse_echo ----------------------------------
+    def _parse_echo( self, rx_msg, tx_msg, format='int' ):
+        """ Checks the reply to a SET frame, the device echoes the frame back."""
+        tx_cmd = tx_msg[:2]
+        tx_reg = tx_msg[2:6]
+        tx_flg = tx_msg[6:8]
+        tx_crc = tx_msg[-3:-1]
+        tx_nln = tx_msg[-1:]
+
+        if self._logger.isEnabledFor( logging.DEBUG ): self._log_frame( "R", rx_msg )
 
         if not rx_msg == tx_msg:
-            print( self._PREFIX + "Unable to update parameter to provided input." )
+            self._logger.warning( "Unable to update parameter to provided input." )
         
         # Start parsing out the response, if these fields don't exist return an error.
         try: 
@@ -614,33 +2305,34 @@ class vedirect(object):
             rx_crc = rx_msg[-3:-1]
             rx_nln = rx_msg[-1:]
 
-            if self.DEBUG: 
-                print( self._PREFIX + "rx_cmd = " + self._to_hex( rx_cmd ) )
-                print( self._PREFIX + "rx_reg = " + self._to_hex( rx_reg ) )
-                print( self._PREFIX + "rx_flg = " + self._to_hex( rx_flg ) )
-                print( self._PREFIX + "rx_dat = " + self._to_hex( rx_dat ) )
-                print( self._PREFIX + "rx_crc = " + self._to_hex( rx_crc ) )
-                print( self._PREFIX + "rx_nln = " + self._to_hex( rx_nln ) + "\n" )
+            self._logger.debug( "rx_cmd = %s rx_reg = %s rx_flg = %s rx_dat = %s rx_crc = %s rx_nln = %s", 
+                                _Hex( rx_cmd ), _Hex( rx_reg ), _Hex( rx_flg ), _Hex( rx_dat ), _Hex( rx_crc ), _Hex( rx_nln ) )
 
         except:
-            print( self._PREFIX + "Invalid response format." )
+            self._logger.warning( "Invalid response format." )
+            self._count_failure( "format" )
             return self.ERROR_VAL
         
         # go through first three sets of data and the last
         if rx_cmd != tx_cmd: 
-            print( self._PREFIX + "Response command does not match! rx_cmd = " + str( rx_cmd ) + ", cmd = " + str( tx_cmd ) )
+            self._logger.warning( "Response command does not match! rx_cmd = %s, cmd = %s", rx_cmd, tx_cmd )
+            self._count_failure( "mismatch" if rx_msg else "no_reply" )
             return self.ERROR_VAL
         elif rx_reg != tx_reg:
-            print( self._PREFIX + "Response address does not match! rx_reg = " + str( rx_reg ) + ", reg = " + str( tx_reg ) )
+            self._logger.warning( "Response address does not match! rx_reg = %s, reg = %s", rx_reg, tx_reg )
+            self._count_failure( "mismatch" if rx_msg else "no_reply" )
             return self.ERROR_VAL
         elif rx_flg != tx_flg:
-            print( self._PREFIX + "Response flag does not match! rx_flg = " + str( rx_flg ) + ", flg = " + str( tx_flg ) )
+            self._logger.warning( "Response flag does not match! rx_flg = %s, flg = %s", rx_flg, tx_flg )
+            self._count_failure( "mismatch" if rx_msg else "no_reply" )
             return self.ERROR_VAL
         elif rx_crc != tx_crc:
-            print( self._PREFIX + "CRC does not match! " + "rx_crc = " + self._to_hex( rx_crc ) + ", tx_crc = " + self._to_hex( tx_crc ) ) 
+            self._logger.warning( "CRC does not match! rx_crc = %s, tx_crc = %s", _Hex( rx_crc ), _Hex( tx_crc ) )
+            self._count_failure( "crc" )
             return self.ERROR_VAL
         elif rx_nln != tx_nln:
-            print( self._PREFIX + "End of command line character not detected! rx_nln = " + str( rx_nln ) + ", nln" + str( tx_nln ) )
+            self._logger.warning( "End of command line character not detected! rx_nln = %s, nln = %s", rx_nln, tx_nln )
+            self._count_failure( "mismatch" if rx_msg else "no_reply" )
             return self.ERROR_VAL 
         
         if format == 'int' or format == 'int_ovvr':
@@ -652,47 +2344,147 @@ class vedirect(object):
         elif format == 'str_ovvr':
             return_value = rx_dat.decode( 'utf-8' )[:-2]
         else:
-            print( self._PREFIX + "Invalid format selection, choices are int, b, str. You specified " + str( format ) + "..." )
+            self._logger.error( "Invalid format selection, choices are int, b, str. You specified %s...", format )
             return self.ERROR_VAL
         
         return return_value
 #-------------------------------------------------------------------------------
-#---------------------------------- readall ------------------------------------
-    @property
-    def readall( self ):
-        """ Just a function to listen to the com port for a bit..."""
-
-        try:
-            serial_device = self._open_port() 
-        except:
-            print( self._PREFIX + "Unable to reach device!" )
-            return None
-        
-        listening = True 
-        receive_message = bytes()
-        while listening: 
-            try: 
-                bytestream = serial_device.read() 
-                receive_message = receive_message + bytestream
-
-                if bytestream == b'\xea':
-                    print( self._PREFIX + "End of heartbeat detected..." )
-                    #self._process_message( receive_message )
-                    break
+#-------------------------------------------------------------------------------
+#---------------------------------- set_frame ----------------------------------
+    def _set_frame( self, value, reg_addr ):
+        """ Builds the ':8' SET frame writing value (bytes, little endian) to
+            reg_addr, returns the frame and the fields the echo has to match.
+        """
+        return _set_frame_fields( value, reg_addr )
+#-------------------------------------------------------------------------------
+#--------------------------------- read_many -----------------------------------
+    @_locked
+    def read_many( self, registers, window=8 ):
+        """ Reads several registers in one pass.  Up to window GET frames are kept
+            in flight and replies are matched to their request by the register
+            address they carry, rather than one request/wait/parse per register.
+              registers - list of reg_addr (e.g. b'\xED\xBC', read as 'int') or
+                          ( data_len, reg_addr, format ) tuples as taken by _read.
+            Returns a dict of reg_addr -> value, registers that never answered 
+            are set to ERROR_VAL.
+        """
+        requests = {}
+        return_values = {}
+        metrics = self._metrics
+        for register in registers:
+            if isinstance( register, bytes ): register = ( 4, register, 'int' )
+            data_len, reg_addr, format = register
+            hit, return_values[reg_addr] = self._cache_get( reg_addr, format )
+            if hit: 
+                if metrics is not None: metrics.cache_hits[ reg_addr.hex().upper() ] += 1
+                continue
+            return_values[reg_addr] = self.ERROR_VAL
+            tx_msg, tx_cmd, tx_reg, tx_flg = self._get_frame( reg_addr )
+            # [ reg_addr, format, frame, flag, attempts, time sent ]
+            requests[ tx_reg ] = [ reg_addr, format, tx_msg, tx_flg, 0, 0 ]
+        if not requests: return return_values
+
+        queue = list( requests )
+        pending = []
+        n_tries = 5
+        try:
+            serial_device = self._open_port()
+            if serial_device is not self._serial_device: self._rx.reset()
+            while queue or pending:
+                # keep the pipeline topped up
+                while queue and len( pending ) < window:
+                    tx_reg = queue.pop( 0 )
+                    requests[tx_reg][4] += 1
+                    self._await_gap( serial_device, self._transfer_time( 2 * len( requests[tx_reg][2] ) + 8 ) )
+                    serial_device.write( requests[tx_reg][2] )
+                    if self._logger.isEnabledFor( logging.DEBUG ): self._log_frame( "T", requests[tx_reg][2] )
+                    if metrics is not None: 
+                        metrics.tx_bytes += len( requests[tx_reg][2] )
+                        requests[tx_reg][5] = time.monotonic()
+                    pending.append( tx_reg )
+
+                rx_msg = self._read_reply( serial_device, b':7' )
+                if rx_msg is None:
+                    # nothing came back in time, resend whatever is missing.
+                    for tx_reg in pending:
+                        if requests[tx_reg][4] < n_tries: queue.append( tx_reg )
+                    if metrics is not None: metrics.retries[ "timeout" ] += len( pending )
+                    pending = []
+                    continue
+
+                tx_reg = rx_msg[2:6]
+                if tx_reg not in pending: continue
+                pending.remove( tx_reg )
+                reg_addr, format, tx_msg, tx_flg, attempts, sent = requests[tx_reg]
+                if metrics is not None: metrics.observe( reg_addr.hex().upper(), time.monotonic() - sent )
+                return_values[reg_addr] = self._parse_reply( rx_msg, b':7', tx_reg, tx_flg, format )
+                self._cache_put( reg_addr, format, return_values[reg_addr] )
 
-            except KeyboardInterrupt: 
-                print( self._PREFIX + "Exiting listen..." )
-                break
+        except:
+            if self.session_open and not self._reconnecting:
+                return self._reconnect( self.read_many, registers, window )
+            self._logger.error( "Unable to reach device!" )
+            try: self._close_port( serial_device )
+            except: pass
+            return return_values
 
-        print( self._PREFIX + "" + str( receive_message ) )
-        print( "[VE_DIR] R(" + str( len( receive_message ) ) + " Bytes): " + self._to_hex( receive_message ) )
-        
         self._close_port( serial_device )
-        return "Fin" 
+        return return_values
+#-------------------------------------------------------------------------------
+#--------------------------------- heartbeat -----------------------------------
+    def heartbeat( self, count=None, timeout=None ):
+        """ Generator yielding the decoded TEXT heartbeat blocks the device sends
+            every second (see HeartbeatParser), no HEX round trips needed.
+              count   - stop after this many blocks, None runs until interrupted
+                        or the end of a replay.
+              timeout - stop if no valid block arrives for this many seconds.
+            Keep-alive pings pause while it runs.
+        """
+        try:
+            with self._lock: serial_device = self._open_port() 
+        except:
+            self._logger.error( "Unable to reach device!" )
+            return
+
+        # pings would put the device in HEX mode and hold the TEXT blocks back.
+        self._listening += 1
+        self._stop_keepalive()
+        parser = HeartbeatParser()
+        n_blocks = 0
+        last_block = time.monotonic()
+        try:
+            while count is None or n_blocks < count:
+                with self._lock: data = serial_device.read( max( 1, serial_device.in_waiting ) )
+                # a replay that ran out
+                if not data and not serial_device.is_open: break
+                for block in parser.feed( data ):
+                    n_blocks += 1
+                    last_block = time.monotonic()
+                    yield block 
+                    if count is not None and n_blocks >= count: break
+                if timeout is not None and time.monotonic() - last_block > timeout: break
+        except KeyboardInterrupt:
+            self._logger.info( "Exiting listen..." )
+        finally:
+            self._listening -= 1
+            with self._lock: self._close_port( serial_device )
+            if self.session_open: self._start_keepalive()
+#-------------------------------------------------------------------------------
+#---------------------------------- readall ------------------------------------
+    @property
+    def readall( self ):
+        """ Listens to the port for one TEXT heartbeat block and returns it 
+            decoded, None if nothing valid arrives within 5 seconds.
+        """
+        for block in self.heartbeat( 1, 5 ):
+            return block
+        return None 
 #-------------------------------------------------------------------------------
 #===============================================================================
 
 #================================ Properties ===================================
+    # Plain registers get their accessor generated from the REGISTERS table
+    # (see Register Properties after the class), the ones below need code.
 #----------------------------- Product Information -----------------------------
     @property 
     def firmware( self ):
@@ -702,6 +2494,7 @@ class vedirect(object):
     def pid( self ):
         reg_addr = b'\x01\x00'
         response = self._read( 4, reg_addr, 'b' )
+        if response == self.ERROR_VAL: return response
         if response[-1:] == b'\xFF':
             return self._to_hex( self._flip( response[1:-1] ) )
         else:
@@ -720,7 +2513,9 @@ class vedirect(object):
     @property
     def model_name( self ):
         reg_addr = b'\x01\x0B'
-        return self._read( 64, reg_addr, 'b' ).decode( 'utf-8' )
+        response = self._read( 64, reg_addr, 'b' )
+        if response == self.ERROR_VAL: return response
+        return response.decode( 'utf-8' )
     
     @property
     def capabilities( self ):
@@ -735,7 +2530,9 @@ class vedirect(object):
                       "Plugin Display Support", "22", "23", "24", "Load Automatic Energy Selector", "Battery Test", 
                       "PAYGO Support", "28", "29", "30", "31" ]
         
-        cap_flag = self._bit_array( self._read( 4, reg_addr, 'int' ), 32 )
+        response = self._read( 4, reg_addr, 'int' )
+        if response == self.ERROR_VAL: return response
+        cap_flag = self._bit_array( response, 32 )
         
         len_flags = len( cap_flag ) - 1
         for i in range( len( cap_name ) ):
@@ -745,39 +2542,6 @@ class vedirect(object):
 #-------------------------------------------------------------------------------
 
 #---------------------------- Generic Device Control ---------------------------
-    @property 
-    def device_mode( self ):
-        reg_addr = b'\x02\x00'
-        response = self._read( 1, reg_addr, 'int' )
-        if self.DESCRIPTIVE:
-            if response == 0 or response == 4: return "OFF"
-            if response == 1: return "ON"
-            return self.ERROR_VAL
-        else:
-            if response == 0 or response == 4: return 0
-            if response == 1: return 1
-            return self.ERROR_VAL
-    
-    @property
-    def device_state( self ):
-        reg_addr = b'\x02\x01'
-        response = self._read( 1, reg_addr, 'int' )
-        if self.DESCRIPTIVE:
-            if response ==  0: return "NOT_CHARGING"
-            if response ==  2: return "FAULT"
-            if response ==  3: return "BULK"
-            if response ==  4: return "ABSORPTION"
-            if response ==  5: return "FLOAT"
-            if response ==  6: return "STORAGE"
-            if response ==  7: return "MANUAL EQUALISE"
-            if response ==-11: return "WAKE-UP"
-            if response == -9: return "AUTO EQUALISE"
-            if response == -6: return "BLOCKED"
-            if response == -4: return "EXTERNAL CONTROL"
-            if response == -1: return "UNAVAILABLE"
-            return "UNKNOWN DEVICE STATE"
-        else: return response  
-    
     @property
     def remote_control( self ):
         reg_addr = b'\x02\x02'
@@ -789,18 +2553,11 @@ class vedirect(object):
         return return_value 
     @remote_control.setter
     def remote_control( self, value ):
-        reg_addr = b'\x02\x02'
-        try:
-            if value == "OFF": value = 0
-            if value == "ON" : value = 1
-        except: pass
-        if value == 0 or value == 1: 
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
+        self.write_register( "remote_control", value )
 
     @property
     def device_off_reason( self ):
-        device_type = self.model_name
+        device_type = self._model_name()
         if device_type.find( "MPPT RS" ) != -1:# or device_type.find( "BlueSolar" ) != -1:
             reg_addr = b'\x02\x07'
             return_value = self._bit_array( self._read( 4, reg_addr, 'int' ), 32 )
@@ -808,7 +2565,7 @@ class vedirect(object):
             reg_addr = b'\x02\x05'
             return_value = self._bit_array( self._read( 1, reg_addr, 'int' ), 8 )
         else:
-            print( self._PREFIX + "Model does not support this command." )
+            self._logger.warning( "Model does not support this command." )
             return self.ERROR_VAL
         
         if self.DESCRIPTIVE and len( return_value ) > 1 :
@@ -829,50 +2586,6 @@ class vedirect(object):
 #-------------------------------------------------------------------------------
 
 #------------------------------- Battery Settings ------------------------------
-    @property
-    def batterysafe_mode( self ):
-        reg_addr = b'\xED\xFF'
-        response = self._read( 1, reg_addr, 'int' )
-        if self.DESCRIPTIVE:
-            if response == 0: return "OFF"
-            if response == 1: return "ON"
-            return self.ERROR_VAL
-        else: return response 
-    @batterysafe_mode.setter
-    def batterysafe_mode( self, value ):
-        reg_addr = b'\xED\xFF'
-        try:
-            if value == "OFF": value = 0
-            if value == "ON" : value = 1
-        except: pass
-        if value == 0 or value == 1: 
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
-        else:
-            print( self._PREFIX + "Invalid input value " + str( value ) )
-
-    @property
-    def adaptive_mode( self ):
-        reg_addr = b'\xED\xFE'
-        response = self._read( 1, reg_addr, 'int' )
-        if self.DESCRIPTIVE:
-            if response == 0: return "OFF"
-            if response == 1: return "ON"
-            return self.ERROR_VAL
-        else: return response 
-    @adaptive_mode.setter
-    def adaptive_mode( self, value ):
-        reg_addr = b'\xED\xFE'
-        try:
-            if value == "OFF": value = 0
-            if value == "ON" : value = 1
-        except: pass
-        if value == 0 or value == 1: 
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
-        else:
-            print( self._PREFIX + "Invalid input value " + str( value ) )
-
     @property
     def automatic_equalisation_mode( self ):
         reg_addr = b'\xED\xFD'
@@ -900,98 +2613,12 @@ class vedirect(object):
             value = value.to_bytes( 1, signed=False )
             self._write( value, 1, reg_addr, 'int' )
         else:
-            print( self._PREFIX + "Invalid input value " + str( value ) )
-
-    @property
-    def battery_bulk_time_limit( self ):
-        reg_addr = b'\xED\xFC'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response
-        return response / 100
-    @battery_bulk_time_limit.setter
-    def battery_bulk_time_limit( self, value ):
-        reg_addr = b'\xED\xFC'
-        value = int( value * 100 )
-        if value >= 0 and value <= 10000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            response = self._write( value, 2, reg_addr, 'int' )
-        else:
-            print( self._PREFIX + "Invalid input value " + str( value ) )
-
-    @property
-    def battery_absorption_time_limit( self ):
-        reg_addr = b'\xED\xFB'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response
-        return response / 100
-    @battery_absorption_time_limit.setter
-    def battery_absorption_time_limit( self, value ):
-        reg_addr = b'\xED\xFB'
-        value = int( value * 100 )
-        if value >= 0 and value <= 10000: 
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-
-    @property
-    def battery_absorption_voltage( self ):
-        reg_addr = b'\xED\xF7'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response
-        return response / 100
-    @battery_absorption_voltage.setter 
-    def battery_absorption_voltage( self, value ):
-        reg_addr = b'\xED\xFB'
-        value = int( value * 100 )
-        if value >= 0 and value <= 10000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
+            self._logger.warning( "Invalid input value %s", value )
 
-    @property
-    def battery_float_voltage( self ):
-        reg_addr = b'\xED\xF6'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response
-        return response / 100
-    @battery_float_voltage.setter
-    def battery_float_voltage( self, value ):
-        reg_addr = b'\xED\xF6'
-        value = int( value * 100 )
-        if value >= 0 and value <= 10000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-    
-    @property
-    def battery_equalisation_voltage( self ):
-        reg_addr = b'\xED\xF4'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response
-        return response / 100
-    @battery_equalisation_voltage.setter
-    def battery_equalisation_voltage( self, value ):
-        reg_addr = b'\xED\xF4'
-        value = int( value * 100 )
-        if value >= 0 and value <= 10000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-            
-    @property
-    def battery_temp_comp( self ):
-        reg_addr = b'\xED\xF2'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response
-        return response / 100
-    @battery_temp_comp.setter
-    def battery_temp_comp( self, value ):
-        reg_addr = b'\xED\xF2'
-        value = int( value * 100 )
-        if value >= -100000 and value <= 100000 and value != self.ERROR_VAL:
-            value = value.to_bytes( 2, byteorder='little', signed=True )
-            self._write( value, 2, reg_addr, 'int' )
-    
     @property
     def battery_type( self ):
-        dev_cap = self.capabilities
-        dev_name = self.model_name 
+        dev_cap = self._capabilities()
+        dev_name = self._model_name() 
         reg_addr = b'\xED\xF1'
         response = self._read( 1, reg_addr, 'int' )
         
@@ -1039,32 +2666,6 @@ class vedirect(object):
             value = value.to_bytes( 1, byteorder='little', signed=True )
             self._write( value, 1, reg_addr, 'int' )
 
-    @property
-    def battery_max_curr( self ):
-        reg_addr = b'\xED\xF0'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        return response / 10
-    @battery_max_curr.setter
-    def battery_max_curr( self, value ):
-        reg_addr = b'\xED\xF0'
-        value = int( value * 10 )
-        if value >= 0 and value <= 10000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-
-    @property
-    def battery_system_voltage( self ):
-        reg_addr = b'\xED\xEF'
-        return self._read( 1, reg_addr, 'int' ) 
-    @battery_system_voltage.setter
-    def battery_system_voltage( self, value ):
-        reg_addr = b'\xED\xEF'
-        value = int( value )
-        if value == 12 or value == 24 or value == 36 or value == 48:
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
-    
     @property
     def battery_temp( self ):
         reg_addr = b'\xED\xEC'
@@ -1073,182 +2674,26 @@ class vedirect(object):
         if response >= 273.15: return response - 273.15
         return self.ERROR_VAL 
 
-    @property
-    def battery_voltage_setting( self ):
-        reg_addr = b'\xED\xEA'
-        return self._read( 1, reg_addr, 'int' )
-    @battery_voltage_setting.setter 
-    def battery_voltage_setting( self, value ):
-        reg_addr = b'\xED\xEA'
-        value = int( value )
-        if value == 12 or value == 24 or value == 36 or value == 48:
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
-    
-    @property
-    def battery_bms_present( self ):
-        reg_addr = b'\xED\xE8'
-        response = self._read( 1, reg_addr, 'int' )
-        if self.DESCRIPTIVE:
-            if response == 0: return "NO"
-            if response == 1: return "YES"
-            return self.ERROR_VAL
-        return response
-    @battery_bms_present.setter
-    def battery_bms_present( self, value ):
-        reg_addr = b'\xED\xE8'
-        value = int( value )
-        if value == 0 or value == 1:
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
-
-    @property
-    def battery_tail_current( self ):
-        reg_addr = b'\xED\xE7'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        return response / 10 
-    @battery_tail_current.setter
-    def battery_tail_current( self, value ):
-        reg_addr = b'\xED\xE7'
-        value = int( value )
-        if value >= 0 and value <= 10000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-
     @property
     def battery_low_temp_charge_curr( self ):
         reg_addr = b'\xED\xE6'
         response = self._read( 2, reg_addr, 'int' )
         if response == self.ERROR_VAL: return response
-        if response == -1 and self.DESCRIPTITVE: return "Use Max"
+        if response == -1 and self.DESCRIPTIVE: return "Use Max"
         if response == -1: return self.battery_max_curr 
         return response / 10 
     @battery_low_temp_charge_curr.setter
     def battery_low_temp_charge_curr( self, value ):
-        reg_addr = b'\xED\xE6'
-        value = int( value * 10 )
-        if value >= -1 and value <= 10000:
-            value = value.to_byest( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-
-    @property
-    def battery_auto_eq_stop_on_voltage( self ):
-        reg_addr = b'\xED\xE5'
-        response = self._read( 1, reg_addr, 'int' )
-        if self.DESCRIPTIVE:
-            if response == 0: return "NO"
-            if response == 1: return "YES"
-            return self.ERROR_VAL
-        return response
-    @battery_auto_eq_stop_on_voltage.setter
-    def battery_auto_eq_stop_on_voltage( self, value ):
-        reg_addr = b'xED\xE5'
-        value = int( value )
-        if value == 0 or value == 1:
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
-    
-    @property
-    def battery_equalisation_current_level( self ):
-        reg_addr = b'\xED\xE4'
-        return self._read( 1, reg_addr, 'int' )
-    @battery_equalisation_current_level.setter
-    def battery_equalisation_current_level( self, value ):
-        reg_addr = b'\xED\xE4'
-        value = int( value )
-        if value >= 0 and value <= 100:
-            value = value.to_bytes( 1, signed=True )
-            self._write( value, 1, reg_addr, 'int' )
-
-    @property
-    def battery_equalisation_duration( self ):
-        reg_addr = b'\xED\xE3'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response
-        return response / 100
-    @battery_equalisation_duration.setter
-    def battery_equalisation_duration( self, value ):
-        reg_addr = b'\xED\xE3'
-        value = int( value * 100 )
-        if value >= 0 and value <= 100000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-
-    @property 
-    def battery_rebulk_voltage_offset( self ):
-        reg_addr = b'\xED\x2E'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response
-        return response / 100
-    @battery_rebulk_voltage_offset.setter
-    def battery_rebulk_voltage_offset( self, value ):
-        reg_addr = b'\xED\x2E'
-        value = int( value * 100 )
-        if value >= 0 and value <= 100000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-
-    @property 
-    def battery_low_temp_level( self ):
-        reg_addr = b'\xED\xE0'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        return response / 100
-    @battery_low_temp_level.setter
-    def battery_low_temp_level( self, value ):
-        reg_addr = b'\xED\xE0'
-        value = int( value * 100 )
-        if value >= -6000 and value <= 10000:
-            value = value.to_bytes( 2, byteorder='little', signed=True )
-            self._write( value, 2, reg_addr, 'int' )
-
-    @property
-    def battery_voltage_compensation( self ):
-        reg_addr = b'\xED\xCA'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response
-        return response / 100
-    @battery_voltage_compensation.setter
-    def battery_voltage_compensation( self, value ):
-        reg_addr = '\xED\xCA'
-        value = int( value * 100 )
-        if value >= 0 and value <= 10000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-
-    @property
-    def battery_rem_input_mode_config( self ):
-        dev_name = self.model_name
-        reg_addr = b'\xD0\xC0'
-        if dev_name.find( "MPPT RS" ) == -1:
-            if self.DESCRIPTIVE:
-                print( self._PREFIX + "Model does not support this command." )
-            return self.ERROR_VAL
-        else:
-            response = self._read( 1, reg_addr, 'int' )
-            if response == 0:
-                if self.DESCRIPTIVE: return "Remote On/Off"
-                else: return response
-            elif response == 1:
-                if self.DESCRIPTIVE: return "2-Wire BMS Signals"
-                else: return response
-            else: return self.ERROR_VAL
-    @battery_rem_input_mode_config.setter
-    def battery_rem_input_mode_config( self, value ):
-        reg_addr = b'\xD0\xC0'
-        value = int( value )
-        if value == 0 or value == 1: 
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
+        # -1 uses the battery maximum current
+        self.write_register( "battery_low_temp_charge_curr", value )
 
     @property
     def battery_wire_input_states( self ):
-        dev_name = self.model_name
+        dev_name = self._model_name()
         reg_addr = b'\xD0\x1F'
         if dev_name.find( "MPPT RS" ) == -1:
             if self.DESCRIPTIVE:
-                print( self._PREFIX + "Model does not support this command." )
+                self._logger.warning( "Model does not support this command." )
             return self.ERROR_VAL
         else:
             response = self._read( 1, reg_addr, 'int' )
@@ -1271,40 +2716,6 @@ class vedirect(object):
 #--------------------------------- Charger Data --------------------------------
     # 0xEDEC Battery Temperature is listed in the Protocol DOcument here, but
     # it first appears in the battery settings sections, so it is omitted here.
-    @property 
-    def charger_max_curr( self ):
-        reg_addr = b'\xED\xDF'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response
-        return response / 10
-
-    @property 
-    def system_yield( self ):
-        reg_addr = b'\xED\xDF'
-        response = self._read( 4, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response == -1 and self.DESCRIPTIVE: return "Not Available" 
-        if response == -1: return self.ERROR_VAL 
-        if response < 0: return ( response + 4294967295 ) / 100
-        return response / 100
-
-    @property
-    def user_yield( self ):
-        reg_addr = b'\xED\xEC'
-        response = self._read( 4, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response == -1 and self.DESCRIPTIVE: return "Not Available" 
-        if response == -1: return self.ERROR_VAL 
-        if response < 0: return ( response + 4294967295 ) / 100
-        return response / 100
-
-    @property
-    def charger_internal_temp( self ):
-        reg_addr = b'\xED\xDB'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        return response / 100
-
     @property 
     def charger_error_code( self ):
         reg_addr = b'\xED\xDA'
@@ -1341,32 +2752,6 @@ class vedirect(object):
             else:
                 return response 
         
-    @property 
-    def charger_current( self ):
-        dev_name = self.model_name 
-        reg_addr = b'\xED\xD7'
-        if dev_name.find( "MPPT RS" ) != -1:
-            if self.DESCRIPTIVE:
-                print( self._PREFIX + "Model does not support this command, use dc_battery_current instead." )
-            return self.ERROR_VAL
-        else:
-            response = self._read( 2, reg_addr, 'int' )
-            if response == self.ERROR_VAL: return response 
-            return response / 10
-
-    @property 
-    def charger_voltage( self ):
-        dev_name = self.model_name 
-        reg_addr = b'\xED\xD5'
-        if dev_name.find( "MPPT RS" ) != -1:
-            if self.DESCRIPTIVE:
-                print( self._PREFIX + "Model does not support this command, use dc_battery_voltage instead." )
-            return self.ERROR_VAL
-        else:
-            response = self._read( 2, reg_addr, 'int' )
-            if response == self.ERROR_VAL: return response 
-            return response / 100
-
     @property
     def charger_addtl_info( self ):
         reg_addr = b'\xED\xD4'
@@ -1384,38 +2769,6 @@ class vedirect(object):
         else:
             return dict_flags
 
-    @property
-    def yield_today( self ):
-        reg_addr = b'\xED\xD3'
-        response = self._read( 1, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return ( response + 65535 ) / 100
-        return response  / 100
-    
-    @property
-    def max_power_today( self ):
-        reg_addr = b'\xED\xD2'
-        response = self._read( 1, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return response + 65535
-        return response 
-
-    @property 
-    def yield_yesterday( self ):
-        reg_addr = b'\xED\xD1'
-        response = self._read( 1, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return ( response + 65535 ) / 100
-        return response  / 100
-
-    @property
-    def max_power_yesterday( self ):
-        reg_addr = b'\xED\xD0'
-        response = self._read( 1, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return response + 65535
-        return response 
-    
     @property
     def voltage_settings_range( self ):
         reg_addr = b'\xED\xCE'
@@ -1424,262 +2777,78 @@ class vedirect(object):
         min_volt = int.from_bytes( response[:-1], byteorder='big', signed=False )
         max_volt = int.from_bytes( response[-1:], byteorder='big', signed=False )
         return [min_volt,max_volt]
+#-------------------------------------------------------------------------------
 
+#------------------------------- Solar Panel Data ------------------------------
     @property
-    def history_version( self ):
-        reg_addr = b'\xED\xCD'
-        return self._read( 1, reg_addr, 'int' )
+    def panel_power_multitrack( self ):
+        return_value = []
+        dev_name = self._model_name() 
+        reg_addr = [ b'\xEC\xCC', b'\xEC\xDC', b'\xEC\xEC', b'\xEC\xFC' ]
 
-    @property
-    def streetlight_version( self ):
-        reg_addr = b'\xED\xCC'
-        return self._read( 1, reg_addr, 'int' )
-    
-    @property
-    def equalise_current_max( self ):
-        dev_name = self.model_name
-        reg_addr = b'\xED\xC7'
         if dev_name.find( "MPPT RS" ) == -1:
             if self.DESCRIPTIVE:
-                print( self._PREFIX + "Model does not support this command." )
+                self._logger.warning( "Model does not support this command." )
             return self.ERROR_VAL
         else:
-            return self._read( 1, reg_addr, 'int' )
+            num_trackers = self._num_trackers()
+            for i in range( num_trackers ):
+                response = self._read( 4, reg_addr[i], 'int' )
+                if response == self.ERROR_VAL: return_value.append( response )
+                elif response < 0: return_value.append( ( response + 4294967296 ) / 100 ) 
+                else: return_value.append( response / 100 )
+            return return_value 
+                
+    @property
+    def panel_voltage_multitrack( self ):
+        return_value = []
+        dev_name = self._model_name() 
+        reg_addr = [ b'\xEC\xCB', b'\xEC\xDB', b'\xEC\xEB', b'\xEC\xFB' ]
 
-    @property 
-    def equalise_voltage_max( self ):
-        dev_name = self.model_name
-        reg_addr = b'\xED\xC6'
         if dev_name.find( "MPPT RS" ) == -1:
             if self.DESCRIPTIVE:
-                print( self._PREFIX + "Model does not support this command." )
+                self._logger.warning( "Model does not support this command." )
             return self.ERROR_VAL
         else:
-            response = self._read( 1, reg_addr, 'int' )
-            if response == self.ERROR_VAL: return response
-            return response / 100
+            num_trackers = self._num_trackers()
+            for i in range( num_trackers ):
+                response = self._read( 2, reg_addr[i], 'int' )
+                if response == self.ERROR_VAL: return_value.append( response )
+                elif response < 0: return_value.append( ( response + 65536 ) / 100 ) 
+                else: return_value.append( response / 100 )
+            return return_value 
         
     @property
-    def adjustable_voltage_min( self ):
-        reg_addr = b'\x22\x11'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response
-        return response / 100
-    
-    @property
-    def adjustable_voltage_max( self ):
-        reg_addr = b'\x22\x12'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response
-        return response / 100
-    
-    @property 
-    def dc_battery_ripple_voltage( self ):
-        dev_name = self.model_name 
-        reg_addr = b'\xED\x8B'
+    def panel_current_multitrack( self ):
+        return_value = []
+        dev_name = self._model_name() 
+        reg_addr = [ b'\xEC\xCD', b'\xEC\xDD', b'\xEC\xED', b'\xEC\xFD' ]
+
         if dev_name.find( "MPPT RS" ) == -1:
             if self.DESCRIPTIVE:
-                print( self._PREFIX + "Model does not support this command." )
+                self._logger.warning( "Model does not support this command." )
             return self.ERROR_VAL
         else:
-            response = self._read( 2, reg_addr, 'int' )
-            if response == self.ERROR_VAL: return response 
-            if response < 0: return ( response + 65536 ) / 100
-            return response / 100
+            num_trackers = self._num_trackers()
+            for i in range( num_trackers ):
+                response = self._read( 2, reg_addr[i], 'int' )
+                if response == self.ERROR_VAL: return_value.append( response )
+                elif response < 0: return_value.append( ( response + 65536 ) / 10 ) 
+                else: return_value.append( response / 10 )
+            return return_value 
         
     @property
-    def dc_battery_voltage( self ):
-        dev_name = self.model_name
-        reg_addr = b'\xED\x8D'
+    def tracker_mode_multitrack( self ):
+        return_value = []
+        dev_name = self._model_name() 
+        reg_addr = [ b'\xEC\xC3', b'\xEC\xD3', b'\xEC\xE3', b'\xEC\xF3' ]
+
         if dev_name.find( "MPPT RS" ) == -1:
             if self.DESCRIPTIVE:
-                print( self._PREFIX + "Model does not support this command use charger_voltage instead." )
-            return self.ERROR_VAL
-        else:
-            response = self._read( 2, reg_addr, 'int' )
-            if response == self.ERROR_VAL: return response 
-            return response / 100        
-
-    @property
-    def dc_battery_current( self ):
-        dev_name = self.model_name
-        reg_addr = b'\xED\x8F'
-        if dev_name.find( "MPPT RS" ) == -1:
-            if self.DESCRIPTIVE:
-                print( self._PREFIX + "Model does not support this command, use charger_current instead." )
-            return self.ERROR_VAL
-        else:
-            response = self._read( 2, reg_addr, 'int' )
-            if response == self.ERROR_VAL: return response 
-            return response / 10
-#-------------------------------------------------------------------------------
-
-#------------------------------- Solar Panel Data ------------------------------
-    @property 
-    def num_mppt_tracker( self ):
-        dev_name = self.model_name 
-        reg_addr = b'\x02\x44'
-        if dev_name.find( "MPPT RS" ) == -1:
-            if self.DESCRIPTIVE:
-                print( self._PREFIX + "Model does not support this command." )
-            return self.ERROR_VAL
-        else:
-            response = self._read( 1, reg_addr, 'int' )
-            if response == self.ERROR_VAL: return response 
-            if response < 0: return ( response + 256 )
-            return response 
-
-    @property 
-    def panel_maximum_current( self ):
-        reg_addr = b'\xED\xBF'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return ( response + 65536 ) / 10
-        return response / 10
-    
-    @property
-    def panel_power( self ):
-        reg_addr = b'\xED\xBC'
-        response = self._read( 4, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return ( response + 4294967296 ) / 100
-        return response / 100
-    
-    @property
-    def panel_voltage( self ):
-        reg_addr = b'\xED\xBB'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response == -1 and self.DESCRIPTIVE: return "Not Available"
-        if response == -1: return self.ERROR_VAL 
-        if response < 0: return ( response + 65536 ) / 100
-        return response / 100
-    
-    @property
-    def panel_current( self ):
-        reg_addr = b'\xED\xBD'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return ( response + 65536 ) / 10
-        return response / 10
-    
-    @property
-    def panel_max_allowed_voltage( self ):
-        reg_addr = b'\xED\xB8'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return ( response + 65536 ) / 100
-        return response / 100
-    
-    @property
-    def tracker_mode( self ):
-        reg_addr = b'\xED\xB3'
-        response = self._read( 1, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if self.DESCRIPTIVE:
-            if response == 0: return "OFF"
-            if response == 1: return "Voltage/Current limited"
-            if response == 2: return "MPP Tracker"
-            return self.ERROR_VAL
-        else: return response
-
-    @property
-    def panel_start_volt( self ):
-        dev_name = self.model_name 
-        reg_addr = b'\xED\xB2'
-        if dev_name.find( "MPPT RS" ) == -1:
-            if self.DESCRIPTIVE:
-                print( self._PREFIX + "Model does not support this command." )
-            return self.ERROR_VAL
-        else:
-            response = self._read( 2, reg_addr, 'int' )
-            if response == self.ERROR_VAL: return response 
-            if response < 0: return ( response + 65536 ) / 100
-            return response / 100
-
-    @property
-    def panel_input_resistance( self ):
-        dev_name = self.model_name 
-        reg_addr = b'\xED\xB1'
-        if dev_name.find( "MPPT RS" ) == -1:
-            if self.DESCRIPTIVE:
-                print( self._PREFIX + "Model does not support this command." )
-            return self.ERROR_VAL
-        else:
-            response = self._read( 4, reg_addr, 'int' )
-            if response == self.ERROR_VAL: return response 
-            if response < 0: return ( response + 4294967296 )
-            return response 
-
-    @property
-    def panel_power_multitrack( self ):
-        return_value = []
-        dev_name = self.model_name 
-        num_trackers = self.num_mppt_tracker
-        reg_addr = [ b'\xEC\xCC', b'\xEC\xDC', b'\xEC\xEC', b'\xEC\xFC' ]
-
-        if dev_name.find( "MPPT RS" ) == -1:
-            if self.DESCRIPTIVE:
-                print( self._PREFIX + "Model does not support this command." )
-            return self.ERROR_VAL
-        else:
-            for i in range( num_trackers ):
-                response = self._read( 4, reg_addr[i], 'int' )
-                if response == self.ERROR_VAL: return_value.append( response )
-                elif response < 0: return_value.append( ( response + 4294967296 ) / 100 ) 
-                else: return_value.append( response / 100 )
-            return return_value 
-                
-    @property
-    def panel_voltage_multitrack( self ):
-        return_value = []
-        dev_name = self.model_name 
-        num_trackers = self.num_mppt_tracker
-        reg_addr = [ b'\xEC\xCB', b'\xEC\xDB', b'\xEC\xEB', b'\xEC\xFB' ]
-
-        if dev_name.find( "MPPT RS" ) == -1:
-            if self.DESCRIPTIVE:
-                print( self._PREFIX + "Model does not support this command." )
-            return self.ERROR_VAL
-        else:
-            for i in range( num_trackers ):
-                response = self._read( 2, reg_addr[i], 'int' )
-                if response == self.ERROR_VAL: return_value.append( response )
-                elif response < 0: return_value.append( ( response + 65536 ) / 100 ) 
-                else: return_value.append( response / 100 )
-            return return_value 
-        
-    @property
-    def panel_current_multitrack( self ):
-        return_value = []
-        dev_name = self.model_name 
-        num_trackers = self.num_mppt_tracker
-        reg_addr = [ b'\xEC\xCD', b'\xEC\xDD', b'\xEC\xED', b'\xEC\xFD' ]
-
-        if dev_name.find( "MPPT RS" ) == -1:
-            if self.DESCRIPTIVE:
-                print( self._PREFIX + "Model does not support this command." )
-            return self.ERROR_VAL
-        else:
-            for i in range( num_trackers ):
-                response = self._read( 2, reg_addr[i], 'int' )
-                if response == self.ERROR_VAL: return_value.append( response )
-                elif response < 0: return_value.append( ( response + 65536 ) / 10 ) 
-                else: return_value.append( response / 10 )
-            return return_value 
-        
-    @property
-    def tracker_mode_multitrack( self ):
-        return_value = []
-        dev_name = self.model_name 
-        num_trackers = self.num_mppt_tracker
-        reg_addr = [ b'\xEC\xC3', b'\xEC\xD3', b'\xEC\xE3', b'\xEC\xF3' ]
-
-        if dev_name.find( "MPPT RS" ) == -1:
-            if self.DESCRIPTIVE:
-                print( self._PREFIX + "Model does not support this command." )
+                self._logger.warning( "Model does not support this command." )
             return self.ERROR_VAL
         else:
+            num_trackers = self._num_trackers()
             for i in range( num_trackers ):
                 response = self._read( 2, reg_addr[i], 'int' )
                 if self.DESCRIPTIVE:
@@ -1692,120 +2861,6 @@ class vedirect(object):
 #-------------------------------------------------------------------------------
 
 #--------------------------- Load Output Data/Settings -------------------------
-    @property 
-    def load_current( self ):
-        reg_addr = b'\xED\xAD'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response
-        if response < 0: return ( response + 65536 ) / 10 
-        return response / 10 
-    
-    @property
-    def load_offset_voltage( self ):
-        reg_addr = b'\xED\xAC'
-        response = self._read( 1, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response
-        if response < 0: return ( response + 256 ) / 100 
-        return response / 100
-    @load_offset_voltage.setter
-    def load_offset_voltage( self, value ):
-        reg_addr = b'\xED\xAC'
-        value = int( value * 100 )
-        if value >= 0 and value <= 100000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-    
-    @property
-    def load_output_control( self ):
-        reg_addr = b'\xED\xAB'
-        response = self._read( 1, reg_addr, 'int' )       
-        if response == self.ERROR_VAL: return response
-        if self.DESCRIPTIVE:
-            if response == 0: return "OFF"
-            if response == 1: return "AUTO"
-            if response == 2: return "ALT1"
-            if response == 3: return "ALT2"
-            if response == 4: return "ON"
-            if response == 5: return "USER1"
-            if response == 6: return "USER2"
-            if response == 7: return "AES"
-            return self.ERROR_VAL
-        else: return response
-    @load_output_control.setter
-    def load_output_control( self, value ):
-        reg_addr = b'\xED\xAB'
-        try:
-            if value >= 0 and value <= 7 and value == int( value ): 
-                value = value 
-        except: 
-            try: 
-                if   value.upper() == "OFF":   value = 0
-                elif value.upper() == "AUTO":  value = 1
-                elif value.upper() == "ALT1":  value = 2
-                elif value.upper() == "ALT2":  value = 3
-                elif value.upper() == "ON":    value = 4
-                elif value.upper() == "USER1": value = 5
-                elif value.upper() == "USER2": value = 6
-                elif value.upper() == "AES":   value = 7
-            except: pass
-        value = value.to_bytes( 1, signed=False )
-        response = self._write( value, 1, reg_addr, 'int' )
-
-    @property 
-    def load_output_voltage( self ):
-        reg_addr = b'\xED\xAB'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return (response + 65536 ) / 100
-        return response / 100
-    @load_output_voltage.setter
-    def load_output_voltage( self, value ):
-        reg_addr = b'\xED\xAB'
-        value = int( value * 100 )
-        if value >= 0 and value <= 100000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-
-    @property
-    def load_output_state( self ):
-        reg_addr = b'\xED\xA8'
-        response = self._read( 1, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response
-        if self.DESCRIPTIVE:
-            if response == 0: return "OFF"
-            if response == 1: return "ON"
-            return self.ERROR_VAL
-        else: return response
-
-    @property 
-    def load_switch_high_level( self ):
-        reg_addr = b'\xED\x9D'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return (response + 65536 ) / 100
-        return response / 100
-    @load_switch_high_level.setter
-    def load_switch_high_level( self, value ):
-        reg_addr = b'\xED\x9D'
-        value = int( value * 100 )
-        if value >= 0 and value <= 10000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-
-    @property 
-    def load_switch_low_level( self ):
-        reg_addr = b'\xED\x9C'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return (response + 65536 ) / 100
-        return response / 100
-    @load_switch_low_level.setter
-    def load_switch_low_level( self, value ):
-        reg_addr = b'\xED\x9C'
-        value = int( value * 100 )
-        if value >= 0 and value <= 10000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-
     @property
     def load_output_off_reason( self ):
         reg_addr = b'\xED\x91'
@@ -1822,156 +2877,10 @@ class vedirect(object):
             dict_off[ dict_names[i] ] = dict_flags[ len_flags - i ][-1:]    
 
         return dict_off
-
-    @property
-    def load_aes_timer( self ):
-        reg_addr = b'\xED\x90'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return (response + 65536 )
-        return response
-    @load_aes_timer.setter
-    def load_aes_timer( self, value ):
-        reg_addr = b'\xED\x90'
-        value = int( value )
-        if value >= 0 and value <= 10000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
 #-------------------------------------------------------------------------------
 
 #-------------------------------- Relay Settings -------------------------------
-    @property 
-    def relay_opmode( self ):
-        reg_addr = b'\xED\xD9'
-        response = self._read( 1, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if self.DESCRIPTIVE:
-            if response == 0: return "Relay Always Off"
-            if response == 1: return "Panel Voltage High"
-            if response == 2: return "Internal Temp Too High"
-            if response == 3: return "Battery Voltage Too low"
-            if response == 4: return "Equalisation Active"
-            if response == 5: return "Error Condition Present"
-            if response == 6: return "Internal Temp Too Low"
-            if response == 7: return "Battery Voltage Too High"
-            if response == 8: return "Charger in Float or Storage"
-            if response == 9: return "Day Detection (Panels Irradiated)"
-            if response == 10: return "Load Control (Switches According to Load Control Mode)"
-            return self.ERROR_VAL
-        else:
-            return response 
-    @relay_opmode.setter 
-    def relay_opmode( self, value ):
-        reg_addr = b'\xED\xD9'
-        value = int( value )
-        if value >= 0 and value <= 10:
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
-
-    @property
-    def relay_battery_low_voltage_set( self ):
-        reg_addr = b'\x03\x50'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return ( response + 65536 ) / 100
-        return response / 100
-    @relay_battery_low_voltage_set.setter
-    def relay_battery_low_voltage_set( self, value ):
-        reg_addr = b'\x03\x50'
-        value = int( value * 100 )
-        if value >= 0 and value <= 10000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-    
-    @property 
-    def relay_battery_low_voltage_clear( self ):
-        reg_addr = b'\x03\x51'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return ( response + 65536 ) / 100
-        return response / 100
-    @relay_battery_low_voltage_clear.setter 
-    def relay_battery_low_voltage_clear( self, value ):
-        reg_addr = b'\x03\x51'
-        value = int( value * 100 )
-        if value >= 0 and value <= 10000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-    
-    @property
-    def relay_battery_high_voltage_set( self ):
-        reg_addr = b'\x03\x52'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return ( response + 65536 ) / 100
-        return response / 100
-    @relay_battery_high_voltage_set.setter
-    def relay_battery_high_voltage_set( self, value ):
-        reg_addr = b'\x03\x52'
-        value = int( value * 100 )
-        if value >= 0 and value <= 10000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-    
-    @property 
-    def relay_battery_high_voltage_clear( self ):
-        reg_addr = b'\x03\x53'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return ( response + 65536 ) / 100
-        return response / 100   
-    @relay_battery_high_voltage_clear.setter
-    def relay_battery_high_voltage_clear( self, value ):
-        reg_addr = b'\x03\x53'
-        value = int( value * 100 )
-        if value >= 0 and value <= 10000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-    
-    @property
-    def relay_panel_high_voltage_set( self ):
-        reg_addr = b'\xED\xBA'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return ( response + 65536 ) / 100
-        return response / 100
-    @relay_panel_high_voltage_set.setter
-    def relay_panel_high_voltage_set( self, value ):
-        reg_addr = b'\xED\xBA'
-        value = int( value * 100 )
-        if value >= 0 and value <= 100000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-    
-    @property 
-    def relay_panel_high_voltage_clear( self ):
-        reg_addr = b'\xED\xB9'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return ( response + 65536 ) / 100
-        return response / 100
-    @relay_panel_high_voltage_clear.setter
-    def relay_panel_high_voltage_clear( self, value ):
-        reg_addr = b'\xED\xB9'
-        value = int( value * 100 )
-        if value >= 0 and value <= 100000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-    
-    @property
-    def relay_min_enabled_time( self ):
-        reg_addr = b'\x10\x0A'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return ( response + 65536 )
-        return response
-    @relay_min_enabled_time.setter
-    def relay_min_enabled_time( self, value ):
-        reg_addr = b'\x10\x0A'
-        value = int( value )
-        if value >= 0 and value <= 100000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
+    # All generated from REGISTERS.
 #-------------------------------------------------------------------------------
 
 #-------------------------- Lighting Controller Timer --------------------------
@@ -1980,241 +2889,27 @@ class vedirect(object):
         reg_addr = [ b'\xED\xA0', b'\xED\xA1', b'\xED\xA2', b'\xED\xA3', \
                      b'\xED\xA4', b'\xED\xA5' ]
         return_values = []
-        dict_names = [ "Time offset", "Anchor Point", "Dim Action" ]
-        dict_units = [ "[min]", "[n/a]", "[%]"]
-
-        for i in range( len( reg_addr ) ):
-            dict_events = {}
-            dict_vals = []
-            response = self._read( 4, reg_addr[i], 'b' )
-            if response == self.ERROR_VAL:
-                for j in range( 3 ): dict_vals.append( response )
-            else:
-                time_offset = response[:-2]
-                anchor_point = int.from_bytes( response[-3:-2], byteorder='big', signed=False )
-                dim_action = response[-4:-3]
-
-                dict_vals.append( int.from_bytes( time_offset, byteorder='big', signed=True ) )
-                if self.DESCRIPTIVE:
-                    if anchor_point == 0: dict_vals.append( "N/A" )
-                    elif anchor_point == 1: dict_vals.append( "SUNSET" )
-                    elif anchor_point == 2: dict_vals.append( "MID-NIGHT" )
-                    elif anchor_point == 3: dict_vals.append( "SUNRISE" )
-                    else: dict_vals.append( self.ERROR_VAL )
-                else: 
-                    dict_vals.append( anchor_point )
-                dict_vals.append( int.from_bytes( dim_action, byteorder='big', signed=False ) )
-
-                if self.DESCRIPTIVE:
-                    for j in range( len( dict_names ) ):
-                        dict_events[ dict_names[j] ] = [dict_vals[j], dict_units[j]]   
-                    return_values.append( dict_events )
-                else:
-                    return_values.append( dict_vals )
-
+        responses = self.read_many( [ ( 4, addr, 'b' ) for addr in reg_addr ] )
+        for addr in reg_addr:
+            event = self._timer_event( responses[ addr ] )
+            if event is not None: return_values.append( event )
         return return_values
     @lighting_timer_events.setter
     def lighting_timer_events( self, values=[] ):
-        reg_addr = [ b'\xED\xA0', b'\xED\xA1', b'\xED\xA2', b'\xED\xA3', \
-                     b'\xED\xA4', b'\xED\xA5' ]
-        if len( values ) == 6:
-            index = 0
-            for events in values:
-                time_offset = int( events[0] )
-                anchor_point = int( events[1] )
-                dim_action = int( events[2] )
-
-                good_vals = True
-                if time_offset < -1440 or time_offset > 1440: good_vals = False 
-                if anchor_point < 1 or anchor_point > 3: good_vals = False
-                if dim_action < 0 or anchor_point > 100: good_vals = False 
-
-                if good_vals: 
-                    time_offset = time_offset.to_bytes( 2, byteorder='big', signed=True )
-                    anchor_point = anchor_point.to_bytes( 1, signed=False )
-                    dim_action = dim_action.to_bytes( 1, signed=False )
-                    timer_event = dim_action + anchor_point + time_offset
-                    timer_event = self._flip( timer_event )
-                    self._write( timer_event, 4, reg_addr[index], 'int' )
-                index += 1
-
-    @property
-    def lighting_midpoint_shift( self ):
-        reg_addr = b'\xED\xA7'
-        return self._read( 2, reg_addr, 'int' )
-    @lighting_midpoint_shift.setter
-    def lighting_midpoint_shift( self, value ):
-        reg_addr = b'\xED\xA7'
-        value = int( value )
-        if value >= -24 and value <= 24:
-            value = value.to_bytes( 2, byteorder='little', signed=True )
-            self._write( value, 2, reg_addr, 'int' )
-
-    @property
-    def lighting_gradual_dim_speed( self ):
-        reg_addr = b'\xED\x9B'
-        response = self._read( 1, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return response + 256
-        return response 
-    @lighting_gradual_dim_speed.setter
-    def lighting_gradual_dim_speed( self, value ):
-        reg_addr = b'\xED\x9B'
-        value = int( value )
-        if value >= 0 and value <= 255:
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
-
-    @property
-    def lighting_panel_voltage_night( self ):
-        reg_addr = b'\xED\x9A'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return ( response + 65536 ) / 100 
-        return response / 100 
-    @lighting_panel_voltage_night.setter 
-    def lighting_panel_voltage_night( self, value ):
-        reg_addr = b'\xED\x9A'
-        value = int( value * 100 )
-        if value >= 0 and value <= 100000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-
-    @property
-    def lighting_panel_voltage_day( self ):
-        reg_addr = b'\xED\x99'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return ( response + 65536 ) / 100 
-        return response / 100 
-    @lighting_panel_voltage_day.setter
-    def lighting_panel_voltage_day( self, value ):
-        reg_addr = b'\xED\x99'
-        value = int( value * 100 )
-        if value >= 0 and value <= 100000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' ) 
-
-    @property
-    def lighting_sunset_delay( self ):
-        reg_addr = b'\xED\x96'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return response + 65536  
-        return response 
-    @lighting_sunset_delay.setter
-    def lighting_sunset_delay( self, value ):
-        reg_addr = b'\xED\x96'
-        value = int( value )
-        if value >= 0 and value <= 10000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-
-    @property
-    def lighting_sunrise_delay( self ):
-        reg_addr = b'\xED\x97'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return response + 65536  
-        return response 
-    @lighting_sunrise_delay.setter
-    def lighting_sunrise_delay( self, value ):
-        reg_addr = b'\xED\x97'
-        value = int( value )
-        if value >= 0 and value <= 10000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-
-    @property
-    def lighting_aes_timer( self ):
-        reg_addr = b'\xED\x90'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response < 0: return response + 65536  
-        return response 
-    @lighting_aes_timer.setter
-    def lighting_aes_timer( self, value ):
-        reg_addr = b'\xED\x90'
-        value = int( value )
-        if value >= 0 and value <= 10000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-
-    @property
-    def lighting_solar_activity( self ):
-        reg_addr = b'\x20\x30'
-        response = self._read( 1, reg_addr, 'int' )
-        if self.DESCRIPTIVE:
-            if response == 0: return "DARK"
-            if response == 1: return "LIGHT"
-            return self.ERROR_VAL
-        return response 
-
-    @property
-    def lighting_time_of_day( self ):
-        reg_addr = b'\x20\x31'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response == -1 and self.DESCRIPTIVE: return "Not Available"
-        if response == -1: return self.ERROR_VAL
-        if response < 0: return response + 65536  
-        return response 
-    @lighting_time_of_day.setter
-    def lighting_time_of_day( self, value ):
-        reg_addr = b'\x20\x31'
-        value = int( value )
-        if value >= 0 and value <= 10000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
+        if len( values ) == len( _TIMER_EVENTS ):
+            for name, events in zip( _TIMER_EVENTS, values ):
+                timer_event = self._encode_timer_event( events )
+                if timer_event is not None: self._write( timer_event, 4, REGISTERS[ name ].addr, 'int' )
 #-------------------------------------------------------------------------------
 
 #--------------------------- VE.Direct Port Functions --------------------------
-    @property
-    def tx_port_opmode( self ):
-        reg_addr = b'\xED\x9E'
-        response = self._read( 1, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response
-        if self.DESCRIPTIVE:
-            if response == 0: return "Normal VE.Direct Communication (default)"
-            if response == 1: return "Pulse for every 0.01kWh harvested (100ms low)"
-            if response == 2: return "Lighting control pwm normal (f=160Hz, 0%=0V)"
-            if response == 3: return "Lighting control pwm inverted (f=160Hz, 0%=5V)"
-            if response == 4: return "Virtual load output"
-            return self.ERROR_VAL
-        else: return response 
-    @tx_port_opmode.setter
-    def tx_port_opmode( self, value ):
-        reg_addr = b'\xED\x9E'
-        value = int( value )
-        if value >= 0 and value <= 4:
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
-
-    @property 
-    def rx_port_opmode( self ):
-        reg_addr = b'\xED\x98'
-        response = self._read( 1, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response
-        if self.DESCRIPTIVE:
-            if response == 0: return "Remote On/Off"
-            if response == 1: return "Load output configuration"
-            if response == 2: return "Load output on/off remote control (inverted)"
-            if response == 3: return "Load output on/off remote control (normal)"
-            return self.ERROR_VAL
-        else: return response 
-    @rx_port_opmode.setter
-    def rx_port_opmode( self, value ):
-        reg_addr = b'\xED\x98'
-        value = int( value )
-        if value >= 0 and value <= 3:
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
+    # All generated from REGISTERS.
 #-------------------------------------------------------------------------------
 
 #------------------------ Pluggable Display Functions --------------------------
     @property 
     def disp_backlight_mode( self ):
-        device_type = self.model_name
+        device_type = self._model_name()
         if device_type.find( "MPPT RS" ) != -1: reg_addr = b'\x04\x08'
         else: reg_addr = b'\x04\x00'
         response = self._read( 1, reg_addr, 'int' )
@@ -2226,172 +2921,24 @@ class vedirect(object):
         else: return response   
     @disp_backlight_mode.setter
     def disp_backlight_mode( self, value ):
-        device_type = self.model_name
+        device_type = self._model_name()
         if device_type.find( "MPPT RS" ) != -1: reg_addr = b'\x04\x08'
         else: reg_addr = b'\x04\x00'
         value = int( value )
         if value >= 0 and value <= 3:
             value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )        
-
-    @property 
-    def disp_backlight_intensity( self ):
-        reg_addr = b'\x04\x01'
-        response = self._read( 1, reg_addr, 'int' )
-        if self.DESCRIPTIVE:
-            if response == 0: return "ALWAYS OFF"
-            if response == 1: return "ON"
-            return "UNKNOWN INTENSITY SETTING"
-        else: return response 
-    @disp_backlight_intensity.setter
-    def disp_backlight_intensity( self, value ):
-        reg_addr = b'\x04\x01'
-        value = int( value )
-        if value == 0 or value == 1:
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
-
-    @property
-    def disp_scroll_speed( self ):
-        reg_addr = b'\x04\x02'
-        response = self._read( 1, reg_addr, 'int' )
-        if self.DESCRIPTIVE:
-            if response == 1: return "SLOW"
-            if response == 2: return "SLOW MEDIUM"
-            if response == 3: return "MEDIUM"
-            if response == 4: return "MEDIUM FAST"
-            if response == 5: return "FAST"
-            return "UNKNOWN SCROLL SPEED"
-        else: return response 
-    @disp_scroll_speed.setter
-    def disp_scroll_speed( self, value ):
-        reg_addr = b'\x04\x02'
-        value = int( value )
-        if value >= 1 and value <= 5:
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
-
-    @property
-    def disp_setup_lock( self ):
-        reg_addr = b'\x04\x03'
-        response = self._read( 1, reg_addr, 'int' )
-        if self.DESCRIPTIVE:
-            if response == 0: return "UNLOCKED"
-            if response == 1: return "LOCKED"
-            return "UNKNOWN"
-        else: return response
-    @disp_setup_lock.setter
-    def disp_setup_lock( self, value ):
-        reg_addr = b'\x04\x03'
-        value = int( value )
-        if value == 0 or value == 1:
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
-
-    @property 
-    def disp_temp_units( self ):
-        reg_addr = b'\x04\x04'
-        response = self._read( 1, reg_addr, 'int' )
-        if self.DESCRIPTIVE:
-            if response == 0: return "CELSIUS"
-            if response == 1: return "FARENHEIT"
-            return "UNKNOWN"
-        else: return response 
-    @disp_temp_units.setter
-    def disp_temp_units( self, value ):
-        reg_addr = b'\x04\x04'
-        value = int( value )
-        if value == 0 or value == 1:
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
+            self._write( value, 1, reg_addr, 'int' )        
 #-------------------------------------------------------------------------------
 
 #------------------------- Internal Display Functions --------------------------
-    @property 
-    def disp_contrast( self ):
-        reg_addr = b'\x04\x06'
-        response = self._read( 1, reg_addr, 'int' )
-        if self.DESCRIPTIVE:
-            if response == 0: return "0"
-            if response == 1: return "1"
-            if response == 2: return "2"
-            if response == 3: return "3"
-            if response == 4: return "4"
-            if response == 5: return "5"
-            return "UNKNOWN"
-        else: return response 
-    @disp_contrast.setter
-    def disp_contrast( self, value ):
-        reg_addr = b'\x04\x06'
-        value = int( value )
-        if value >= 0 and value <= 5: 
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
+    # All generated from REGISTERS.
 #-------------------------------------------------------------------------------
 
 #-------------------------- Remote Control Functions ---------------------------
-    @property
-    def rm_charge_algorithm( self ):
-        reg_addr = b'\x20\x00'
-        response = self._read( 1, reg_addr, 'int' )
-        return response 
-    @rm_charge_algorithm.setter
-    def rm_charge_algorithm( self, value ):
-        reg_addr = b'\x20\x00'
-        value = int( value )
-        if value >= 0 and value <= 255:
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
-
-    @property
-    def rm_charge_voltage_setpoint( self ):
-        reg_addr = b'\x20\x01'
-        response = self._read( 1, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response
-        if response == -1: return self.ERROR_VAL
-        return response / 100
-    @rm_charge_voltage_setpoint.setter
-    def rm_charge_voltage_setpoint( self, value ):
-        reg_addr = b'\x20\x01'
-        value = int( value * 100 )
-        if value >= 0 and value <= 100000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' ) 
-    
-    @property
-    def rm_battery_voltage_sense( self ):
-        reg_addr = b'\x20\x02'
-        response = self._read( 1, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response == -1: return self.ERROR_VAL
-        return response / 100 
-    @rm_battery_voltage_sense.setter
-    def rm_battery_voltage_sense( self, value ):
-        reg_addr = b'\x20\x02'
-        value = int( value * 100 )
-        if value >= 0 and value <= 100000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' ) 
-
-    @property
-    def rm_battery_temp_sense( self ):
-        reg_addr = b'\x20\x03'
-        response = self._read( 1, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response == int.from_bytes( b'\x7F\xFF', byteorder='big', signed=True ): return self.ERROR_VAL
-        return response / 100 
-    @rm_battery_temp_sense.setter
-    def rm_battery_temp_sense( self, value ):
-        reg_addr = b'\x20\x03'
-        value = int( value * 100 )
-        if value >= -100000 and value <= 100000:
-            value = value.to_bytes( 2, byteorder='little', signed=True )
-            self._write( value, 2, reg_addr, 'int' ) 
-
     @property
     def remote_command( self ):
         # it's write only.
-        print( self._PREFIX + "This property is write only?" )
+        self._logger.warning( "This property is write only?" )
         return self.ERROR_VAL
     @remote_command.setter
     def remote_command( self, value ):
@@ -2401,100 +2948,6 @@ class vedirect(object):
             value = value.to_bytes( 1, signed=False )
             self._write( value, 1, reg_addr, 'int' )
 
-    @property 
-    def rm_charge_state_elapsed_time( self ):
-        reg_addr = b'\x20\x07'
-        response = self._read( 4, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        return response / 1000
-    
-    @property
-    def rm_absorption_time( self ):
-        reg_addr = b'\x20\x08'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        return response / 100
-    @rm_absorption_time.setter
-    def rm_absorption_time( self, value ):
-        reg_addr = b'\x20\x08'
-        value = int( value * 100 )
-        if value >= 0 and value <= 100000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-
-    @property
-    def rm_error_code( self ):
-        reg_addr = b'\x20\x09'
-        response = self._read( 1, reg_addr, 'int' )
-        if self.DESCRIPTIVE:
-            if response == 0: return "0"
-            if response == 1: return "1"
-            if response == 2: return "2"
-            if response == 3: return "3"
-            if response == 4: return "4"
-            if response == 5: return "5"
-            return "UNKNOWN"
-        else: return response 
-
-    @property 
-    def rm_battery_charge_current( self ):
-        reg_addr = b'\x20\x0A'
-        response = self._read( 4, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response == 4294967295: return self.ERROR_VAL
-        return response / 1000
-    @rm_battery_charge_current.setter
-    def rm_battery_charge_current( self, value ):
-        reg_addr = b'\x20\x0A'
-        value = int( value * 1000 )
-        if value >= -1000000 and value <= 10000000:
-            value = value.to_bytes( 4, byteorder='little', signed=True )
-            self._write( value, 4, reg_addr, 'int' )
-
-    @property
-    def rm_battery_idle_voltage( self ):
-        reg_addr = b'\x20\x0B'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        return response / 100 
-    @rm_battery_idle_voltage.setter
-    def rm_battery_idle_voltage( self, value ):
-        reg_addr = b'\x20\x0B'
-        value = int( value * 100 )
-        if value >= 0 and value <= 100000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-
-    @property 
-    def rm_device_state( self ):
-        reg_addr = b'\x20\x0C'
-        response = self._read( 1, reg_addr, 'int' )
-        if self.DESCRIPTIVE:
-            if response == -11: return "WAKE-UP"                #=245
-            if response == -10: return "REPEATED ABSORPTION"    #=246
-            if response == -9: return "AUTO EQUALISE"           #=247
-            if response == -8: return "BATTERY SAFE"            #=248
-            if response == -7: return "LOAD DETECT"             #=249
-            if response == -4: return "EXTERNAL CONTROL"        #=252
-            if response == -1: return "UNAVAILABLE"             #=255
-            if response == 0: return "NOT CHARGING"
-            if response == 2: return "FAULT"
-            if response == 3: return "BULK"
-            if response == 4: return "ABSORPTION"
-            if response == 5: return "FLOAT"
-            if response == 6: return "STORAGE"
-            if response == 7: return "MANUAL EQUALISE"
-            if response == 11: return "POWER SUPPLY"
-            return "UNKNOWN"
-        else: return response 
-    @rm_device_state.setter
-    def rm_device_state( self, value ):
-        reg_addr = b'\x20\x0C'
-        value = int( value )
-        if value >= 0 and value <= 255:
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
-
     @property
     def rm_network_info( self ):
         reg_addr = b'\x20\x0D'
@@ -2562,75 +3015,6 @@ class vedirect(object):
                 else:
                     net_dict[ net_name[i] ] = net_vals[ len_vals - ( i + 3 ) ][-1:]
             return net_dict 
-
-    @property
-    def rm_total_charge_current( self ):
-        reg_addr = b'\x20\x13'
-        response = self._read( 4, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        else: return response / 1000
-    @rm_total_charge_current.setter
-    def rm_total_charge_current( self, value ):
-        reg_addr = b'\x20\x13'
-        value = int( value * 1000 )
-        if value >= -100000000 and value <= 1000000000:
-            value = value.to_bytes( 4, byteorder='little', signed=True )
-            self._write( value, 4, reg_addr, 'int')
-
-    @property 
-    def rm_charge_current_percentage( self ):
-        reg_addr = b'\x20\x14'
-        response = self._read( 4, reg_addr, 'int' )
-        return response 
-    @rm_charge_current_percentage.setter
-    def rm_charge_current_percentage( self, value ):
-        reg_addr = b'\x20\x14'
-        value = int( value )
-        if value >= 0 and value <= 100:
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
-
-    @property
-    def rm_charge_current_limit( self ):
-        reg_addr = b'\x20\x15'
-        response = self._read( 2, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response 
-        if response == -1: return self.ERROR_VAL
-        else: return response / 10
-    @rm_charge_current_limit.setter
-    def rm_charge_current_limit( self, value ):
-        reg_addr = b'\x20\x15'
-        value = int( value * 10 )
-        if value >= 0 and value <= 100000:
-            value = value.to_bytes( 2, byteorder='little', signed=False )
-            self._write( value, 2, reg_addr, 'int' )
-
-    @property
-    def rm_manual_equalisation_pending( self ):
-        reg_addr = b'\x20\x18'
-        response = self._read( 1, reg_addr, 'int' )
-        return response 
-    @rm_manual_equalisation_pending.setter
-    def rm_manual_equalisation_pending( self, value ):
-        reg_addr = b'\x20\x18'
-        value = int( value )
-        if value >= 0 and value <= 255:
-            value = value.to_bytes( 1, signed=False )
-            self._write( value, 1, reg_addr, 'int' )
-
-    @property
-    def rm_total_dc_input_power( self ):
-        reg_addr = b'\x20\x27'
-        response = self._read( 4, reg_addr, 'int' )
-        if response == self.ERROR_VAL: return response
-        else: return response / 100
-    @rm_total_dc_input_power.setter
-    def rm_total_dc_input_power( self, value ):
-        reg_addr = b'\x20\x27'
-        value = int( value * 100 )
-        if value >= 0 and value <= 10000000000:
-            value = value.to_bytes( 4, byteorder='little', signed=False )
-            self._write( value, 4, reg_addr, 'int' )
 #-------------------------------------------------------------------------------
 #===============================================================================
 
@@ -2638,76 +3022,49 @@ class vedirect(object):
 #------------------------------- total_history ---------------------------------
     def total_history( self ):
         reg_addr = b'\x10\x4F'
-        tot_dict = {}
-        tot_name = [ "Reserved 0", "Error Database", "Error 0", 
-                     "Error 1", "Error 2", "Error 3", "User Total Yield", 
-                     "System Total Yield", "Panel Voltage Maximum", 
-                     "Battery Voltage Maximum", "Number of Available Days" ]
-        
-        tot_vals = ""
         tot_vals = self._read( 33, reg_addr, 'b' )
-        
-        pos = 0
-        index = 0
-        if tot_vals[:1] == b'\x00':
-            skip = [1,1,1,1,1,1,4,4,2,2,1]
-            d_places = [0,0,0,0,0,0,2,2,2,2,0]
-            while index < len( skip ): 
-                tot_dict[ tot_name[index] ] = int.from_bytes( tot_vals[pos:(pos+skip[index])], byteorder='little', signed=False ) / ( 10 ** d_places[index] )
-                pos += skip[index]
-                index += 1      
-        elif tot_vals[:1] == b'\x01':
-            tot_name.append( "Battery Voltage Minimum" )
-            for i in range( 13 ): tot_name.append( "Reserved " + str( i + 1 ) )
-            skip = [1,1,1,1,1,1,4,4,2,2,1,2,1,1,1,1,1,1,1,1,1,1,1,1,1]
-            d_places = [0,0,0,0,0,0,2,2,2,2,0,2,0,0,0,0,0,0,0,0,0,0,0,0,0]
-            while index < len( skip ): 
-                tot_dict[ tot_name[index] ] = int.from_bytes( tot_vals[pos:(pos+skip[index])], byteorder='little', signed=False ) / ( 10 ** d_places[index] )
-                pos += skip[index]
-                index += 1
-        else: return self.ERROR_VAL
-
-        return tot_dict
+        if tot_vals == self.ERROR_VAL: return tot_vals
+        layout = _TOTAL_LAYOUTS.get( tot_vals[0] if tot_vals else None )
+        if layout is None: return self.ERROR_VAL
+        return _decode_record( layout, tot_vals )
 #-------------------------------------------------------------------------------
 #-------------------------------- day_record -----------------------------------
     def _day_record( self, reg_addr ):
-        day_dict = {}
-        day_name = [ "Reserved", "Yield", "Consumed", "Battery Voltage Maximum",
-                     "Battery Voltage Minimum", "Error Database", "Error 0", 
-                     "Error 1", "Error 2", "Error 3", "Time Bulk", "Time Absorption",
-                     "Time Float", "Power Maximum", "Battery Current Maximum", 
-                     "Panel Voltage Maximum", "Day Sequence Number" ]
-        skip = [1,4,4,2,2,1,1,1,1,1,2,2,2,4,2,2,2]
-        d_places = [0,2,2,2,2,0,0,0,0,0,0,0,0,0,1,2,0]
-
-        day_vals = ""
         day_vals = self._read( 33, reg_addr, 'b' )
-
-        pos = 0
-        index = 0 
-        while index < len( skip ): 
-            if d_places[index] == 0:
-                day_dict[ day_name[index] ] = int.from_bytes( day_vals[pos:(pos+skip[index])], byteorder='little', signed=False )
-            else:
-                day_dict[ day_name[index] ] = int.from_bytes( day_vals[pos:(pos+skip[index])], byteorder='little', signed=False ) / ( 10 ** d_places[index] )
-            pos += skip[index]
-            index += 1 
-        
-        return day_dict 
+        if day_vals == self.ERROR_VAL: return day_vals
+        return _decode_record( _DAY_LAYOUT, day_vals )
+#-------------------------------------------------------------------------------
+#------------------------------ history_records --------------------------------
+    def _history_records( self, base_reg, data_len ):
+        """ Raw data of every available day record from base_reg on, read 
+            pipelined through read_many, newest first.
+        """
+        totals = self.total_history()
+        if totals == self.ERROR_VAL: return totals
+        base = int.from_bytes( base_reg, byteorder='big', signed=False )
+        addrs = [ ( base + i ).to_bytes( 2, byteorder='big', signed=False ) 
+                  for i in range( int( totals.get( "Number of Available Days" ) ) ) ]
+        responses = self.read_many( [ ( data_len, reg_addr, 'b' ) for reg_addr in addrs ] )
+        records = [ responses[ reg_addr ] for reg_addr in addrs ]
+        if self.ERROR_VAL in records: return self.ERROR_VAL
+        return records
+#-------------------------------------------------------------------------------
+#-------------------------------- history_table --------------------------------
+    def history_table( self, mppt=False ):
+        """ Every available day record decoded in one pass by decode_history,
+            a numpy structured array (list of dicts without numpy), newest 
+            first.
+        """
+        if mppt: records = self._history_records( b'\x10\xA0', 37 )
+        else: records = self._history_records( b'\x10\x50', 33 )
+        if records == self.ERROR_VAL: return records
+        return decode_history( records, mppt )
 #-------------------------------------------------------------------------------
 #------------------------------ get_all_history --------------------------------
     def get_all_history( self ):
-        all_history = []
-        base_reg = int.from_bytes( b'\x10\x50', byteorder='big', signed=False )
-        n_days = int( self.total_history().get( "Number of Available Days" ) )
-        
-        if n_days > 0:
-            for i in range( n_days ):
-                reg_addr = ( base_reg + i ).to_bytes( 2, byteorder='big', signed=False )
-                day_history = self._day_record( reg_addr ) 
-                all_history.append( day_history )
-
-        return all_history
+        records = self._history_records( b'\x10\x50', 33 )
+        if records == self.ERROR_VAL: return records
+        return [ _decode_record( _DAY_LAYOUT, record ) for record in records ]
 #-------------------------------------------------------------------------------
 #------------------------------ get_last_history -------------------------------
     def get_last_history( self ):
@@ -2722,49 +3079,20 @@ class vedirect(object):
             reg_addr = ( base_reg + n_days_ago ).to_bytes( 2, byteorder='big', signed=False )
             return self._day_record( reg_addr )
         else:
-            print( self._PREFIX + "Only " + str( n_days ) + " days of history exists, you requested history for " + str( n_days_ago ) + " days ago?" ) 
+            self._logger.warning( "Only %s days of history exists, you requested history for %s days ago?", n_days, n_days_ago )
             return self.ERROR_VAL
 #-------------------------------------------------------------------------------
 #------------------------------- day_mppt_record -------------------------------
     def _day_mppt_record( self, reg_addr ):
-        day_dict = {}
-        day_name = [ "Reserved 0", "Day Sequence Number", "Energy Tracker 1", 
-                     "Energy Tracker 2", "Energy Tracker 3", "Energy Tracker 4",
-                     "Peak Power Tracker 1", "Peak Power Tracker 2", "Peak Power Tracker 3",
-                     "Peak Power Tracker 4", "Voc Max Tracker 1", "Voc Max Tracker 2",
-                     "Voc Max Tracker 3", "Voc Max Tracker 4" ]
-        for i in range(9): day_name.append( "Reserved " + str( i + 1 ) )
-        skip = [1,2,2,2,2,2,2,2,2,2,2,2,2,2,1]
-        d_places = [0,0,2,2,2,2,0,0,0,0,2,2,2,2,0]
-
-        day_vals = ""
         day_vals = self._read( 37, reg_addr, 'b' )
-
-        pos = 0
-        index = 0 
-        while index < len( skip ): 
-            if d_places[index] == 0:
-                day_dict[ day_name[index] ] = int.from_bytes( day_vals[pos:(pos+skip[index])], byteorder='little', signed=False )
-            else:
-                day_dict[ day_name[index] ] = int.from_bytes( day_vals[pos:(pos+skip[index])], byteorder='little', signed=False ) / ( 10 ** d_places[index] )
-            pos += skip[index]
-            index += 1 
-        
-        return day_dict 
+        if day_vals == self.ERROR_VAL: return day_vals
+        return _decode_record( _MPPT_DAY_LAYOUT, day_vals )
 #-------------------------------------------------------------------------------
 #----------------------------- get_all_mppt_history ----------------------------
     def get_all_mppt_history( self ):
-        all_mppt_history = []
-        base_reg = int.from_bytes( b'\x10\xA0', byteorder='big', signed=False )
-        n_days = int( self.total_history().get( "Number of Available Days" ) )
-        
-        if n_days > 0:
-            for i in range( n_days ):
-                reg_addr = ( base_reg + i ).to_bytes( 2, byteorder='big', signed=False )
-                day_mppt_history = self._day_mppt_record( reg_addr ) 
-                all_mppt_history.append( day_mppt_history )
-
-        return all_mppt_history
+        records = self._history_records( b'\x10\xA0', 37 )
+        if records == self.ERROR_VAL: return records
+        return [ _decode_record( _MPPT_DAY_LAYOUT, record ) for record in records ]
 #-------------------------------------------------------------------------------
 #----------------------------- get_last_mppt_history ---------------------------
     def get_last_mppt_history( self ):
@@ -2779,9 +3107,58 @@ class vedirect(object):
             reg_addr = ( base_reg + n_days_ago ).to_bytes( 2, byteorder='big', signed=False )
             return self._day_mppt_record( reg_addr )
         else:
-            print( self._PREFIX + "Only " + str( n_days ) + " days of mppt history exists, you requested mppt history for " + str( n_days_ago ) + " days ago?" ) 
+            self._logger.warning( "Only %s days of mppt history exists, you requested mppt history for %s days ago?", n_days, n_days_ago )
             return self.ERROR_VAL
 #-------------------------------------------------------------------------------
+#-------------------------------- sync_history ---------------------------------
+    def sync_history( self, state_path, mppt=False ):
+        """ Returns only the day records ( 0x1050+, or 0x10A0+ with mppt=True )
+            completed since the last call, oldest first.  The newest Day 
+            Sequence Number seen is kept per serial number in the JSON file 
+            state_path.  Today's record (day 0) is still changing and is left
+            for a later sync.  A sequence number lower than the stored one 
+            means the history was cleared, everything on the device is new 
+            again.  Days that dropped off the device since the last sync are 
+            reported and skipped.  A failed read leaves the state alone so the 
+            next sync tries again.
+        """
+        key = "mppt_history" if mppt else "history"
+        base_reg = int.from_bytes( b'\x10\xA0' if mppt else b'\x10\x50', byteorder='big', signed=False )
+        record = self._day_mppt_record if mppt else self._day_record
+
+        serial = self._serial_number()
+        totals = self.total_history()
+        if serial == "" or totals == self.ERROR_VAL: return self.ERROR_VAL
+        n_days = int( totals.get( "Number of Available Days" ) )
+
+        state = {}
+        if os.path.exists( state_path ):
+            with open( state_path ) as state_file: state = json.load( state_file )
+        last_seq = state.get( serial, {} ).get( key )
+
+        new_days = []
+        for i in range( 1, n_days ):
+            reg_addr = ( base_reg + i ).to_bytes( 2, byteorder='big', signed=False )
+            day = record( reg_addr )
+            if day == self.ERROR_VAL: return self.ERROR_VAL
+            seq = day.get( "Day Sequence Number" )
+            if i == 1 and last_seq is not None and seq < last_seq:
+                self._logger.warning( "Day Sequence Number went back from %s to %s, history was cleared.", last_seq, seq )
+                last_seq = None
+            if last_seq is not None and seq <= last_seq: break
+            new_days.append( day )
+        
+        if new_days and last_seq is not None:
+            oldest = new_days[-1].get( "Day Sequence Number" )
+            if oldest > last_seq + 1:
+                self._logger.warning( "History gap, days %s to %s are no longer on the device.", last_seq + 1, oldest - 1 )
+
+        if new_days:
+            state.setdefault( serial, {} )[ key ] = new_days[0].get( "Day Sequence Number" )
+            with open( state_path + ".tmp", "w" ) as state_file: json.dump( state, state_file, indent=2 )
+            os.replace( state_path + ".tmp", state_path )
+        return new_days[::-1]
+#-------------------------------------------------------------------------------
 #===============================================================================
 
 #================================ Basic Functions ==============================
@@ -2795,9 +3172,9 @@ class vedirect(object):
     def restart( self ):
         response = self._send_cmd( "6" )
         if response == "RESTART": 
-            print( self._PREFIX + "Succesfully issued restart command." )
+            self._logger.info( "Succesfully issued restart command." )
             time.sleep( 3 )
-        else: print( self._PREFIX + "Failed to send the restart command.")
+        else: self._logger.warning( "Failed to send the restart command." )
 #-------------------------------------------------------------------------------
 #----------------------------- application_version -----------------------------
     def application_version( self ):
@@ -2818,6 +3195,743 @@ class vedirect(object):
         self._write( reg_data, 2, reg_addr, 'int' )
 #-------------------------------------------------------------------------------
 #===============================================================================
+#---------------------------- Register Properties ------------------------------
+def _register_property( name, reg ):
+    """ Builds the accessor property for the REGISTERS entry name."""
+    def getter( self ): return self.read_register( name )
+    def setter( self, value ): self.write_register( name, value )
+    doc = "Register 0x" + reg.addr.hex().upper()
+    if reg.unit: doc += " [" + reg.unit + "]"
+    if reg.writable: return property( getter, setter, doc=doc )
+    return property( getter, doc=doc )
+
+# names of the generated properties, and the snapshot() record type per group.
+_generated_properties = set()
+_SNAPSHOT_RECORDS = {}
+
+for _name, _reg in REGISTERS.items():
+    if not _name.startswith( "_" ) and _name not in vedirect.__dict__:
+        setattr( vedirect, _name, _register_property( _name, _reg ) )
+        _generated_properties.add( _name )
+#-------------------------------------------------------------------------------
+#*******************************************************************************
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<< Fleet Poller >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class VEDirectFleet(object):
+    """ Polls many VE.Direct devices, each on its own port, in parallel.  Every 
+        device gets a session (one open serial handle) and its own worker 
+        thread, so a sweep takes about as long as the slowest device instead 
+        of the sum of all of them.
+
+            with VEDirectFleet( [ "/dev/ttyUSB0", "/dev/ttyUSB1" ] ) as fleet:
+                for port, snap in fleet.poll().items(): print( port, snap["values"] )
+    """
+    PROPERTIES = [ "panel_power", "panel_voltage", "panel_current", "charger_current",
+                   "charger_voltage", "device_state", "charger_error_code", "yield_today" ]
+
+    def __init__( self, ports, properties=None ):
+        self._devices = []
+        for port in ports:
+            if isinstance( port, vedirect ): self._devices.append( port )
+            else: self._devices.append( vedirect( port ) )
+        if properties is None: properties = self.PROPERTIES
+        self._properties = list( properties )
+        self._pool = None
+
+    def __enter__( self ):
+        self.open()
+        return self
+
+    def __exit__( self, exc_type, exc_value, traceback ):
+        self.close()
+        return False
+
+    @property
+    def devices( self ): return( self._devices )
+
+    @property
+    def properties( self ): return( self._properties )
+    @properties.setter
+    def properties( self, value ): self._properties = list( value )
+#-------------------------------------------------------------------------------
+#------------------------------------ open -------------------------------------
+    def open( self ):
+        """ Starts a session on every device, ports that fail to open are 
+            retried on every poll.
+        """
+        if self._pool is None:
+            self._pool = concurrent.futures.ThreadPoolExecutor( max_workers=max( 1, len( self._devices ) ) )
+        for device in self._devices:
+            try: device.open()
+            except: device.logger.error( "Unable to open %s!", device.port )
+        return self
+#-------------------------------------------------------------------------------
+#------------------------------------ close ------------------------------------
+    def close( self ):
+        if self._pool is not None:
+            self._pool.shutdown( wait=True )
+            self._pool = None
+        for device in self._devices: device.close()
+#-------------------------------------------------------------------------------
+#--------------------------------- poll_device ---------------------------------
+    def _poll_device( self, device, properties ):
+        """ Runs on a worker, reads properties from one device."""
+        if not device.session_open:
+            try: device.open()
+            except: pass
+        start = time.time()
+        values = {}
+        for name in properties:
+            try: values[name] = getattr( device, name )
+            except: values[name] = device.ERROR_VAL
+        return { "port": device.port, "timestamp": start, 
+                 "elapsed": time.time() - start, "values": values }
+#-------------------------------------------------------------------------------
+#------------------------------------ poll -------------------------------------
+    def poll( self, properties=None ):
+        """ One sweep over every device.  Returns a dict of port -> snapshot, 
+            a snapshot is a dict with the port, the timestamp the device read
+            started, how long it took and the property values.
+        """
+        if self._pool is None: self.open()
+        if properties is None: properties = self._properties
+        futures = []
+        for device in self._devices:
+            futures.append( ( device, self._pool.submit( self._poll_device, device, properties ) ) )
+
+        snapshots = {}
+        for device, future in futures:
+            try: snapshots[ device.port ] = future.result()
+            except: 
+                values = {}
+                for name in properties: values[name] = device.ERROR_VAL
+                snapshots[ device.port ] = { "port": device.port, "timestamp": time.time(), 
+                                             "elapsed": 0, "values": values }
+        return snapshots
+#-------------------------------------------------------------------------------
+#*******************************************************************************
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<< Poll Scheduler >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class VEDirectScheduler(object):
+    """ Polls the properties of one vedirect device at their own intervals
+        while keeping HEX traffic inside a share of the serial link, which the
+        1 second TEXT heartbeat uses as well:
+
+            with vedirect( "/dev/ttyUSB0" ) as mppt:
+                sched = VEDirectScheduler( mppt )
+                sched.add( "panel_power", 1 )
+                sched.add( "yield_today", 60, priority=1 )
+                sched.add( "battery_absorption_voltage", 3600, priority=2 )
+                for values in sched.run(): print( values )
+
+        store is an optional TelemetryBuffer every tick's values go into.
+
+        Every tick the due properties are taken in priority order (0 first)
+        until the byte budget of the tick is used, then read in one snapshot()
+        pass.  Whatever doesn't fit stays due for a later tick, so on a busy 
+        link the low priority intervals stretch while the high priority ones 
+        keep their rate.
+    """
+    # a GET reply is ':7' + register + flag + check + '\n' plus 2 characters
+    # per data byte, the TEXT heartbeat sends roughly HEARTBEAT_BYTES a second.
+    FRAME_BYTES = 11
+    HEARTBEAT_BYTES = 200
+    # a property overdue by more than MAX_STRETCH intervals jumps the queue,
+    # so low priorities stretch but don't starve (None lets them starve).
+    MAX_STRETCH = 4
+
+    def __init__( self, device, period=1.0, budget=0.5, store=None ):
+        self._device = device
+        self._period = period
+        self._budget = budget
+        self._store = store
+        self._entries = {}
+
+    @property
+    def device( self ): return( self._device )
+
+    @property
+    def period( self ): return( self._period )
+    @period.setter
+    def period( self, value ): self._period = value
+
+    @property
+    def budget( self ): return( self._budget )
+    @budget.setter
+    def budget( self, value ): self._budget = value
+
+    @property
+    def store( self ): return( self._store )
+    @store.setter
+    def store( self, value ): self._store = value
+
+    @property
+    def stats( self ):
+        """ name -> interval, priority, cost [bytes], time of the last read and
+            how late that read was [s].
+        """
+        return { name: dict( entry ) for name, entry in self._entries.items() }
+#-------------------------------------------------------------------------------
+#------------------------------------ add --------------------------------------
+    def add( self, name, interval, priority=0, cost=None ):
+        """ Polls property name every interval seconds, cost is the size of its
+            replies in bytes, see cost() when not given.
+        """
+        if cost is None: cost = self.cost( name )
+        self._entries[ name ] = { "interval": interval, "priority": priority, "cost": cost,
+                                  "due": None, "last": None, "late": 0.0 }
+
+    def remove( self, name ):
+        self._entries.pop( name, None )
+#-------------------------------------------------------------------------------
+#------------------------------------ cost -------------------------------------
+    def cost( self, name ):
+        """ Reply size in bytes of the GETs property name makes, one per 
+            register in _PROPERTY_READS (lighting_timer_events reads 6) or its
+            REGISTERS entry.  ValueError for a property with neither, add() 
+            needs an explicit cost for it.
+        """
+        if name in _PROPERTY_READS: addrs = [ reg_addr for data_len, reg_addr, format in _PROPERTY_READS[ name ] ]
+        elif name in REGISTERS: addrs = [ REGISTERS[ name ].addr ]
+        else: raise ValueError( "reads of %s are unknown, pass its cost to add()" % ( name, ) )
+        return sum( self.FRAME_BYTES + 2 * _REGISTER_LENGTHS[ reg_addr ] for reg_addr in addrs )
+#-------------------------------------------------------------------------------
+#---------------------------------- capacity -----------------------------------
+    def capacity( self ):
+        """ Bytes of HEX replies one tick may use: budget share of the link
+            (8N1, 10 bits a byte) minus the heartbeat.
+        """
+        line = self._device.baudrate / 10 * self._period
+        return max( 0, line * self._budget - self.HEARTBEAT_BYTES * self._period )
+#-------------------------------------------------------------------------------
+#------------------------------------ tick -------------------------------------
+    def tick( self, now=None ):
+        """ Reads the due properties that fit this tick, returns name -> value."""
+        if now is None: now = time.monotonic()
+        for entry in self._entries.values():
+            if entry["due"] is None: entry["due"] = now
+        due = [ name for name, entry in self._entries.items() if entry["due"] <= now ]
+        due.sort( key=lambda name: self._rank( self._entries[name], now ) )
+
+        # the most important due property always goes out, the rest only if
+        # it still fits in the tick.
+        capacity = self.capacity()
+        names = []
+        used = 0
+        for name in due:
+            cost = self._entries[name]["cost"]
+            if names and used + cost > capacity: continue
+            names.append( name )
+            used += cost
+        if not names: return {}
+
+        snap = self._device.snapshot( names )
+        for name in names:
+            entry = self._entries[name]
+            if entry["last"] is not None: entry["late"] = now - entry["due"]
+            entry["last"] = now
+            # keep the phase when on time, a late read restarts the interval.
+            if entry["due"] + entry["interval"] > now: entry["due"] += entry["interval"]
+            else: entry["due"] = now + entry["interval"]
+        values = { name: getattr( snap, name ) for name in names }
+        if self._store is not None: self._store.append( values, snap.timestamp )
+        return values
+#-------------------------------------------------------------------------------
+#------------------------------------ rank -------------------------------------
+    def _rank( self, entry, now ):
+        """ Sort key of a due entry, priority first, then the longest waiting."""
+        if self.MAX_STRETCH is not None and now - entry["due"] > self.MAX_STRETCH * entry["interval"]:
+            return ( -1, entry["due"] )
+        return ( entry["priority"], entry["due"] )
+#-------------------------------------------------------------------------------
+#------------------------------------ run --------------------------------------
+    def run( self, count=None ):
+        """ Generator, runs tick() every period seconds and yields its values
+            (an empty dict when nothing was due).  count limits the ticks.
+        """
+        next_tick = time.monotonic()
+        ticks = 0
+        while count is None or ticks < count:
+            yield self.tick()
+            ticks += 1
+            next_tick += self._period
+            delay = next_tick - time.monotonic()
+            if delay > 0: time.sleep( delay )
+            else: next_tick = time.monotonic()
+#-------------------------------------------------------------------------------
+#*******************************************************************************
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<< Telemetry Buffer >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class TelemetryBuffer(object):
+    """ Keeps the last size samples of a set of numeric properties in memory,
+        one preallocated typed array per field plus a timestamp column, so a 
+        day of 1 second samples of 20 fields takes ~15MB instead of a list 
+        of dicts:
+
+            store = TelemetryBuffer( [ "panel_power", "panel_voltage" ] )
+            store.append( mppt.snapshot( [ "panel_power", "panel_voltage" ] ) )
+            store.mean( "panel_power", 600 )
+
+        Appends overwrite the oldest sample once the buffer is full.  Values
+        that aren't numbers (ERROR_VAL, DESCRIPTIVE strings, dicts) are
+        stored as NaN and skipped by min/max/mean.  Window queries take the
+        last seconds up to the newest sample and work on the columns (numpy
+        views if numpy is installed), no per-sample objects are built.  
+        typecode is 'd' (default) or 'f' for half the memory, empty slots
+        hold NaN so integer arrays can't be used.
+    """
+    def __init__( self, fields, size=86400, typecode='d', error_val=-9999 ):
+        if typecode not in ( 'd', 'f' ): raise ValueError( "typecode must be 'd' or 'f', not %r" % ( typecode, ) )
+        self._fields = list( fields )
+        self._size = size
+        self._error_val = error_val
+        self._time = array.array( 'd', [ NAN ] ) * size
+        self._columns = {}
+        for field in self._fields: self._columns[ field ] = array.array( typecode, [ NAN ] ) * size
+        self._head = 0
+        self._count = 0
+
+    def __len__( self ): return self._count
+
+    @property
+    def fields( self ): return( self._fields )
+
+    @property
+    def size( self ): return( self._size )
+#-------------------------------------------------------------------------------
+#----------------------------------- append ------------------------------------
+    def append( self, values, timestamp=None ):
+        """ Stores one sample, values is a dict or a snapshot() record.  The
+            timestamp defaults to the record's own, else the current time.
+        """
+        if timestamp is None: timestamp = getattr( values, "timestamp", None )
+        if timestamp is None: timestamp = time.time()
+        if hasattr( values, "_asdict" ): values = values._asdict()
+
+        i = self._head
+        self._time[i] = timestamp
+        for field, column in self._columns.items():
+            value = values.get( field )
+            if isinstance( value, ( int, float ) ) and not isinstance( value, bool ) and value != self._error_val:
+                column[i] = value
+            else:
+                column[i] = NAN
+        self._head = ( i + 1 ) % self._size
+        if self._count < self._size: self._count += 1
+#-------------------------------------------------------------------------------
+#----------------------------------- clear -------------------------------------
+    def clear( self ):
+        self._head = 0
+        self._count = 0
+#-------------------------------------------------------------------------------
+#----------------------------------- slices ------------------------------------
+    def _slices( self, seconds=None ):
+        """ Physical ( start, end ) index ranges, oldest first, covering the
+            samples of the last seconds (all samples if None).
+        """
+        if self._count == 0: return []
+        first = ( self._head - self._count ) % self._size
+        count = self._count
+        if seconds is not None:
+            # binary search for the oldest sample inside the window.
+            cutoff = self._time[ ( self._head - 1 ) % self._size ] - seconds
+            lo, hi = 0, self._count
+            while lo < hi:
+                mid = ( lo + hi ) // 2
+                if self._time[ ( first + mid ) % self._size ] < cutoff: lo = mid + 1
+                else: hi = mid
+            first = ( first + lo ) % self._size
+            count = count - lo
+        if count == 0: return []
+        if first + count <= self._size: return [ ( first, first + count ) ]
+        return [ ( first, self._size ), ( 0, first + count - self._size ) ]
+#-------------------------------------------------------------------------------
+#----------------------------------- window ------------------------------------
+    def window( self, seconds=None, fields=None ):
+        """ Samples of the last seconds as typed arrays, oldest first, in a dict
+            of "timestamp" and field -> array.
+        """
+        if fields is None: fields = self._fields
+        parts = self._slices( seconds )
+        return_values = { "timestamp": array.array( 'd' ) }
+        for field in fields: return_values[ field ] = array.array( self._columns[ field ].typecode )
+        for start, end in parts:
+            return_values[ "timestamp" ].extend( self._time[ start:end ] )
+            for field in fields: return_values[ field ].extend( self._columns[ field ][ start:end ] )
+        return return_values
+#-------------------------------------------------------------------------------
+#----------------------------------- latest ------------------------------------
+    def latest( self ):
+        """ Newest sample as a dict, None if the buffer is empty."""
+        if self._count == 0: return None
+        i = ( self._head - 1 ) % self._size
+        return_value = { "timestamp": self._time[i] }
+        for field, column in self._columns.items(): return_value[ field ] = column[i]
+        return return_value
+#-------------------------------------------------------------------------------
+#--------------------------------- aggregate -----------------------------------
+    def _aggregate( self, field, seconds, name ):
+        """ min/max/mean of field over the last seconds, NaN if no sample."""
+        column = self._columns[ field ]
+        parts = self._slices( seconds )
+        if not parts: return NAN
+        if numpy is not None:
+            data = numpy.frombuffer( column, dtype=column.typecode )
+            if len( parts ) == 1: data = data[ parts[0][0]:parts[0][1] ]
+            else: data = numpy.concatenate( [ data[ start:end ] for start, end in parts ] )
+            data = data[ ~numpy.isnan( data ) ]
+            if len( data ) == 0: return NAN
+            return float( getattr( data, name )() )
+
+        data = [ value for start, end in parts for value in column[ start:end ] if value == value ]
+        if not data: return NAN
+        if name == "min": return min( data )
+        if name == "max": return max( data )
+        return sum( data ) / len( data )
+
+    def min( self, field, seconds=None ): return self._aggregate( field, seconds, "min" )
+
+    def max( self, field, seconds=None ): return self._aggregate( field, seconds, "max" )
+
+    def mean( self, field, seconds=None ): return self._aggregate( field, seconds, "mean" )
+#-------------------------------------------------------------------------------
+#*******************************************************************************
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<< Async Client >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class _Pending( Exception ):
+    """ Raised by _ReplayDevice when property code needs a transfer that has
+        not been done yet.  request is a _read argument tuple, a list of them
+        (read_many), ( "SET", ) + _write arguments or a command, key is where
+        the answer goes in the fetched values (a list for read_many).
+    """
+    def __init__( self, request, key ):
+        Exception.__init__( self, request )
+        self.request = request
+        self.key = key
+
+class _ReplayDevice( vedirect ):
+    """ Runs the vedirect property code without touching a port.  _read, 
+        read_many, _write and _send_cmd answer from the transfers AsyncVEDirect
+        already did and raise _Pending for the next one, so writes go out in
+        order, inline.  Reads of a register after a write to it in the same
+        run are keyed apart from the ones before, they are fetched again.
+        Sessions are no-ops, the owner holds the port.
+    """
+    def __init__( self, owner, values ):
+        vedirect.__init__( self, owner.port )
+        self._ERROR_VAL = owner.ERROR_VAL
+        self._DESCRIPTIVE = owner.DESCRIPTIVE
+        self._DEBUG = owner.DEBUG
+        self._logger = owner.logger
+        self._values = values 
+        self._generation = {}       # reg_addr -> writes to it so far this run
+        self._n_writes = 0
+
+    def _key( self, reg_addr, format ): return ( reg_addr, format, self._generation.get( reg_addr, 0 ) )
+
+    def _read( self, data_len, reg_addr, format='int' ):
+        key = self._key( reg_addr, format )
+        try: return self._values[ key ]
+        except KeyError: raise _Pending( ( data_len, reg_addr, format ), key )
+
+    def _write( self, value, data_len, reg_addr, format='int' ):
+        key = ( "SET", self._n_writes, reg_addr, bytes( value ) )
+        if key not in self._values: raise _Pending( ( "SET", value, data_len, reg_addr, format ), key )
+        self._n_writes += 1
+        self._generation[ reg_addr ] = self._generation.get( reg_addr, 0 ) + 1
+        return self._values[ key ]
+
+    def _send_cmd( self, cmd ):
+        try: return self._values[ cmd ]
+        except KeyError: raise _Pending( cmd, cmd )
+
+    def read_many( self, registers, window=8 ):
+        return_values = {}
+        missing = []
+        keys = []
+        for register in registers:
+            if isinstance( register, bytes ): register = ( 4, register, 'int' )
+            data_len, reg_addr, format = register
+            key = self._key( reg_addr, format )
+            if key in self._values: return_values[ reg_addr ] = self._values[ key ]
+            else: 
+                missing.append( register )
+                keys.append( key )
+        if missing: raise _Pending( missing, keys )
+        return return_values
+
+    def open( self ): return self
+
+    def close( self ): pass
+
+class AsyncVEDirect(object):
+    """ asyncio client for VE.Direct HEX with the same register set as vedirect.
+        Every vedirect property is available as an awaitable get_<name>() and,
+        if writeable, set_<name>( value ):
+
+            async with AsyncVEDirect( "/dev/ttyUSB0" ) as mppt:
+                power = await mppt.get_panel_power()
+                await mppt.set_battery_float_voltage( 13.5 )
+
+        The port is opened non-blocking and read from an event loop reader
+        callback (posix only), no thread is used.  Replies are matched to 
+        requests by register address, so several coroutines can share one 
+        device and several devices can share one loop.
+    """
+    def __init__( self, port ):
+        self._port = port
+        self._baudrate = 19200
+        self._timeout = 1
+        self._ERROR_VAL = -9999
+        self._DEBUG = False
+        self._DESCRIPTIVE = False
+        self._PREFIX = "[VE_DIR]: "
+        self._logger = device_logger( port )
+        self._serial_device = None
+        self._loop = None
+        self._rx = _FrameReader()
+        self._waiters = {}
+
+    async def __aenter__( self ):
+        await self.open()
+        return self
+
+    async def __aexit__( self, exc_type, exc_value, traceback ):
+        await self.close()
+        return False
+
+    @property 
+    def port( self ): return( self._port )
+
+    @property
+    def baudrate( self ): return( self._baudrate )
+    @baudrate.setter
+    def baudrate( self, value ): self._baudrate = value 
+
+    @property
+    def timeout( self ): return( self._timeout )
+    @timeout.setter
+    def timeout( self, value ): self._timeout = value
+
+    @property
+    def DEBUG( self ): return( self._DEBUG )
+    @DEBUG.setter
+    def DEBUG( self, value ): self._DEBUG = value 
+
+    @property
+    def DESCRIPTIVE( self ): return( self._DESCRIPTIVE )
+    @DESCRIPTIVE.setter
+    def DESCRIPTIVE( self, value ): self._DESCRIPTIVE = value     
+
+    @property
+    def ERROR_VAL( self ): return( self._ERROR_VAL )
+    @ERROR_VAL.setter
+    def ERROR_VAL( self, value ): self._ERROR_VAL = value 
+
+    @property
+    def PREFIX( self ): return( self._PREFIX )
+
+    @property
+    def logger( self ): return( self._logger )
+#-------------------------------------------------------------------------------
+#------------------------------------ open -------------------------------------
+    async def open( self ):
+        if self._serial_device is not None: return self
+        self._loop = asyncio.get_running_loop()
+        serial_device = open_transport( self.port, self.baudrate, 0 )
+        if not hasattr( serial_device, "fileno" ):
+            serial_device.close()
+            raise ValueError( "%s has no file descriptor to wait on, use the sync vedirect class for it" % ( self.port, ) )
+        self._serial_device = serial_device
+        self._rx.reset()
+        self._loop.add_reader( self._serial_device.fileno(), self._on_readable )
+        return self
+#-------------------------------------------------------------------------------
+#------------------------------------ close ------------------------------------
+    async def close( self ):
+        serial_device = self._serial_device
+        self._serial_device = None
+        if serial_device is None: return
+        try: self._loop.remove_reader( serial_device.fileno() )
+        except: pass
+        try: serial_device.close()
+        except: pass
+        for waiters in self._waiters.values():
+            for waiter in waiters:
+                if not waiter.done(): waiter.cancel()
+        self._waiters = {}
+#-------------------------------------------------------------------------------
+#--------------------------------- on_readable ---------------------------------
+    def _on_readable( self ):
+        """ Event loop callback, hands every complete frame to its waiter."""
+        try:
+            data = self._serial_device.read( max( 1, self._serial_device.in_waiting ) )
+        except:
+            self._logger.error( "Unable to read from %s!", self.port )
+            return
+        self._rx.feed( data )
+        while True:
+            rx_msg = self._rx.frame()
+            if rx_msg is None: break
+            # GET/SET replies are keyed by command and register, others by command.
+            if rx_msg[:2] == b':7' or rx_msg[:2] == b':8': key = rx_msg[:6]
+            else: key = rx_msg[:2]
+            waiters = self._waiters.get( key )
+            while waiters:
+                waiter = waiters.pop( 0 )
+                if not waiter.done():
+                    waiter.set_result( rx_msg )
+                    break
+#-------------------------------------------------------------------------------
+#---------------------------------- transfer -----------------------------------
+    async def _transfer( self, tx_msg, key ):
+        """ Sends tx_msg and waits for the frame keyed by key, resending up to 
+            five times.  Returns None if the device never answers.
+        """
+        if self._serial_device is None: await self.open()
+        n_tries = 5
+        for i in range( n_tries ):
+            waiter = self._loop.create_future()
+            self._waiters.setdefault( key, [] ).append( waiter )
+            self._serial_device.write( tx_msg )
+            try:
+                return await asyncio.wait_for( waiter, self.timeout )
+            except asyncio.TimeoutError:
+                try: self._waiters[key].remove( waiter )
+                except ValueError: pass
+        self._logger.error( "Unable to reach device!" )
+        return None
+#-------------------------------------------------------------------------------
+#------------------------------------ read -------------------------------------
+    async def read( self, data_len, reg_addr, format='int' ):
+        """ Awaitable counterpart of vedirect._read."""
+        codec = _ReplayDevice( self, {} )
+        tx_msg, tx_cmd, tx_reg, tx_flg = codec._get_frame( reg_addr )
+        rx_msg = await self._transfer( tx_msg, tx_cmd + tx_reg )
+        if rx_msg is None: return self.ERROR_VAL
+        return codec._parse_reply( rx_msg, tx_cmd, tx_reg, tx_flg, format )
+#-------------------------------------------------------------------------------
+#------------------------------------ write ------------------------------------
+    async def write( self, value, data_len, reg_addr, format='int' ):
+        """ Awaitable counterpart of vedirect._write."""
+        codec = _ReplayDevice( self, {} )
+        tx_msg, tx_cmd, tx_reg, tx_flg = codec._set_frame( value, reg_addr )
+        rx_msg = await self._transfer( tx_msg, tx_cmd + tx_reg )
+        if rx_msg is None: return self.ERROR_VAL
+        return codec._parse_echo( rx_msg, tx_msg, format )
+#-------------------------------------------------------------------------------
+#---------------------------------- send_cmd -----------------------------------
+    async def send_cmd( self, cmd ):
+        """ Awaitable counterpart of vedirect._send_cmd."""
+        codec = _ReplayDevice( self, {} )
+        tx_msg = codec._cmd_frame( cmd )
+        if cmd == "6":
+            if self._serial_device is None: await self.open()
+            self._serial_device.write( tx_msg )
+            return "RESTART"
+        # ping answers with ":5", the other commands with ":1".
+        if cmd == "1": key = b':5'
+        else: key = b':1'
+        rx_msg = await self._transfer( tx_msg, key )
+        if rx_msg is None: return self.ERROR_VAL
+        return codec._parse_cmd_reply( rx_msg )
+#-------------------------------------------------------------------------------
+#---------------------------------- read_many ----------------------------------
+    async def read_many( self, registers, window=8 ):
+        """ Awaitable counterpart of vedirect.read_many, up to window GETs are 
+            in flight at a time.
+        """
+        requests = [ ( 4, register, 'int' ) if isinstance( register, bytes ) else register for register in registers ]
+        return_values = {}
+        for i in range( 0, len( requests ), window ):
+            batch = requests[ i:i + window ]
+            responses = await asyncio.gather( *( self.read( *request ) for request in batch ) )
+            for request, response in zip( batch, responses ): return_values[ request[1] ] = response
+        return return_values
+#-------------------------------------------------------------------------------
+#------------------------------------ fetch ------------------------------------
+    async def _fetch( self, values, pending ):
+        """ Does the transfer a _Pending asked for and stores the answer in 
+            values, a list of registers is read as one batch.
+        """
+        request, key = pending.request, pending.key
+        if isinstance( request, str ): values[ key ] = await self.send_cmd( request )
+        elif isinstance( request, list ):
+            responses = await self.read_many( request )
+            for ( data_len, reg_addr, format ), register_key in zip( request, key ): values[ register_key ] = responses[ reg_addr ]
+        elif request[0] == "SET": values[ key ] = await self.write( *request[1:] )
+        else: values[ key ] = await self.read( *request )
+#-------------------------------------------------------------------------------
+#------------------------------------ call -------------------------------------
+    async def call( self, name, *args ):
+        """ Runs any vedirect property getter or method, e.g. "get_all_history",
+            doing each transfer it asks for from the event loop.  The code is
+            replayed with the answers so far until it completes.
+        """
+        values = {}
+        while True:
+            device = _ReplayDevice( self, values )
+            try:
+                attr = getattr( vedirect, name )
+                if isinstance( attr, property ): return_value = attr.fget( device )
+                else: return_value = attr( device, *args )
+                break
+            except _Pending as pending:
+                await self._fetch( values, pending )
+        return return_value 
+#-------------------------------------------------------------------------------
+#------------------------------------ set --------------------------------------
+    async def set( self, name, value ):
+        """ Runs a vedirect property setter, its reads and writes are done in
+            order from the event loop.
+        """
+        values = {}
+        while True:
+            device = _ReplayDevice( self, values )
+            try:
+                getattr( vedirect, name ).fset( device, value )
+                break
+            except _Pending as pending:
+                await self._fetch( values, pending )
+#-------------------------------------------------------------------------------
+#------------------------------------ get --------------------------------------
+    async def get( self, name ):
+        return await self.call( name )
+#-------------------------------------------------------------------------------
+#---------------------------------- commands -----------------------------------
+    async def ping( self ):
+        return await self.call( "ping" )
+
+    async def application_version( self ):
+        return await self.call( "application_version" )
+#-------------------------------------------------------------------------------
+
+#---------------------------- Generated Accessors ------------------------------
+# vedirect settings and per instance state that aren't device registers, on
+# the throwaway _ReplayDevice they would be lost.
+_ASYNC_SKIP = [ "port", "address", "baudrate", "timeout", "DEBUG", "DESCRIPTIVE",
+                "ERROR_VAL", "PREFIX", "session_open", "readall", "snapshot_groups",
+                "keepalive", "cache_ttl", "METRICS", "metrics", "logger", "identity" ]
+
+def _async_getter( name ):
+    async def getter( self ): return await self.call( name )
+    getter.__name__ = "get_" + name
+    getter.__doc__ = "Awaitable vedirect." + name
+    return getter
+
+def _async_setter( name ):
+    async def setter( self, value ): return await self.set( name, value )
+    setter.__name__ = "set_" + name
+    setter.__doc__ = "Awaitable vedirect." + name + " = value"
+    return setter
+
+for _name, _attr in list( vedirect.__dict__.items() ):
+    if isinstance( _attr, property ) and _name not in _ASYNC_SKIP:
+        setattr( AsyncVEDirect, "get_" + _name, _async_getter( _name ) )
+        if _attr.fset is not None: 
+            setattr( AsyncVEDirect, "set_" + _name, _async_setter( _name ) )
+#-------------------------------------------------------------------------------
+#*******************************************************************************
 
 # Tester Function for direct call
 if __name__ == '__main__':
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+#******************************** Dependencies *********************************
+import argparse
+import json
+import platform
+import sys
+import time
+try:
+    from .vedirct import vedirect, SNAPSHOT_GROUPS
+    from .vedirct_sim import VEDirectSim
+except ImportError:
+    from vedirct import vedirect, SNAPSHOT_GROUPS
+    from vedirct_sim import VEDirectSim
+#*******************************************************************************
+#==================================== Intro ====================================
+    # Aaron Kehl
+    # USACE - ERDC - CRREL
+    # Summer 2024
+    #
+    # Throughput and latency benchmark for the vedirect class.  Runs against
+    # the simulator (vedirct_sim.py) unless a port is given and prints the
+    # results as JSON, so runs can be compared before/after I/O changes:
+    #
+    #   python3 vedirct_bench.py --output before.json
+    #   python3 vedirct_bench.py --port /dev/ttyUSB0 --count 50
+#-------------------------------------------------------------------------------
+#----------------------------------- License -----------------------------------
+    # Copyright 2024 Aaron Kehl
+    #
+    # Permission is hereby granted, free of charge, to any person obtaining a
+    # copy of this software and associated documentation files (the “Software”),
+    # to deal in the Software without restriction, including without limitation
+    # the rights to use, copy, modify, merge, publish, distribute, sublicense,
+    # and/or sell copies of the Software, and to permit persons to whom the
+    # Software is furnished to do so, subject to the following conditions:
+    #
+    # The above copyright notice and this permission notice shall be
+    # included in all copies or substantial portions of the Software.
+    #
+    # THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+    # EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+    # MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+    # IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+    # CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+    # TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+    # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#-------------------------------------------------------------------------------
+#===============================================================================
+
+#=================================== Globals ===================================
+#---------------------------------- Constants ----------------------------------
+# vedirect methods whose time per call is reported, every transfer goes
+# through one of them.
+LAYERS = [ "_read", "_write", "_send_cmd", "read_many" ]
+
+# register used for the single read latency and the setter round trips.
+READ_PROPERTY = "panel_power"
+WRITE_PROPERTY = "battery_absorption_voltage"
+#-------------------------------------------------------------------------------
+#===============================================================================
+
+#================================== Functions ==================================
+#----------------------------------- stats -------------------------------------
+def stats( samples ):
+    """ count, mean and nearest rank percentiles of samples (seconds) in ms."""
+    if not samples: return { "count": 0 }
+    ordered = sorted( samples )
+    def percentile( p ): return ordered[ min( len( ordered ) - 1, int( p / 100 * len( ordered ) ) ) ] * 1000
+    return { "count": len( ordered ), "mean_ms": sum( ordered ) / len( ordered ) * 1000,
+             "min_ms": ordered[0] * 1000, "p50_ms": percentile( 50 ), "p90_ms": percentile( 90 ),
+             "p99_ms": percentile( 99 ), "max_ms": ordered[-1] * 1000 }
+#-------------------------------------------------------------------------------
+#---------------------------------- timed --------------------------------------
+def timed( device, name, samples ):
+    """ Wraps the method name of device so every call's duration lands in samples."""
+    method = getattr( device, name )
+    def wrapper( *args, **kwargs ):
+        start = time.perf_counter()
+        try: return method( *args, **kwargs )
+        finally: samples.append( time.perf_counter() - start )
+    setattr( device, name, wrapper )
+#-------------------------------------------------------------------------------
+#----------------------------------- clock -------------------------------------
+def clock( function, count ):
+    """ Calls function count times, returns the durations and the results."""
+    samples = []
+    results = []
+    for i in range( count ):
+        start = time.perf_counter()
+        results.append( function() )
+        samples.append( time.perf_counter() - start )
+    return samples, results
+#-------------------------------------------------------------------------------
+#------------------------------------ run --------------------------------------
+def run( port, count=100, session=True ):
+    """ Runs every benchmark against port, returns the results dict."""
+    device = vedirect( port )
+    # every read goes to the device, the cache would only measure itself.
+    device.cache_ttl = { "static": 0, "setting": 0, "telemetry": 0 }
+    layers = { name: [] for name in LAYERS }
+    for name in LAYERS: timed( device, name, layers[ name ] )
+    telemetry = SNAPSHOT_GROUPS[ "telemetry" ]
+    results = {}
+
+    if session: device.__enter__()
+    try:
+        device.identity  # model and capabilities are resolved once per session
+        for samples in layers.values(): del samples[:]
+
+        samples, values = clock( lambda: device.get( READ_PROPERTY, max_age=0 ), count )
+        results[ "single_read" ] = dict( stats( samples ), errors=values.count( device.ERROR_VAL ) )
+
+        samples, values = clock( device.ping, count )
+        results[ "ping" ] = dict( stats( samples ), errors=values.count( device.ERROR_VAL ) )
+
+        sweeps = max( 1, count // 10 )
+        samples, values = clock( lambda: [ device.get( name, max_age=0 ) for name in telemetry ], sweeps )
+        results[ "telemetry_sweep_serial" ] = dict( stats( samples ), registers=len( telemetry ),
+                                                    registers_per_s=len( telemetry ) * len( samples ) / sum( samples ) )
+        samples, values = clock( lambda: device.snapshot( "telemetry" ), sweeps )
+        results[ "telemetry_sweep_snapshot" ] = dict( stats( samples ), registers=len( telemetry ),
+                                                      registers_per_s=len( telemetry ) * len( samples ) / sum( samples ) )
+
+        # writes the current value back, safe to run against a real controller.
+        value = device.get( WRITE_PROPERTY, max_age=0 )
+        samples, values = clock( lambda: device.write_register( WRITE_PROPERTY, value ), count )
+        results[ "setter_round_trip" ] = dict( stats( samples ), errors=values.count( device.ERROR_VAL ) )
+
+        samples, values = clock( device.get_all_history, 1 )
+        days = values[0] if values[0] != device.ERROR_VAL else []
+        results[ "history_download" ] = { "seconds": samples[0], "days": len( days ),
+                                          "days_per_s": len( days ) / samples[0] }
+    finally:
+        if session: device.__exit__( None, None, None )
+
+    results[ "layers" ] = { name: stats( samples ) for name, samples in layers.items() }
+    return results
+#-------------------------------------------------------------------------------
+#===============================================================================
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<< Tester >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser( description="vedirect throughput and latency benchmark, JSON output." )
+    parser.add_argument( "--port", help="serial port or transport URL of a real device, default is a simulator on a pty" )
+    parser.add_argument( "--model", default="mppt", help="simulated model (mppt or rs)" )
+    parser.add_argument( "--baudrate", type=int, default=19200, help="simulator line speed, 0 for unpaced" )
+    parser.add_argument( "--latency", type=float, default=0.0, help="simulator reply delay in seconds" )
+    parser.add_argument( "--no-heartbeat", action="store_true", help="simulator without the TEXT heartbeat" )
+    parser.add_argument( "--no-session", action="store_true", help="open and close the port per transfer" )
+    parser.add_argument( "--count", type=int, default=100, help="samples per latency benchmark" )
+    parser.add_argument( "--output", help="write the JSON here instead of stdout" )
+    args = parser.parse_args()
+
+    sim = None
+    port = args.port
+    if port is None:
+        sim = VEDirectSim( args.model, args.baudrate or None, None if args.no_heartbeat else 1.0, args.latency )
+        port = sim.start()
+    try: results = run( port, args.count, not args.no_session )
+    finally:
+        if sim is not None: sim.stop()
+
+    report = { "config": { "port": args.port or "simulator", "model": args.model if sim else None,
+                           "baudrate": args.baudrate if sim else None, "heartbeat": not args.no_heartbeat if sim else None,
+                           "latency": args.latency if sim else None,
+                           "session": not args.no_session, "count": args.count,
+                           "python": platform.python_version(), "platform": platform.platform(),
+                           "time": time.strftime( "%Y-%m-%dT%H:%M:%S%z" ) },
+               "results": results }
+    if args.output:
+        with open( args.output, "w" ) as output_file: json.dump( report, output_file, indent=2 )
+    else:
+        json.dump( report, sys.stdout, indent=2 )
+        print()
+#*******************************************************************************
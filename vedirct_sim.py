@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+#******************************** Dependencies *********************************
+import argparse
+import math
+import os
+import pty
+import select
+import threading
+import time
+import tty
+try: from .vedirct import REGISTERS, encode_frame, decode_frame, _TOTAL_LAYOUTS, _DAY_LAYOUT, _MPPT_DAY_LAYOUT
+except ImportError: from vedirct import REGISTERS, encode_frame, decode_frame, _TOTAL_LAYOUTS, _DAY_LAYOUT, _MPPT_DAY_LAYOUT
+#*******************************************************************************
+#==================================== Intro ====================================
+    # Aaron Kehl
+    # USACE - ERDC - CRREL
+    # Summer 2024
+    #
+    # VE.Direct device simulator, a pseudo terminal that answers HEX frames and
+    # sends the TEXT heartbeat like a victron solar charge controller, so the
+    # vedirect class can be run and measured without hardware:
+    #
+    #   python3 vedirct_sim.py --model rs
+    #   [VE_SIM]: Simulating SmartSolar MPPT RS 450|100 on /dev/pts/3
+    #
+    #   mppt = vedirect( '/dev/pts/3' )
+#-------------------------------------------------------------------------------
+#----------------------------------- License -----------------------------------
+    # Copyright 2024 Aaron Kehl
+    #
+    # Permission is hereby granted, free of charge, to any person obtaining a
+    # copy of this software and associated documentation files (the “Software”),
+    # to deal in the Software without restriction, including without limitation
+    # the rights to use, copy, modify, merge, publish, distribute, sublicense,
+    # and/or sell copies of the Software, and to permit persons to whom the
+    # Software is furnished to do so, subject to the following conditions:
+    #
+    # The above copyright notice and this permission notice shall be
+    # included in all copies or substantial portions of the Software.
+    #
+    # THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+    # EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+    # MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+    # IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+    # CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+    # TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+    # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#-------------------------------------------------------------------------------
+#===============================================================================
+
+#=================================== Globals ===================================
+#---------------------------------- Constants ----------------------------------
+# History Support, Batterysafe, Adaptive, Manual and Automatic Equalise, 
+# Remote On/Off, Panel Current, BMS and External Control.
+CAPABILITY_BITS = [ 2, 3, 4, 5, 6, 8, 13, 14, 15 ]
+
+# model -> identity of the simulated device, capabilities adds the model's own
+# bits to CAPABILITY_BITS: the 100|20 has a load output with street lighting,
+# Tx/Rx pin functions and AES, the RS an alarm relay.
+MODELS = { "mppt": { "model_name": "SmartSolar MPPT 100|20", "pid": 0xA060, "serial_number": "HQ2137ABCDE",
+                     "trackers": 1, "capabilities": [ 0, 9, 10, 18, 25 ] },
+           "rs":   { "model_name": "SmartSolar MPPT RS 450|100", "pid": 0xA115, "serial_number": "HQ2245RSXYZ",
+                     "trackers": 2, "capabilities": [ 17 ] } }
+
+# Starting values of the REGISTERS entries in engineering units, entries not
+# listed start at 0.
+VALUES = { "group_id": 1, "device_mode": 1, "device_state": 3, "remote_control": 1,
+           "batterysafe_mode": 1, "adaptive_mode": 1, "battery_bulk_time_limit": 6.0,
+           "battery_absorption_time_limit": 6.0, "battery_absorption_voltage": 14.4,
+           "battery_float_voltage": 13.8, "battery_equalisation_voltage": 16.2,
+           "battery_temp_comp": -16.2, "battery_type": 1, "battery_max_curr": 20.0,
+           "battery_system_voltage": 12, "battery_temp": 65535, "battery_voltage_setting": 12,
+           "battery_tail_current": 1.0, "battery_low_temp_charge_curr": 65535,
+           "battery_equalisation_current_level": 8, "battery_equalisation_duration": 1.0,
+           "battery_rebulk_voltage_offset": 0.4, "battery_low_temp_level": 5.0,
+           "charger_max_curr": 20.0, "system_yield": 1234.56, "user_yield": 987.65,
+           "charger_internal_temp": 31.5, "charger_current": 9.2, "charger_voltage": 13.25,
+           "yield_today": 0.85, "max_power_today": 212, "yield_yesterday": 1.12,
+           "max_power_yesterday": 248, "voltage_settings_range": 0x1812, "history_version": 1,
+           "adjustable_voltage_min": 8.0, "adjustable_voltage_max": 17.65,
+           "dc_battery_voltage": 13.25, "dc_battery_current": 9.2, "dc_battery_ripple_voltage": 0.02,
+           "panel_maximum_current": 20.0, "panel_power": 123.45, "panel_voltage": 36.5,
+           "panel_current": 3.4, "panel_max_allowed_voltage": 100.0, "tracker_mode": 2,
+           "panel_start_volt": 120.0, "panel_input_resistance": 1000000, "load_current": 0.3,
+           "load_offset_voltage": 0.1, "load_output_control": 4, "load_output_voltage": 13.25,
+           "load_output_state": 1, "load_switch_high_level": 13.1, "load_switch_low_level": 11.1,
+           "relay_battery_low_voltage_set": 11.0, "relay_battery_low_voltage_clear": 12.0,
+           "relay_battery_high_voltage_set": 15.0, "relay_battery_high_voltage_clear": 14.5,
+           "relay_panel_high_voltage_set": 95.0, "relay_panel_high_voltage_clear": 90.0,
+           "lighting_panel_voltage_night": 11.0, "lighting_panel_voltage_day": 12.0,
+           "lighting_time_of_day": 65535, "disp_backlight_intensity": 1, "disp_contrast": 3, "disp_scroll_speed": 3,
+           "rm_charge_algorithm": 1, "rm_charge_voltage_setpoint": 14.4, "rm_battery_voltage_sense": 65535,
+           "rm_battery_temp_sense": 32767, "rm_charge_state_elapsed_time": 3600.0, "rm_absorption_time": 6.0,
+           "rm_battery_charge_current": 9.2, "rm_battery_idle_voltage": 13.0, "rm_device_state": 3,
+           "rm_total_charge_current": 9.2, "rm_charge_current_percentage": 100, "rm_charge_current_limit": 65535,
+           "rm_total_dc_input_power": 123.45 }
+
+# registers read as 'str' by vedirect
+STRING_REGS = ( 0x010A, )
+
+# per tracker multitrack registers ( panel power, voltage, current, mode ), tracker n adds 0x10 * n.
+TRACKER_REGS = ( 0xECCC, 0xECCB, 0xECCD, 0xECC3 )
+#-------------------------------------------------------------------------------
+#===============================================================================
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<< Simulator >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class VEDirectSim(object):
+    """ Opens a pseudo terminal pair and plays a VE.Direct device on it, the
+        vedirect class talks to the slave side (port) unchanged:
+
+            with VEDirectSim( "rs" ) as sim:
+                mppt = vedirect( sim.port )
+                print( mppt.panel_power )
+
+        HEX GET/SET/ping/version/product id frames are answered from an in
+        memory register map (regs, reg_addr -> little endian data bytes) seeded
+        from REGISTERS and VALUES, including history records.  The TEXT
+        heartbeat goes out every heartbeat seconds (None to disable) and
+        telemetry drifts a little between blocks.  Output is paced to
+        baudrate (None for as fast as possible), output nobody reads is
+        dropped like on a real UART.  With collide set, frames that come in
+        while a TEXT block goes out are lost (counted in dropped), the
+        collisions a real device has.  Blocks are skipped for HEX_PAUSE
+        seconds after a HEX frame.
+    """
+    _PREFIX = "[VE_SIM]: "
+    HISTORY_DAYS = 31
+    HEX_PAUSE = 2.0
+    CHUNK = 16
+
+    def __init__( self, model="mppt", baudrate=19200, heartbeat=1.0, latency=0.0, collide=True ):
+        self.model = model
+        self.baudrate = baudrate
+        self.heartbeat = heartbeat
+        self.latency = latency
+        self.collide = collide
+        self.frames = 0
+        self.dropped = 0
+        self._last_hex = 0.0
+        self.regs = {}
+        self._identity = MODELS[ model ]
+        self._lock = threading.Lock()
+        self._text = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._master = None
+        self._slave = None
+        self._seed()
+
+    @property
+    def port( self ):
+        if self._slave is None: return None
+        return os.ttyname( self._slave )
+
+    def __enter__( self ):
+        self.start()
+        return self
+
+    def __exit__( self, exc_type, exc_value, traceback ): self.stop()
+#-------------------------------------------------------------------------------
+#------------------------------------ start ------------------------------------
+    def start( self ):
+        """ Opens the pty pair and starts answering, returns the slave port."""
+        self._master, self._slave = pty.openpty()
+        tty.setraw( self._slave )
+        # the slave stays open here as well, so the vedirect class can open and
+        # close its side per request without the master seeing a hang up.
+        os.set_blocking( self._master, False )
+        self._stop.clear()
+        self._threads = [ threading.Thread( target=self._serve, daemon=True ) ]
+        if self.heartbeat: self._threads.append( threading.Thread( target=self._beat, daemon=True ) )
+        for thread in self._threads: thread.start()
+        return self.port
+#-------------------------------------------------------------------------------
+#------------------------------------ stop -------------------------------------
+    def stop( self ):
+        self._stop.set()
+        for thread in self._threads: thread.join()
+        self._threads = []
+        for fd in ( self._master, self._slave ):
+            if fd is not None: os.close( fd )
+        self._master = self._slave = None
+#-------------------------------------------------------------------------------
+#--------------------------------- set_value -----------------------------------
+    def set_value( self, name, value ):
+        """ Stores value (engineering units) in the REGISTERS entry name."""
+        reg = REGISTERS[ name ]
+        raw = int( round( value * reg.scale ) ) if value != reg.na else value
+        self.regs[ int.from_bytes( reg.addr, byteorder='big' ) ] = raw.to_bytes( reg.length, byteorder='little', signed=reg.signed )
+
+    def get_value( self, name ):
+        """ Value (engineering units) of the REGISTERS entry name."""
+        reg = REGISTERS[ name ]
+        raw = int.from_bytes( self.regs[ int.from_bytes( reg.addr, byteorder='big' ) ], byteorder='little', signed=reg.signed )
+        return raw / reg.scale
+#-------------------------------------------------------------------------------
+#------------------------------------ seed -------------------------------------
+    def _seed( self ):
+        """ Fills the register map for the model."""
+        for name, reg in REGISTERS.items():
+            if reg.length > 4: continue
+            self.set_value( name, VALUES.get( name, 0 ) )
+        self.regs[ 0x0100 ] = b'\x00' + self._identity["pid"].to_bytes( 2, byteorder='little' ) + b'\xFF'
+        self.regs[ 0x010A ] = self._identity["serial_number"].encode( 'utf-8' )
+        self.regs[ 0x010B ] = self._identity["model_name"].encode( 'utf-8' )
+        capabilities = sum( 1 << bit for bit in CAPABILITY_BITS + self._identity["capabilities"] )
+        self.regs[ 0x0140 ] = capabilities.to_bytes( 4, byteorder='little' )
+        self.set_value( "num_mppt_tracker", self._identity["trackers"] )
+        for n in range( self._identity["trackers"] ):
+            values = ( int( 123.45 / self._identity["trackers"] * 100 ), 3650, 34, 2 )
+            lengths = ( 4, 2, 2, 1 )
+            for reg_addr, value, length in zip( TRACKER_REGS, values, lengths ):
+                self.regs[ reg_addr + 0x10 * n ] = value.to_bytes( length, byteorder='little' )
+        self._seed_history( 200, self.HISTORY_DAYS )
+#-------------------------------------------------------------------------------
+#-------------------------------- seed_history ---------------------------------
+    def _seed_history( self, newest_seq, n_days ):
+        """ Totals record plus n_days day (and MPPT RS tracker) records, day 0
+            (today) carries Day Sequence Number newest_seq.
+        """
+        for reg_addr in list( self.regs ):
+            if 0x1050 <= reg_addr < 0x1050 + self.HISTORY_DAYS or 0x10A0 <= reg_addr < 0x10A0 + self.HISTORY_DAYS:
+                del self.regs[ reg_addr ]
+        self.regs[ 0x104F ] = self._pack( _TOTAL_LAYOUTS[0], { "User Total Yield": self.get_value( "user_yield" ),
+                                                               "System Total Yield": self.get_value( "system_yield" ),
+                                                               "Panel Voltage Maximum": 48.2, "Battery Voltage Maximum": 14.52,
+                                                               "Number of Available Days": n_days } )
+        for i in range( n_days ):
+            sun = 0.6 + 0.4 * math.cos( i / 5 )
+            self.regs[ 0x1050 + i ] = self._pack( _DAY_LAYOUT, {
+                "Yield": round( 1.2 * sun, 2 ), "Consumed": 0.15, "Battery Voltage Maximum": 14.41,
+                "Battery Voltage Minimum": 12.38, "Time Bulk": int( 240 * sun ), "Time Absorption": 120,
+                "Time Float": 180, "Power Maximum": int( 250 * sun ), "Battery Current Maximum": round( 18 * sun, 1 ),
+                "Panel Voltage Maximum": 45.3, "Day Sequence Number": max( newest_seq - i, 0 ) } )
+            if self.model == "rs":
+                self.regs[ 0x10A0 + i ] = self._pack( _MPPT_DAY_LAYOUT, {
+                    "Day Sequence Number": max( newest_seq - i, 0 ), "Energy Tracker 1": round( 6 * sun, 2 ),
+                    "Energy Tracker 2": round( 5 * sun, 2 ), "Peak Power Tracker 1": int( 1400 * sun ),
+                    "Peak Power Tracker 2": int( 1200 * sun ), "Voc Max Tracker 1": 410.5, "Voc Max Tracker 2": 402.7 } )
+
+    def _pack( self, layout, values ):
+        raw = [ int( round( values.get( name, 0 ) * ( scale or 1 ) ) ) for name, scale in zip( layout.names, layout.scales ) ]
+        return layout.struct.pack( *raw )
+#-------------------------------------------------------------------------------
+#------------------------------------ send -------------------------------------
+    def _send( self, data, text=False ):
+        """ Writes data to the master side at line speed, whatever the pty
+            can't take (nobody reading) is dropped.
+        """
+        with self._lock:
+            if text: self._text.set()
+            try:
+                # a few bytes at a time, the way they trickle out of a UART.
+                for i in range( 0, len( data ), self.CHUNK ):
+                    chunk = data[i:i + self.CHUNK]
+                    try: os.write( self._master, chunk )
+                    except ( BlockingIOError, OSError ): pass
+                    if self.baudrate: time.sleep( len( chunk ) * 10 / self.baudrate )
+            finally: self._text.clear()
+#-------------------------------------------------------------------------------
+#------------------------------------ serve ------------------------------------
+    def _serve( self ):
+        """ Reads HEX frames from the master side and answers them."""
+        buffer = b''
+        while not self._stop.is_set():
+            ready, _, _ = select.select( [ self._master ], [], [], 0.1 )
+            if not ready: continue
+            try: buffer += os.read( self._master, 1024 )
+            except ( BlockingIOError, OSError ): continue
+            while b'\n' in buffer:
+                line, buffer = buffer.split( b'\n', 1 )
+                start = line.find( b':' )
+                if start == -1: continue
+                if self.collide and self._text.is_set():
+                    self.dropped += 1
+                    continue
+                reply = self._answer( line[start:] )
+                if reply is not None:
+                    if self.latency: time.sleep( self.latency )
+                    self._send( reply )
+            # keep only the tail of a frame still coming in
+            if len( buffer ) > 1024: buffer = buffer[-1024:]
+
+    def _answer( self, frame ):
+        """ Reply frame to a request frame, None for no reply."""
+        decoded = decode_frame( frame )
+        self._last_hex = time.monotonic()
+        if decoded is None: return encode_frame( 4, b'\xAA\xAA' )    # framing error
+        self.frames += 1
+        command, data = decoded
+
+        if command == 1: return encode_frame( 5, ( 0x4161 ).to_bytes( 2, byteorder='little' ) )     # ping
+        if command == 3: return encode_frame( 1, ( 0x4161 ).to_bytes( 2, byteorder='little' ) )     # app version
+        if command == 4: return encode_frame( 1, self._identity["pid"].to_bytes( 2, byteorder='little' ) )
+        if command == 6: return None                                                               # restart
+        if command not in ( 7, 8 ) or len( data ) < 3: return encode_frame( 3, bytes( [ command ] ) )
+
+        reg_addr = int.from_bytes( data[:2], byteorder='little' )
+        if command == 7:
+            if reg_addr not in self.regs: return encode_frame( 7, data[:2] + b'\x01' )
+            if reg_addr in STRING_REGS:
+                # string registers are checked over ( byte - 0x30 ), as vedirect expects
+                value = self.regs[ reg_addr ]
+                check = ( 0x55 - 7 - sum( data[:3] ) - sum( ( c - 0x30 ) & 0xFF for c in value ) ) & 0xFF
+                return b':7%s%02X\n' % ( ( data[:3] + value ).hex().upper().encode(), check )
+            return encode_frame( 7, data[:3] + self.regs[ reg_addr ] )
+
+        # SET, the device echoes the frame back
+        if reg_addr == 0x1030: self._seed_history( 0, 1 )        # clear history
+        elif reg_addr == 0x0004: pass                            # restore default
+        elif reg_addr in self.regs: self.regs[ reg_addr ] = data[3:]
+        else: return encode_frame( 8, data[:2] + b'\x01' )
+        return encode_frame( 8, data )
+#-------------------------------------------------------------------------------
+#------------------------------------ beat -------------------------------------
+    def _beat( self ):
+        """ Sends the TEXT block every heartbeat seconds, telemetry drifts."""
+        start = time.monotonic()
+        while not self._stop.wait( self.heartbeat ):
+            sun = 1 + 0.1 * math.sin( ( time.monotonic() - start ) / 30 )
+            with self._lock:
+                self.set_value( "panel_power", round( VALUES["panel_power"] * sun, 2 ) )
+                self.set_value( "panel_voltage", round( VALUES["panel_voltage"] * ( 0.98 + 0.02 * sun ), 2 ) )
+                self.set_value( "charger_current", round( VALUES["charger_current"] * sun, 1 ) )
+                self.set_value( "dc_battery_current", round( VALUES["dc_battery_current"] * sun, 1 ) )
+            if time.monotonic() - self._last_hex >= self.HEX_PAUSE: self._send( self.text_block(), text=True )
+
+    def text_block( self ):
+        """ One TEXT protocol block from the register map, checksummed."""
+        rs = self.model == "rs"
+        volts = "dc_battery_voltage" if rs else "charger_voltage"
+        amps = "dc_battery_current" if rs else "charger_current"
+        fields = [ ( "PID", "0x%04X" % self._identity["pid"] ), ( "FW", "161" ),
+                   ( "SER#", self._identity["serial_number"] ),
+                   ( "V", int( self.get_value( volts ) * 1000 ) ), ( "I", int( self.get_value( amps ) * 1000 ) ),
+                   ( "VPV", int( self.get_value( "panel_voltage" ) * 1000 ) ), ( "PPV", int( self.get_value( "panel_power" ) ) ),
+                   ( "CS", int( self.get_value( "device_state" ) ) ), ( "MPPT", int( self.get_value( "tracker_mode" ) ) ),
+                   ( "OR", "0x00000000" ), ( "ERR", int( self.get_value( "charger_error_code" ) ) ) ]
+        if not rs: fields += [ ( "LOAD", "ON" ), ( "IL", int( self.get_value( "load_current" ) * 1000 ) ) ]
+        fields += [ ( "H19", int( self.get_value( "user_yield" ) * 100 ) ), ( "H20", int( self.get_value( "yield_today" ) * 100 ) ),
+                    ( "H21", int( self.get_value( "max_power_today" ) ) ), ( "H22", int( self.get_value( "yield_yesterday" ) * 100 ) ),
+                    ( "H23", int( self.get_value( "max_power_yesterday" ) ) ), ( "HSDS", 200 ) ]
+        block = b''.join( b'\r\n%s\t%s' % ( label.encode(), str( value ).encode() ) for label, value in fields )
+        block += b'\r\nChecksum\t'
+        return block + bytes( [ -sum( block ) & 0xFF ] )
+#-------------------------------------------------------------------------------
+#*******************************************************************************
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<< Tester >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser( description="VE.Direct device simulator on a pseudo terminal." )
+    parser.add_argument( "--model", choices=sorted( MODELS ), default="mppt" )
+    parser.add_argument( "--baudrate", type=int, default=19200, help="line speed to pace output at, 0 for none" )
+    parser.add_argument( "--heartbeat", type=float, default=1.0, help="TEXT block period in seconds, 0 for none" )
+    args = parser.parse_args()
+
+    sim = VEDirectSim( args.model, args.baudrate or None, args.heartbeat or None )
+    print( sim._PREFIX + "Simulating " + sim._identity["model_name"] + " on " + sim.start() )
+    try:
+        while True: time.sleep( 1 )
+    except KeyboardInterrupt: pass
+    sim.stop()
+#*******************************************************************************